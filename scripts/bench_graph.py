@@ -0,0 +1,259 @@
+"""End-to-end throughput benchmark of the compiled agent graph, without an LLM.
+
+Runs `react_agent.graph` with a scripted chat model in place of the real
+one, against the database configured by the DB_* environment variables (load a
+local one with `scripts/synthetic_warehouse.py`). Each run replays the turns the
+agent typically takes for one of the listed views:
+
+1. `list_tables_tool` and `find_tables_tool` in parallel,
+2. `get_schemas_tool` for the view,
+3. `db_query_tool` with a monthly aggregate over the view,
+4. a final answer.
+
+For each concurrency level the benchmark reports runs per second, the p50/p95
+latency of whole runs, and of every graph node and tool, so performance
+regressions in the graph, the tools or the database layer show up without
+network access. The model answers instantly unless `--model-latency` is given.
+
+    python scripts/bench_graph.py --runs 50 --concurrency 1 4 16
+    python scripts/bench_graph.py --model-latency 0.5 --query-cache --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from react_agent import db, graph
+from react_agent.catalog import catalog
+from react_agent.stats_store import DEFAULT_PATH, StatsStore
+from react_agent.tools import _is_listed
+from react_agent.utils import model_registry
+
+NODES = ("call_model", "tools")
+
+
+class ScriptedChatModel(BaseChatModel):
+    """A chat model that replays a fixed sequence of responses per question.
+
+    The response is chosen from the conversation itself (the first human message
+    picks the script, the number of AI messages so far the step), so one instance
+    serves any number of concurrent runs.
+    """
+
+    scripts: Dict[str, List[AIMessage]]
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ScriptedChatModel":
+        """Return the model itself: the scripts already name the tools."""
+        return self
+
+    def _respond(self, messages: List[BaseMessage]) -> ChatResult:
+        question = next(str(m.content) for m in messages if isinstance(m, HumanMessage))
+        script = self.scripts[question]
+        step = sum(isinstance(m, AIMessage) for m in messages)
+        message = script[min(step, len(script) - 1)].model_copy()
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._respond(messages)
+
+
+def _call(name: str, args: Dict[str, Any], step: int, index: int = 0) -> Dict[str, Any]:
+    return {"name": name, "args": args, "id": f"call_{step}_{index}", "type": "tool_call"}
+
+
+def build_scripts(store: StatsStore, limit: int, seed: int) -> Dict[str, List[AIMessage]]:
+    """One script per listed view that has a date and a numeric column, keyed by question."""
+    scripts: Dict[str, List[AIMessage]] = {}
+    names = [name for name in store.names() if _is_listed(name)]
+    random.Random(seed).shuffle(names)
+    for name in names:
+        columns = store.columns(name) or {}
+        dates = [c for c, info in columns.items() if info.get("category") in ("date", "timestamp")]
+        numbers = [c for c, info in columns.items() if info.get("category") == "numeric"]
+        if not dates or not numbers:
+            continue
+        schema, table = name.split(".", 1)
+        question = f"What is the monthly total of {numbers[0]} in {table}?"
+        query = (
+            f'SELECT date_trunc(\'month\', "{dates[0]}") AS month, sum("{numbers[0]}") AS total, '
+            f'count(*) AS row_count FROM "{schema}"."{table}" GROUP BY 1 ORDER BY 1'
+        )
+        scripts[question] = [
+            AIMessage(content="", tool_calls=[
+                _call("list_tables_tool", {}, 0, 0),
+                _call("find_tables_tool", {"question": question}, 0, 1),
+            ]),
+            AIMessage(content="", tool_calls=[
+                _call("get_schemas_tool", {"full_table_names": [name], "keywords": [numbers[0]]}, 1),
+            ]),
+            AIMessage(content="", tool_calls=[_call("db_query_tool", {"query": query}, 2)]),
+            AIMessage(content=f"Here is the monthly total of {numbers[0]}."),
+        ]
+        if len(scripts) >= limit:
+            break
+    return scripts
+
+
+class Timings(BaseCallbackHandler):
+    """Collects the duration of every graph node and tool call."""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        """Start with no timings."""
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self._started: Dict[UUID, tuple] = {}
+
+    def on_chain_start(self, serialized: Any, inputs: Any, *, run_id: UUID, metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        """Start timing a node; other chains are ignored."""
+        name = kwargs.get("name")
+        if name in NODES and (metadata or {}).get("langgraph_node") == name:
+            self._started[run_id] = (f"node {name}", time.perf_counter())
+
+    def on_tool_start(self, serialized: Any, input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        """Start timing a tool call."""
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        self._started[run_id] = (f"tool {name}", time.perf_counter())
+
+    def _end(self, run_id: UUID) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.durations[started[0]].append(time.perf_counter() - started[1])
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        """Stop timing a node."""
+        self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        """Stop timing a node that failed."""
+        self._end(run_id)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        """Stop timing a tool call."""
+        self._end(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        """Stop timing a tool call that failed."""
+        self._end(run_id)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """The nearest-rank `q`-th percentile of `values`."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q / 100 * len(ordered)) - 1, 0)] if ordered else float("nan")
+
+
+async def run_level(
+    questions: List[str], runs: int, concurrency: int, configurable: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Run `runs` conversations, `concurrency` at a time, and summarize the timings."""
+    timings = Timings()
+    latencies: List[float] = []
+    failures = 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal failures
+        question = questions[i % len(questions)]
+        async with slots:
+            start = time.perf_counter()
+            result = await graph.ainvoke(
+                {"messages": [("user", question)]},
+                {"configurable": configurable, "callbacks": [timings]},
+            )
+            latencies.append(time.perf_counter() - start)
+        query_results = [
+            m.content for m in result["messages"] if getattr(m, "name", None) == "db_query_tool"
+        ]
+        if not query_results or '"success": true' not in query_results[-1].lower():
+            failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(runs)))
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "runs": runs,
+        "failures": failures,
+        "runs_per_second": runs / elapsed,
+        "run": {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95)},
+        "spans": {
+            name: {"count": len(values), "p50": percentile(values, 50), "p95": percentile(values, 95)}
+            for name, values in sorted(timings.durations.items())
+        },
+    }
+
+
+def _print_level(level: Dict[str, Any]) -> None:
+    print(
+        f"\nconcurrency {level['concurrency']}: {level['runs_per_second']:.1f} runs/s, "
+        f"run p50 {level['run']['p50'] * 1000:.1f} ms, p95 {level['run']['p95'] * 1000:.1f} ms"
+        + (f", {level['failures']} failed" if level["failures"] else "")
+    )
+    for name, span in level["spans"].items():
+        print(f"  {name:<24} n={span['count']:<5} p50 {span['p50'] * 1000:8.2f} ms   p95 {span['p95'] * 1000:8.2f} ms")
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the benchmark at each concurrency level."""
+    scripts = build_scripts(StatsStore(args.store, readonly=True), args.tables, args.seed)
+    if not scripts:
+        raise SystemExit(f"No listed view with a date and a numeric column in {args.store}")
+    model = ScriptedChatModel(scripts=scripts, latency=args.model_latency)
+    # Every run asks the registry for its model; hand out the scripted one instead.
+    model_registry.get = lambda *a, **kw: model  # type: ignore[method-assign]
+
+    configurable = {
+        "use_query_cache": args.query_cache,
+        "max_process_tool_calls": args.max_process_tool_calls,
+    }
+    questions = list(scripts)
+    print(f"{len(questions)} scripted conversations, {args.runs} runs per level")
+    # Warm the catalog and the pool so the first level is not charged for them.
+    await run_level(questions, min(len(questions), 4), 1, configurable)
+
+    results = []
+    for concurrency in args.concurrency:
+        level = await run_level(questions, args.runs, concurrency, configurable)
+        _print_level(level)
+        results.append(level)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    await catalog.aclose()
+    await db.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=40, help="Runs per concurrency level.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--tables", type=int, default=20, help="Distinct scripted conversations.")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="Seconds each model call takes.")
+    parser.add_argument("--query-cache", action="store_true", help="Let db_query_tool use its result cache.")
+    parser.add_argument("--max-process-tool-calls", type=int, default=16)
+    parser.add_argument("--store", default=DEFAULT_PATH)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this file.")
+    asyncio.run(main(parser.parse_args()))
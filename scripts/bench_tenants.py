@@ -0,0 +1,157 @@
+"""Benchmark the cost of switching between sellers' database roles.
+
+Creates `--sellers` login roles in the database configured by the DB_* variables
+(the configured user must be allowed to create roles), then serves a random
+sequence of requests, each for one seller, through:
+
+- `connect`: a new connection per request, as the per-seller connection cache
+  did whenever a seller was not (or no longer) cached;
+- `pools`: `react_agent.db.TenantPools` with room for every seller, i.e. warm;
+- `pools-evicting`: `TenantPools` with room for a quarter of the sellers, so
+  most requests open a pool and another one is closed;
+- `set-role`: `SET ROLE` / `RESET ROLE` on the shared pool, for reference
+  (not used by the agent: SQL from the model could reset the role itself).
+
+Each request runs `SELECT current_user` and checks the answer. The cost of a new
+connection grows with the distance to the server and TLS, so run it against a
+database like the production one for absolute numbers.
+
+    DB_NAME=scratch python scripts/bench_tenants.py --sellers 64 --requests 2000 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+from psycopg import AsyncConnection, sql
+
+from react_agent import db
+
+ROLE_TEMPLATE = "bench_seller_{seller_id}"
+
+
+async def create_roles(sellers: List[str]) -> None:
+    """Create a login role for each seller, if missing."""
+    async with db.connection() as conn:
+        for seller_id in sellers:
+            role = ROLE_TEMPLATE.format(seller_id=seller_id)
+            cur = await conn.execute("SELECT 1 FROM pg_roles WHERE rolname = %s", (role,))
+            if await cur.fetchone() is None:
+                await conn.execute(sql.SQL("CREATE ROLE {} LOGIN").format(sql.Identifier(role)))
+
+
+async def drop_roles(sellers: List[str]) -> None:
+    """Drop the sellers' roles."""
+    async with db.connection() as conn:
+        for seller_id in sellers:
+            role = ROLE_TEMPLATE.format(seller_id=seller_id)
+            await conn.execute(sql.SQL("DROP ROLE IF EXISTS {}").format(sql.Identifier(role)))
+
+
+async def _check(conn: AsyncConnection[Any], seller_id: str) -> None:
+    cur = await conn.execute("SELECT current_user")
+    row = await cur.fetchone()
+    assert row is not None and row[0] == ROLE_TEMPLATE.format(seller_id=seller_id), row
+
+
+async def run(
+    name: str,
+    request: Callable[[str], Awaitable[None]],
+    sequence: List[str],
+    concurrency: int,
+) -> Dict[str, Any]:
+    """Serve `sequence`, `concurrency` requests at a time, and time each request."""
+    latencies: List[float] = []
+    queue = iter(sequence)
+
+    async def worker() -> None:
+        for seller_id in queue:
+            start = time.perf_counter()
+            await request(seller_id)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "name": name,
+        "requests_per_second": len(sequence) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run every strategy on the same request sequence."""
+    sellers = [str(i) for i in range(args.sellers)]
+    await create_roles(sellers)
+    rng = random.Random(args.seed)
+    sequence = [rng.choice(sellers) for _ in range(args.requests)]
+
+    async def connect(seller_id: str) -> None:
+        conn = await AsyncConnection.connect(
+            db._conninfo(ROLE_TEMPLATE.format(seller_id=seller_id)), autocommit=True
+        )
+        try:
+            await _check(conn, seller_id)
+        finally:
+            await conn.close()
+
+    def pooled(max_pools: int) -> Callable[[str], Awaitable[None]]:
+        pools = db.TenantPools(
+            db.TenantSettings(
+                user_template=ROLE_TEMPLATE, password=None, max_pools=max_pools, pool_size=2
+            )
+        )
+        strategies.append(pools)
+
+        async def request(seller_id: str) -> None:
+            async with pools.connection(seller_id) as conn:
+                await _check(conn, seller_id)
+
+        return request
+
+    async def set_role(seller_id: str) -> None:
+        role = sql.Identifier(ROLE_TEMPLATE.format(seller_id=seller_id))
+        async with db.connection() as conn:
+            await conn.execute(sql.SQL("SET ROLE {}").format(role))
+            try:
+                await _check(conn, seller_id)
+            finally:
+                await conn.execute("RESET ROLE")
+
+    strategies: List[db.TenantPools] = []
+    cases = [
+        ("connect", connect),
+        ("pools", pooled(args.sellers)),
+        ("pools-evicting", pooled(max(args.sellers // 4, 1))),
+        ("set-role", set_role),
+    ]
+    print(f"{args.sellers} sellers, {args.requests} requests, concurrency {args.concurrency}")
+    for name, request in cases:
+        # One pass to warm up, then the measured one.
+        await run(name, request, sequence[: args.sellers], args.concurrency)
+        result = await run(name, request, sequence, args.concurrency)
+        print(
+            f"  {name:<16} {result['requests_per_second']:8.0f} req/s   "
+            f"p50 {result['p50_ms']:6.2f} ms   p95 {result['p95_ms']:6.2f} ms"
+        )
+    for pools in strategies:
+        print(f"  TenantPools(max_pools={pools.settings.max_pools}): {pools.misses} opened, {pools.evictions} evicted")
+        await pools.aclose()
+    if args.cleanup:
+        await drop_roles(sellers)
+    await db.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sellers", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cleanup", action="store_true", help="Drop the seller roles afterwards.")
+    asyncio.run(main(parser.parse_args()))
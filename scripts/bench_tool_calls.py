@@ -0,0 +1,99 @@
+"""Benchmark one tools-node turn with serial vs concurrent tool calls.
+
+Replays the turn the agent typically produces before writing SQL: a single
+AIMessage with one `get_schema_tool` call per table it plans to use. The schema
+catalog is invalidated before every turn, so each turn loads the metadata of
+the schemas involved again. `--query` swaps in `db_query_tool` calls instead.
+
+Uses the database configured by the usual DB_* environment variables:
+
+    python scripts/bench_tool_calls.py --runs 5
+    python scripts/bench_tool_calls.py --query "SELECT pg_sleep(0.1)" --parallel 1 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, List
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph
+
+from react_agent import db
+from react_agent.catalog import catalog
+from react_agent.configuration import Configuration
+from react_agent.graph import call_tools
+from react_agent.state import State
+
+TABLES = [
+    "sp_api_thrive_2.sales_and_traffic_business_report_daily",
+    "sp_api_thrive_2.sales_and_traffic_business_report_monthly",
+    "amazon_ads_thrive.campaign_level_report_view",
+    "amazon_ads_thrive.campaign_history_view",
+    "amazon_ads_thrive.keyword_history_view",
+]
+
+
+def _tool_calls(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    if args.query:
+        return [
+            {
+                "name": "db_query_tool",
+                "args": {"query": args.query},
+                "id": f"call_{i}",
+                "type": "tool_call",
+            }
+            for i in range(args.calls)
+        ]
+    return [
+        {
+            "name": "get_schema_tool",
+            "args": {"full_table_name": TABLES[i % len(TABLES)]},
+            "id": f"call_{i}",
+            "type": "tool_call",
+        }
+        for i in range(args.calls)
+    ]
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the benchmark and print one line per concurrency setting."""
+    builder = StateGraph(State, config_schema=Configuration)
+    builder.add_node("tools", call_tools)
+    builder.add_edge("__start__", "tools")
+    tools_only = builder.compile()
+
+    messages = [HumanMessage(content="benchmark"), AIMessage(content="", tool_calls=_tool_calls(args))]
+    expected = [call["id"] for call in messages[1].tool_calls]
+
+    print(f"{len(expected)} tool calls per turn, {args.runs} runs")
+    for parallel in args.parallel:
+        config = {"configurable": {"max_parallel_tool_calls": parallel, "use_query_cache": False}}
+        timings = []
+        for _ in range(args.runs):
+            catalog.invalidate()
+            start = time.perf_counter()
+            out = await tools_only.ainvoke({"messages": messages}, config)
+            timings.append(time.perf_counter() - start)
+            results = out["messages"][2:]
+            assert [m.tool_call_id for m in results] == expected
+            # Timing failed calls, e.g. argument validation errors, would be meaningless.
+            errors = [m.content for m in results if m.status == "error"]
+            assert not errors, errors[0]
+        print(
+            f"max_parallel_tool_calls={parallel:<3} "
+            f"median {statistics.median(timings) * 1000:8.1f} ms   "
+            f"min {min(timings) * 1000:8.1f} ms"
+        )
+    await catalog.aclose()
+    await db.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--calls", type=int, default=len(TABLES))
+    parser.add_argument("--query", help="Benchmark db_query_tool calls running this SQL instead.")
+    parser.add_argument("--parallel", type=int, nargs="+", default=[1, 5], help="Per-run limits to compare.")
+    asyncio.run(main(parser.parse_args()))
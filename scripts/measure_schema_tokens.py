@@ -0,0 +1,105 @@
+"""Measure how many prompt tokens the schema tools spend per view, by format.
+
+Runs offline: column names and types come from the statistics store in
+data/schema_stats, and comments from scripts/table_descriptions.json (the
+descriptions that get applied as column comments). Tokens are counted with the
+o200k_base encoding used by the GPT-4o/GPT-5 model families, or estimated as
+characters / 4 when the encoding cannot be loaded (it is downloaded on first use).
+
+    python scripts/measure_schema_tokens.py
+    python scripts/measure_schema_tokens.py --keywords sales units --top 10
+"""
+
+import argparse
+import json
+import os
+from typing import Callable, Dict, List
+
+import tiktoken
+
+from react_agent.catalog import Column, Relation
+from react_agent.schema_format import render_relation
+from react_agent.stats_store import DEFAULT_PATH, StatsStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_relations() -> List[Relation]:
+    """Build a Relation per view in the statistics, with generated comments."""
+    with open(os.path.join(ROOT, "scripts", "table_descriptions.json")) as f:
+        descriptions: Dict[str, Dict[str, str]] = json.load(f)
+
+    relations = []
+    store = StatsStore(os.path.join(ROOT, DEFAULT_PATH), readonly=True)
+    for full_name, columns in store.all_columns().items():
+        schema, name = full_name.split(".", 1)
+        # amazon_ads descriptions are keyed by {schema}.{table_name}, sp_api ones by table_name.
+        comments = descriptions.get(full_name) or descriptions.get(name) or {}
+        relations.append(
+            Relation(
+                schema,
+                name,
+                "v",
+                [
+                    Column(column, info["data_type"], comments.get(column))
+                    for column, info in columns.items()
+                ],
+            )
+        )
+    return relations
+
+
+def token_counter() -> Callable[[str], int]:
+    """Return a function counting the tokens of a string."""
+    try:
+        encoding = tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"o200k_base unavailable ({type(e).__name__}); estimating tokens as chars / 4\n")
+        return lambda text: (len(text) + 3) // 4
+    return lambda text: len(encoding.encode(text))
+
+
+def main(args: argparse.Namespace) -> None:
+    """Print per-format token totals and the largest views."""
+    count_tokens = token_counter()
+    relations = load_relations()
+    formats = {
+        "verbose": {"style": "verbose"},
+        f"compact, {args.comment_chars}-char comments": {"comment_chars": args.comment_chars},
+        "compact, no comments": {"comment_chars": 0},
+    }
+    if args.keywords:
+        formats[f"compact, keywords={args.keywords}"] = {
+            "comment_chars": args.comment_chars,
+            "keywords": args.keywords,
+        }
+
+    tokens: Dict[str, List[int]] = {
+        label: [count_tokens(render_relation(rel, **options)) for rel in relations]
+        for label, options in formats.items()
+    }
+    baseline = sum(tokens["verbose"])
+    columns = sum(len(rel.columns) for rel in relations)
+    print(f"{len(relations)} views, {columns} columns\n")
+    print(f"{'format':<50} {'total':>8} {'per view':>9} {'vs verbose':>11}")
+    for label, counts in tokens.items():
+        total = sum(counts)
+        print(f"{label:<50} {total:>8} {total / len(relations):>9.0f} {total / baseline:>10.0%}")
+
+    print(f"\nLargest {args.top} views (verbose -> compact tokens):")
+    largest = sorted(range(len(relations)), key=lambda i: -tokens["verbose"][i])[: args.top]
+    compact = list(tokens)[1]
+    for i in largest:
+        rel = relations[i]
+        print(
+            f"  {rel.full_name:<70} {len(rel.columns):>3} cols "
+            f"{tokens['verbose'][i]:>6} -> {tokens[compact][i]:>5}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--comment-chars", type=int, default=80)
+    parser.add_argument("--keywords", nargs="*", help="Also measure keyword filtering with these words.")
+    parser.add_argument("--top", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,239 @@
+"""Load a local Postgres with synthetic data shaped like the warehouse views.
+
+Every table in the column statistics store (`data/schema_stats`) becomes a view
+`{schema}.{table_name}` over a base table in `synthetic_{schema}`, with the same
+columns and types, filled with rows drawn from the recorded statistics: numbers
+around the mean within [min, max], dates and timestamps across the recorded
+range, text from the top values (or random strings of the average length), and
+nulls at the recorded rate. Column comments come from the descriptions file, as
+in production.
+
+The point is a database the agent's tools can run against without network
+access, e.g. for `scripts/bench_graph.py`. It replaces whatever is in the target
+schemas, so point the DB_* environment variables at a scratch database:
+
+    python scripts/synthetic_warehouse.py --rows 5000
+    python scripts/synthetic_warehouse.py amazon_ads_thrive --max-rows 20000 --seed 7
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import string
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from psycopg import AsyncConnection, sql
+
+from react_agent import db
+from react_agent.comments import apply_descriptions
+from react_agent.descriptions import DESCRIPTIONS_PATH
+from react_agent.stats_store import DEFAULT_PATH, StatsStore
+
+SCHEMAS = ["sp_api_thrive_2", "amazon_ads_thrive"]
+
+_Generator = Callable[[random.Random], Any]
+
+
+def _null_fraction(stats: Dict[str, Any]) -> float:
+    total = stats.get("total_rows") or 0
+    nulls = stats.get("null_rows", stats.get("null_count")) or 0
+    return nulls / total if total else 0.0
+
+
+def _parse_instant(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _weighted_top(top: List[Dict[str, Any]]) -> Optional[_Generator]:
+    values = [entry["value"] for entry in top if entry.get("value") is not None]
+    weights = [entry.get("count") or 1 for entry in top if entry.get("value") is not None]
+    if not values:
+        return None
+    return lambda rng: rng.choices(values, weights)[0]
+
+
+def column_generator(column: Dict[str, Any]) -> _Generator:
+    """Return a function drawing one value (as COPY text, or None) for `column`.
+
+    Args:
+        column (dict): The column's entry in the statistics store: data_type,
+            category and stats.
+    """
+    stats = column.get("stats") or {}
+    category = column.get("category")
+    data_type = column.get("data_type") or "text"
+    draw: _Generator
+
+    if category == "numeric":
+        low = stats.get("min_value")
+        high = stats.get("max_value")
+        low = float(low) if low is not None else 0.0
+        high = float(high) if high is not None else low + 100.0
+        mean = float(stats.get("avg_value") or (low + high) / 2)
+        spread = float(stats.get("stddev") or (high - low) / 4 or 1.0)
+        median = stats.get("median")
+        integral = data_type in ("integer", "bigint", "smallint")
+
+        def draw(rng: random.Random) -> Any:
+            # Reports are mostly zero-heavy: honour a zero median before sampling.
+            if median == 0 and rng.random() < 0.5:
+                return 0
+            value = min(max(rng.gauss(mean, spread), low), high)
+            return round(value) if integral else round(value, 4)
+
+    elif category in ("date", "timestamp"):
+        start = _parse_instant(stats.get("min_value")) or datetime(2024, 1, 1)
+        end = _parse_instant(stats.get("max_value")) or start + timedelta(days=365)
+        seconds = max(int((end - start).total_seconds()), 1)
+
+        def draw(rng: random.Random) -> Any:
+            instant = start + timedelta(seconds=rng.randrange(seconds))
+            return instant.date().isoformat() if category == "date" else instant.isoformat()
+
+    elif category == "boolean":
+        trues = stats.get("true_count") or 1
+        falses = stats.get("false_count") or 1
+
+        def draw(rng: random.Random) -> Any:
+            return "t" if rng.random() < trues / (trues + falses) else "f"
+
+    elif category == "json":
+
+        def draw(rng: random.Random) -> Any:
+            return json.dumps({"id": rng.randrange(1000)})
+
+    else:
+        top = _weighted_top(stats.get("top_values") or [])
+        distinct = stats.get("distinct_values") or 0
+        length = max(int(round(stats.get("avg_length") or 8)), 1)
+        if top is not None and (distinct <= len(stats.get("top_values") or []) or distinct < 50):
+            draw = top
+        else:
+            alphabet = string.ascii_uppercase + string.digits
+
+            def draw(rng: random.Random) -> Any:
+                if top is not None and rng.random() < 0.3:
+                    return top(rng)
+                return "".join(rng.choices(alphabet, k=length))
+
+    null_fraction = _null_fraction(stats)
+    if not null_fraction:
+        return draw
+    return lambda rng: None if rng.random() < null_fraction else draw(rng)
+
+
+async def load_table(
+    conn: AsyncConnection[Any],
+    name: str,
+    columns: Dict[str, Dict[str, Any]],
+    rows: int,
+    rng: random.Random,
+) -> None:
+    """Create the base table and view for `name` ({schema}.{table_name}) and fill it."""
+    schema, table = name.split(".", 1)
+    base = sql.Identifier(f"synthetic_{schema}", table)
+    view = sql.Identifier(schema, table)
+    definitions = sql.SQL(", ").join(
+        sql.SQL("{} {}").format(sql.Identifier(column), sql.SQL(info.get("data_type") or "text"))
+        for column, info in columns.items()
+    )
+    generators = [column_generator(info) for info in columns.values()]
+    async with conn.transaction():
+        await conn.execute(sql.SQL("DROP VIEW IF EXISTS {}").format(view))
+        await conn.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(base))
+        await conn.execute(sql.SQL("CREATE TABLE {} ({})").format(base, definitions))
+        async with conn.cursor().copy(sql.SQL("COPY {} FROM STDIN").format(base)) as copy:
+            for _ in range(rows):
+                await copy.write_row([generate(rng) for generate in generators])
+        await conn.execute(sql.SQL("CREATE VIEW {} AS SELECT * FROM {}").format(view, base))
+    await conn.execute(sql.SQL("ANALYZE {}").format(base))
+
+
+async def load(
+    schemas: Sequence[str],
+    store: StatsStore,
+    rows: Optional[int],
+    max_rows: int,
+    descriptions: Optional[Dict[str, Any]],
+    seed: int,
+) -> Dict[str, int]:
+    """Build the synthetic views of `schemas`.
+
+    Args:
+        schemas (Sequence[str]): The schemas to (re)create.
+        store (StatsStore): Where the tables, columns and statistics come from.
+        rows (int, optional): Rows per table. Defaults to each table's recorded
+            row count, capped at `max_rows`.
+        max_rows (int): Upper bound on the rows of any table.
+        descriptions (dict, optional): The descriptions file, applied as column comments.
+        seed (int): Seed for the random generator, so loads are reproducible.
+
+    Returns:
+        The number of rows loaded per table.
+    """
+    rng = random.Random(seed)
+    loaded: Dict[str, int] = {}
+    async with await AsyncConnection.connect(db._conninfo(), autocommit=True) as conn:
+        for schema in schemas:
+            await conn.execute(sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(sql.Identifier(schema)))
+            await conn.execute(
+                sql.SQL("CREATE SCHEMA IF NOT EXISTS {}").format(sql.Identifier(f"synthetic_{schema}"))
+            )
+            for name in store.names():
+                if not name.startswith(f"{schema}."):
+                    continue
+                columns = store.columns(name) or {}
+                if not columns:
+                    continue
+                total = max((c.get("stats") or {}).get("total_rows") or 0 for c in columns.values())
+                count = min(rows if rows is not None else total or max_rows, max_rows)
+                await load_table(conn, name, columns, count, rng)
+                loaded[name] = count
+        if descriptions:
+            for plan in await apply_descriptions(conn, descriptions, schemas):
+                print(plan.summary())
+    return loaded
+
+
+async def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("schemas", nargs="*", default=SCHEMAS)
+    parser.add_argument("--store", default=DEFAULT_PATH)
+    parser.add_argument("--rows", type=int, help="Rows per table (default: the recorded row count).")
+    parser.add_argument("--max-rows", type=int, default=20_000)
+    parser.add_argument("--descriptions", default=DESCRIPTIONS_PATH)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    descriptions = None
+    if args.descriptions:
+        with open(args.descriptions, encoding="utf-8") as f:
+            descriptions = json.load(f)
+
+    start = time.perf_counter()
+    loaded = await load(
+        args.schemas, StatsStore(args.store, readonly=True), args.rows, args.max_rows, descriptions, args.seed
+    )
+    print(
+        f"Loaded {len(loaded)} views, {sum(loaded.values())} rows "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
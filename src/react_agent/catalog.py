@@ -0,0 +1,247 @@
+"""Process-wide cache of table and column metadata.
+
+The agent looks up the same handful of report views on every turn, and the
+catalog queries behind `list_tables_tool` and `get_schema_tool` join several
+`pg_catalog` tables against a schema that almost never changes. This module keeps
+one in-memory copy of that metadata per schema, shared by every run in the
+process.
+
+An entry is served from memory until its TTL (`SCHEMA_CATALOG_TTL`, seconds)
+expires. After that the next lookup still answers from memory, and a background
+task compares the schema's version hash with the one the entry was loaded at.
+The metadata is reloaded only if the hash changed. Entries can also be dropped
+explicitly with `SchemaCatalog.invalidate`, or from the database: set
+`SCHEMA_CATALOG_CHANNEL` and have an event trigger `NOTIFY` that channel with a
+comma-separated list of changed schemas (an empty payload invalidates everything):
+
+    CREATE FUNCTION notify_schema_catalog() RETURNS event_trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM pg_notify(
+            'react_agent_schema',
+            coalesce((SELECT string_agg(DISTINCT schema_name, ',')
+                      FROM pg_event_trigger_ddl_commands()), '')
+        );
+    END $$;
+    CREATE EVENT TRIGGER notify_schema_catalog ON ddl_command_end
+        EXECUTE FUNCTION notify_schema_catalog();
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import psycopg
+from psycopg import sql
+
+from react_agent import db, telemetry
+
+_VERSION_QUERY = """
+    SELECT md5(coalesce(string_agg(
+        format('%%s.%%s:%%s:%%s:%%s', c.relname, c.relkind, a.attname, a.atttypid, d.description),
+        ',' ORDER BY c.relname, a.attnum
+    ), ''))
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    LEFT JOIN pg_description d
+        ON d.objoid = c.oid AND d.classoid = 'pg_class'::regclass AND d.objsubid = a.attnum
+    WHERE n.nspname = %s AND c.relkind IN ('r', 'v', 'm', 'p', 'f');
+"""
+
+# pg_catalog rather than information_schema.columns, which leaves out
+# materialized views such as the rollups of `react_agent.rollups`.
+_COLUMNS_QUERY = """
+    SELECT
+        c.relname,
+        c.relkind,
+        a.attname,
+        format_type(a.atttypid, NULL),
+        col_description(c.oid, a.attnum) AS column_comment
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    WHERE n.nspname = %s
+        AND c.relkind IN ('r', 'v', 'm', 'p', 'f')
+        AND has_column_privilege(c.oid, a.attnum, 'SELECT, INSERT, UPDATE, REFERENCES')
+    ORDER BY c.relname, a.attnum;
+"""
+
+
+@dataclass(frozen=True)
+class Column:
+    """A single column of a cached table or view."""
+
+    name: str
+    data_type: str
+    comment: Optional[str] = None
+
+
+@dataclass
+class Relation:
+    """A cached table or view and its columns, in ordinal order."""
+
+    schema: str
+    name: str
+    kind: str
+    """The `pg_class.relkind` of the relation, e.g. 'v' for a view."""
+
+    columns: List[Column] = field(default_factory=list)
+
+    @property
+    def full_name(self) -> str:
+        """The name in {schema}.{table_name} form."""
+        return f"{self.schema}.{self.name}"
+
+
+@dataclass
+class _SchemaEntry:
+    relations: Dict[str, Relation]
+    version: str
+    loaded_at: float
+
+
+class SchemaCatalog:
+    """TTL cache of relation metadata, loaded one whole schema at a time."""
+
+    def __init__(self, ttl: Optional[float] = None) -> None:
+        """Create an empty catalog.
+
+        Args:
+            ttl (float, optional): Seconds before an entry is revalidated against the
+                database. Defaults to `SCHEMA_CATALOG_TTL` or 300.
+        """
+        self.ttl = ttl if ttl is not None else float(os.getenv("SCHEMA_CATALOG_TTL", "300"))
+        self._entries: Dict[str, _SchemaEntry] = {}
+        self._pending: Dict[str, "asyncio.Task[_SchemaEntry]"] = {}
+
+    async def relation(self, schema: str, table: str) -> Optional[Relation]:
+        """Return the cached metadata for `schema.table`, or None if it does not exist."""
+        entry = await self._entry(schema)
+        return entry.relations.get(table)
+
+    async def relations(self, names: Sequence[Tuple[str, str]]) -> List[Optional[Relation]]:
+        """Return the metadata for each (schema, table) in `names`, None where it does not exist.
+
+        Each distinct schema is looked up once, and schemas not yet cached are loaded
+        concurrently.
+        """
+        schemas = list(dict.fromkeys(schema for schema, _ in names))
+        entries = dict(zip(schemas, await asyncio.gather(*(self._entry(s) for s in schemas))))
+        return [entries[schema].relations.get(table) for schema, table in names]
+
+    async def views(self, schemas: Sequence[str]) -> List[str]:
+        """Return the views and materialized views in `schemas` as {schema}.{table_name}, ordered by schema and name."""
+        entries = await asyncio.gather(*(self._entry(schema) for schema in schemas))
+        return sorted(
+            rel.full_name
+            for entry in entries
+            for rel in entry.relations.values()
+            if rel.kind in ("v", "m")
+        )
+
+    async def warm(self, schemas: Sequence[str]) -> None:
+        """Load `schemas` ahead of the first lookup."""
+        await asyncio.gather(*(self._entry(schema) for schema in schemas))
+
+    def invalidate(self, schema: Optional[str] = None) -> None:
+        """Drop one schema from the cache, or all of them when `schema` is None."""
+        if schema is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(schema, None)
+
+    async def aclose(self) -> None:
+        """Cancel any loads still in flight, e.g. before the connection pool is closed."""
+        pending = list(self._pending.values())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def listen(self, channel: str, retry_seconds: float = 1.0) -> None:
+        """Invalidate schemas named in `NOTIFY` payloads on `channel`, until cancelled.
+
+        Uses a dedicated connection rather than one from the pool, since it is
+        held for the lifetime of the process. If that connection drops, it is
+        reopened after `retry_seconds`, doubling up to a minute while it keeps
+        failing; every schema is invalidated on reconnect, since notifications
+        sent in between were lost.
+        """
+        delay = retry_seconds
+        connected_before = False
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    db._conninfo(), autocommit=True
+                ) as conn:
+                    await conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+                    if connected_before:
+                        print(f"Schema catalog listener reconnected to {channel}")
+                        self.invalidate()
+                    connected_before = True
+                    delay = retry_seconds
+                    async for notify in conn.notifies():
+                        changed = [s for s in notify.payload.split(",") if s]
+                        if not changed:
+                            self.invalidate()
+                        for schema in changed:
+                            self.invalidate(schema)
+            except Exception as e:
+                print(f"Schema catalog listener error, reconnecting in {delay:.0f}s: {str(e)}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60.0)
+
+    async def _entry(self, schema: str) -> _SchemaEntry:
+        entry = self._entries.get(schema)
+        if entry is None:
+            return await self._spawn(schema, None)
+        if time.monotonic() - entry.loaded_at > self.ttl:
+            # Serve the stale entry and revalidate in the background.
+            self._spawn(schema, entry)
+        return entry
+
+    def _spawn(self, schema: str, stale: Optional[_SchemaEntry]) -> "asyncio.Task[_SchemaEntry]":
+        # Concurrent lookups of the same schema share a single load.
+        task = self._pending.get(schema)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._load(schema, stale))
+            task.add_done_callback(lambda t: self._done(schema, t))
+            self._pending[schema] = task
+        return task
+
+    def _done(self, schema: str, task: "asyncio.Task[_SchemaEntry]") -> None:
+        if self._pending.get(schema) is task:
+            del self._pending[schema]
+        # A failed background revalidation is retried on the next lookup.
+        if not task.cancelled():
+            task.exception()
+
+    async def _load(self, schema: str, stale: Optional[_SchemaEntry]) -> _SchemaEntry:
+        with telemetry.span("catalog.load", schema=schema) as span:
+            async with db.connection() as conn:
+                cur = await conn.execute(_VERSION_QUERY, (schema,))
+                row = await cur.fetchone()
+                version = row[0] if row else ""
+                if stale is not None and stale.version == version:
+                    stale.loaded_at = time.monotonic()
+                    span.set(reloaded=False)
+                    return stale
+                cur = await conn.execute(_COLUMNS_QUERY, (schema,))
+                rows = await cur.fetchall()
+            span.set(reloaded=True, rows=len(rows))
+
+        relations: Dict[str, Relation] = {}
+        for table_name, kind, column_name, data_type, comment in rows:
+            rel = relations.get(table_name)
+            if rel is None:
+                rel = relations[table_name] = Relation(schema, table_name, kind)
+            rel.columns.append(Column(column_name, data_type, comment))
+        entry = _SchemaEntry(relations, version, time.monotonic())
+        self._entries[schema] = entry
+        return entry
+
+
+catalog = SchemaCatalog()
+"""The catalog shared by every run in this process."""
@@ -0,0 +1,189 @@
+"""Apply generated column descriptions as PostgreSQL column comments.
+
+The descriptions file (`scripts/table_descriptions.json`) maps each table to
+{column: description}. For every schema, the current comments are read in one
+query and compared with the descriptions, and only the comments that differ are
+written: as one multi-statement `COMMENT ON COLUMN` batch, in one transaction
+per schema, with identifiers and comments quoted by psycopg. A schema is either
+fully updated or left as it was.
+
+    python -m react_agent.comments sp_api_thrive_2 amazon_ads_thrive --dry-run
+    python -m react_agent.comments amazon_ads_thrive --show-sql
+
+Connection settings come from the usual DB_* environment variables.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from psycopg import AsyncConnection, sql
+
+from react_agent import db
+from react_agent.descriptions import DESCRIPTIONS_PATH
+
+_COMMENTS_QUERY = """
+    SELECT c.relname, a.attname, col_description(c.oid, a.attnum)
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    WHERE n.nspname = %s AND c.relkind IN ('r', 'v', 'm', 'p', 'f')
+    ORDER BY c.relname, a.attnum;
+"""
+
+
+@dataclass
+class CommentChange:
+    """A column comment to write."""
+
+    table: str
+    column: str
+    old: Optional[str]
+    new: str
+
+
+@dataclass
+class SchemaPlan:
+    """The comments of one schema that differ from the descriptions."""
+
+    schema: str
+    changes: List[CommentChange] = field(default_factory=list)
+    unchanged: int = 0
+    unknown: List[str] = field(default_factory=list)
+    """table.column descriptions with no such column in the schema."""
+
+    def summary(self) -> str:
+        """One line describing the plan."""
+        added = sum(1 for c in self.changes if c.old is None)
+        return (
+            f"{self.schema}: {len(self.changes)} comments to write ({added} new, "
+            f"{len(self.changes) - added} changed), {self.unchanged} unchanged, "
+            f"{len(self.unknown)} unknown columns"
+        )
+
+
+def schema_descriptions(
+    descriptions: Dict[str, Any], schema: str, tables: Sequence[str]
+) -> Dict[str, Dict[str, str]]:
+    """The descriptions of `schema`'s `tables`, by table name.
+
+    Keys are {schema}.{table_name}, or a bare table_name (older sp_api entries) that
+    applies to any schema with such a table. Schema-qualified keys take precedence.
+    """
+    result: Dict[str, Dict[str, str]] = {}
+    existing = set(tables)
+    for key, columns in descriptions.items():
+        if key.startswith("_") or not isinstance(columns, dict):
+            continue
+        if "." in key:
+            key_schema, table = key.split(".", 1)
+            if key_schema == schema:
+                result[table] = columns
+        elif key in existing and key not in result:
+            result[key] = columns
+    return result
+
+
+def plan_schema(
+    schema: str,
+    descriptions: Dict[str, Dict[str, str]],
+    current: Dict[Tuple[str, str], Optional[str]],
+) -> SchemaPlan:
+    """Compare `descriptions` with the `current` comments ({(table, column): comment})."""
+    plan = SchemaPlan(schema)
+    for table, columns in sorted(descriptions.items()):
+        for column, description in columns.items():
+            if (table, column) not in current:
+                plan.unknown.append(f"{table}.{column}")
+            elif current[(table, column)] == description:
+                plan.unchanged += 1
+            else:
+                plan.changes.append(CommentChange(table, column, current[(table, column)], description))
+    return plan
+
+
+def comment_statements(schema: str, changes: Sequence[CommentChange]) -> sql.Composed:
+    """The `COMMENT ON COLUMN` statements for `changes`, as one semicolon-separated batch."""
+    return sql.SQL(";\n").join(
+        sql.SQL("COMMENT ON COLUMN {}.{}.{} IS {}").format(
+            sql.Identifier(schema),
+            sql.Identifier(change.table),
+            sql.Identifier(change.column),
+            sql.Literal(change.new),
+        )
+        for change in changes
+    )
+
+
+async def current_comments(
+    conn: AsyncConnection[Any], schema: str
+) -> Dict[Tuple[str, str], Optional[str]]:
+    """Every column of `schema` and its comment: {(table, column): comment or None}."""
+    cur = await conn.execute(_COMMENTS_QUERY, (schema,))
+    return {(table, column): comment for table, column, comment in await cur.fetchall()}
+
+
+async def apply_descriptions(
+    conn: AsyncConnection[Any],
+    descriptions: Dict[str, Any],
+    schemas: Sequence[str],
+    dry_run: bool = False,
+) -> List[SchemaPlan]:
+    """Write the column comments of `schemas` that differ from `descriptions`.
+
+    Args:
+        conn: A connection; each schema is written in a transaction of its own.
+        descriptions (dict): {table: {column: description}}, as in the descriptions file.
+        schemas (Sequence[str]): The schemas to update.
+        dry_run (bool): Only compute the plans.
+
+    Returns:
+        The plan of each schema.
+    """
+    plans = []
+    for schema in schemas:
+        current = await current_comments(conn, schema)
+        tables = sorted({table for table, _ in current})
+        plan = plan_schema(schema, schema_descriptions(descriptions, schema, tables), current)
+        if plan.changes and not dry_run:
+            async with conn.transaction():
+                # Without parameters, the batch goes to the server as a single query.
+                await conn.execute(comment_statements(schema, plan.changes))
+        plans.append(plan)
+    return plans
+
+
+async def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m react_agent.comments",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("schemas", nargs="+")
+    parser.add_argument("--descriptions", default=DESCRIPTIONS_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change, write nothing.")
+    parser.add_argument("--show-sql", action="store_true", help="Print the statements.")
+    args = parser.parse_args(argv)
+
+    with open(args.descriptions, encoding="utf-8") as f:
+        descriptions = json.load(f)
+
+    async with await AsyncConnection.connect(db._conninfo(), autocommit=True) as conn:
+        start = time.perf_counter()
+        plans = await apply_descriptions(conn, descriptions, args.schemas, dry_run=args.dry_run)
+        elapsed = time.perf_counter() - start
+        for plan in plans:
+            if args.show_sql and plan.changes:
+                print(comment_statements(plan.schema, plan.changes).as_string(conn) + ";")
+            print(plan.summary())
+            for name in plan.unknown:
+                print(f"  unknown column {plan.schema}.{name}")
+    print(f"{'Planned' if args.dry_run else 'Applied'} in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""Keep the conversation history sent to the model within a token budget.
+
+Every step of the ReAct loop resends the whole thread, so a CSV result or a long
+schema listing fetched early on is paid for again on every later step and turn.
+Once the model has read a tool result (an AI message follows it), the result can
+be replaced in the history by a short summary that points to the full text,
+which moves to the `artifacts` side store on the state. `recall_result_tool`
+reads it back if the model needs the details again.
+
+Results are compacted oldest first, and only as many as it takes to bring the
+history under `Configuration.history_token_budget`.
+"""
+
+import json
+from typing import Any, Dict, List, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, AnyMessage, ToolMessage
+
+from react_agent.utils import get_message_text
+
+RECALL_TOOL = "recall_result_tool"
+
+COMPACT_MIN_TOKENS = 200
+"""Tool results smaller than this are left alone: a summary would save little."""
+
+_PREVIEW_LINES = 3
+
+
+def estimate_tokens(message: AnyMessage) -> int:
+    """Approximate token count of a message (4 characters per token)."""
+    size = len(get_message_text(message))
+    if isinstance(message, AIMessage):
+        size += sum(len(json.dumps(call["args"])) for call in message.tool_calls)
+    return (size + 3) // 4
+
+
+def summarize(name: str, text: str, ref: str) -> str:
+    """A short stand-in for the result `text` of tool `name`, pointing to `ref`."""
+    pointer = f'Full result stored as "{ref}"; call {RECALL_TOOL} with this ref to read it again.'
+    if name == "db_query_tool":
+        try:
+            result: Dict[str, Any] = json.loads(text)
+        except ValueError:
+            result = {}
+        if result.get("success"):
+            lines = str(result.get("data", "")).splitlines()
+            preview = "\n".join(lines[: _PREVIEW_LINES + 1])
+            return (
+                f"[Compacted db_query_tool result: {result.get('row_count')} rows shown of "
+                f"{result.get('total_rows')}; header and first rows:]\n{preview}\n{pointer}"
+            )
+    if name in ("get_schema_tool", "get_schemas_tool"):
+        tables = [line[len("Table: "):] for line in text.splitlines() if line.startswith("Table: ")]
+        if tables:
+            return f"[Compacted {name} result for {', '.join(tables)}.] {pointer}"
+        return f"[Compacted {name} result: {len(text.splitlines())} columns.] {pointer}"
+    first = text.splitlines()[0][:200] if text else ""
+    return f"[Compacted {name} result, {len(text)} characters, starting: {first}] {pointer}"
+
+
+def compact_messages(
+    messages: Sequence[AnyMessage], budget: int, min_tokens: int = COMPACT_MIN_TOKENS
+) -> Tuple[List[ToolMessage], Dict[str, str]]:
+    """Choose the tool results to replace with summaries to fit `messages` in `budget`.
+
+    Args:
+        messages (Sequence[AnyMessage]): The conversation, oldest first.
+        budget (int): Approximate token budget for the whole conversation; 0 disables compaction.
+        min_tokens (int): Results smaller than this are never compacted.
+
+    Returns:
+        The replacement tool messages (with the ids of the ones they replace, so
+        `add_messages` swaps them in place), and the full texts to keep in the side
+        store, by ref.
+    """
+    if budget <= 0:
+        return [], {}
+    sizes = [estimate_tokens(m) for m in messages]
+    total = sum(sizes)
+    if total <= budget:
+        return [], {}
+    last_ai = max((i for i, m in enumerate(messages) if isinstance(m, AIMessage)), default=-1)
+    call_args = {
+        call["id"]: call["args"]
+        for m in messages
+        if isinstance(m, AIMessage)
+        for call in m.tool_calls
+    }
+
+    replacements: List[ToolMessage] = []
+    stored: Dict[str, str] = {}
+    # Only results the model has already read: those before the last AI message.
+    for message, size in zip(messages[:max(last_ai, 0)], sizes):
+        if total <= budget:
+            break
+        if (
+            not isinstance(message, ToolMessage)
+            or message.id is None
+            or message.response_metadata.get("compacted")
+            or size < min_tokens
+        ):
+            continue
+        text = get_message_text(message)
+        name = message.name or "tool"
+        if name == RECALL_TOOL:
+            # The text is already in the store, under the ref that was recalled.
+            ref = str(call_args.get(message.tool_call_id, {}).get("ref", ""))
+            summary = f'[Recalled result "{ref}" omitted; call {RECALL_TOOL} again if needed.]'
+        else:
+            ref = message.tool_call_id
+            stored[ref] = text
+            summary = summarize(name, text, ref)
+        replacement = ToolMessage(
+            content=summary,
+            tool_call_id=message.tool_call_id,
+            name=message.name,
+            id=message.id,
+            status=message.status,
+            response_metadata={**message.response_metadata, "compacted": ref},
+        )
+        replacements.append(replacement)
+        total -= size - estimate_tokens(replacement)
+    return replacements, stored
+
+
+def apply_replacements(
+    messages: Sequence[AnyMessage], replacements: Sequence[ToolMessage]
+) -> List[AnyMessage]:
+    """`messages` with the replacements swapped in by id."""
+    by_id = {m.id: m for m in replacements}
+    return [by_id.get(m.id, m) if m.id is not None else m for m in messages]
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field, fields
-from typing import Annotated
+from typing import Annotated, Literal
 
 from langchain_core.runnables import ensure_config
 from langgraph.config import get_config
@@ -37,7 +37,114 @@ class Configuration:
             "description": "The maximum number of search results to return for each search query."
         },
     )
+
+    max_result_rows: int = field(
+        default=1000,
+        metadata={
+            "description": "The maximum number of rows db_query_tool returns; larger results are truncated."
+        },
+    )
+
+    max_result_bytes: int = field(
+        default=64_000,
+        metadata={
+            "description": "The maximum size in bytes of the CSV db_query_tool returns; larger results are truncated."
+        },
+    )
     
+    max_parallel_tool_calls: int = field(
+        default=4,
+        metadata={
+            "description": "The maximum number of tool calls from one model response that run at the same time."
+        },
+    )
+
+    max_process_tool_calls: int = field(
+        default=16,
+        metadata={
+            "description": "The maximum number of tool calls running at the same time across all runs in the process."
+        },
+    )
+
+    schema_format: Literal["compact", "verbose"] = field(
+        default="compact",
+        metadata={
+            "description": "How the schema tools render columns: 'compact' (`name type -- short comment`) "
+            "or 'verbose' (`Column: name, Type: type, Comment: full comment`)."
+        },
+    )
+
+    schema_comment_chars: int = field(
+        default=80,
+        metadata={
+            "description": "The maximum length of each column comment in the compact schema format; 0 omits comments."
+        },
+    )
+
+    use_query_cache: bool = field(
+        default=True,
+        metadata={
+            "description": "Whether db_query_tool may answer repeated queries from the process-wide result cache."
+        },
+    )
+
+    rewrite_to_coarser_grain: bool = field(
+        default=False,
+        metadata={
+            "description": "Whether db_query_tool moves monthly, quarterly or yearly sums over a *_daily view to its "
+            "*_monthly or *_quarterly sibling, for dates both cover. Only enable it where the siblings hold the sums "
+            "of the daily views (see react_agent.grain_rewrite)."
+        },
+    )
+
+    query_max_cost: float = field(
+        default=1_000_000,
+        metadata={
+            "description": "The highest planner cost estimate (from EXPLAIN) db_query_tool runs; costlier queries are "
+            "limited or rejected with hints for rewriting them. 0 disables the check."
+        },
+    )
+
+    query_max_rows: int = field(
+        default=10_000_000,
+        metadata={
+            "description": "The most rows any step of a query plan may be estimated to handle, which catches "
+            "cartesian joins and scans of huge tables. 0 disables the check."
+        },
+    )
+
+    query_auto_limit: bool = field(
+        default=True,
+        metadata={
+            "description": "Whether db_query_tool runs a query over the cost limits with a LIMIT added, when "
+            "that brings it under them, instead of rejecting it."
+        },
+    )
+
+    query_timeout_seconds: float = field(
+        default=60,
+        metadata={
+            "description": "The statement_timeout applied to each db_query_tool query. 0 disables it."
+        },
+    )
+
+    prompt_catalog: bool = field(
+        default=False,
+        metadata={
+            "description": "Whether to list the tables the agent may query in the system prompt. The list is part "
+            "of the cached prompt prefix, so it costs little after the first call, and can save a list_tables_tool step."
+        },
+    )
+
+    history_token_budget: int = field(
+        default=12_000,
+        metadata={
+            "description": "Approximate token budget for the conversation history sent to the model. Beyond it, "
+            "tool results the model has already read are replaced by short summaries, oldest first, and kept "
+            "out of band for recall_result_tool. 0 disables compaction."
+        },
+    )
+
     supabase_url: str = field(
         default=os.getenv("SUPABASE_URL"),
         metadata={
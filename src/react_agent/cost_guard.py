@@ -0,0 +1,254 @@
+"""Check the planner's estimates for a query before running it.
+
+SQL written by the model sometimes scans a large daily report view end to end,
+or joins two tables without a join condition. Such a query runs for minutes and
+holds a pooled connection all along. `check` runs `EXPLAIN (FORMAT JSON)`
+first and compares the estimates to the limits of the run's `Configuration`:
+
+- `query_max_cost`: the planner's total cost of the query;
+- `query_max_rows`: the largest row estimate of any plan node, which catches
+  cartesian products and scans of huge relations even when little is returned.
+
+A query over a limit is retried with `LIMIT` around it when that brings it under
+(`query_auto_limit`), which helps plain `SELECT`s over big tables. A `LIMIT` does
+not cut the rows an aggregate, sort or hash reads below it, so a query whose
+large steps sit under one is not retried. Otherwise the query is rejected with a structured error that names the expensive parts of the plan,
+so the model can rewrite it. Plan estimates are cached by normalized SQL.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg import AsyncConnection
+
+from react_agent import telemetry
+from react_agent.sql_text import normalize_sql
+
+_SCANS = ("Seq Scan", "Parallel Seq Scan", "Bitmap Heap Scan", "Index Scan", "Index Only Scan")
+_BLOCKING = ("Aggregate", "Sort", "Hash", "SetOp")
+
+
+@dataclass
+class PlanEstimate:
+    """The planner's estimates for one query."""
+
+    total_cost: float
+    """Estimated total cost of the query, in planner cost units."""
+
+    rows: float
+    """Estimated rows the query returns."""
+
+    max_rows: float
+    """Largest row estimate of any node of the plan."""
+
+    max_blocked_rows: float = 0.0
+    """Largest row estimate of a node below an aggregate, sort or hash, which reads
+    all of it before returning a row; a `LIMIT` above does not reduce it."""
+
+    scans: List[Tuple[str, float]] = field(default_factory=list)
+    """(relation, estimated rows) of the table scans, largest first."""
+
+    cartesian: bool = False
+    """Whether the plan joins two multi-row inputs without a join condition."""
+
+
+def summarize_plan(explain: Any) -> PlanEstimate:
+    """Reduce the output of `EXPLAIN (FORMAT JSON)` to a `PlanEstimate`."""
+    root = explain[0]["Plan"]
+    estimate = PlanEstimate(
+        total_cost=float(root["Total Cost"]), rows=float(root["Plan Rows"]), max_rows=0.0
+    )
+    stack = [(root, False)]
+    while stack:
+        node, blocked = stack.pop()
+        children = node.get("Plans", [])
+        # Sorted aggregates and set operations stream their input.
+        blocking = node["Node Type"] in _BLOCKING and node.get("Strategy") != "Sorted"
+        stack.extend((child, blocked or blocking) for child in children)
+        rows = float(node.get("Plan Rows", 0))
+        estimate.max_rows = max(estimate.max_rows, rows)
+        if blocked:
+            estimate.max_blocked_rows = max(estimate.max_blocked_rows, rows)
+        if node["Node Type"] in _SCANS and "Relation Name" in node:
+            estimate.scans.append((node["Relation Name"], rows))
+        if node["Node Type"] == "Nested Loop" and "Join Filter" not in node and len(children) == 2:
+            outer, inner = (float(child.get("Plan Rows", 0)) for child in children)
+            # Every pair of rows survives: nothing ties the two sides together.
+            if min(outer, inner) > 1 and rows >= 0.5 * outer * inner:
+                estimate.cartesian = True
+    estimate.scans.sort(key=lambda scan: -scan[1])
+    return estimate
+
+
+@dataclass
+class _Entry:
+    estimate: PlanEstimate
+    expires_at: float
+
+
+class ExplainCache:
+    """LRU cache of plan estimates by normalized SQL, with a TTL.
+
+    Estimates only move when table statistics do, so a plan is reused for
+    `ttl` seconds (default `EXPLAIN_CACHE_TTL` or 10 minutes).
+    """
+
+    def __init__(self, max_size: Optional[int] = None, ttl: Optional[float] = None) -> None:
+        """Create an empty cache."""
+        self.max_size = max_size if max_size is not None else int(os.getenv("EXPLAIN_CACHE_SIZE", "1024"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("EXPLAIN_CACHE_TTL", "600"))
+        self._entries: "OrderedDict[Tuple[str, Any], _Entry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, Any]) -> Optional[PlanEstimate]:
+        """Return the cached estimate for `key`, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.estimate
+
+    def put(self, key: Tuple[str, Any], estimate: PlanEstimate) -> None:
+        """Cache `estimate` under `key`."""
+        self._entries[key] = _Entry(estimate, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+
+
+explain_cache = ExplainCache()
+
+
+async def explain(conn: AsyncConnection[Any], query: str, scope: Any = None) -> PlanEstimate:
+    """Return the planner's estimates for `query`, from the cache if possible.
+
+    Args:
+        conn: The connection the query will run on.
+        query (str): The SQL query.
+        scope: Anything else the plan depends on, e.g. the role running it.
+    """
+    key = (normalize_sql(query), scope)
+    estimate = explain_cache.get(key)
+    if estimate is None:
+        with telemetry.span("db.explain"):
+            # Prepared, so that the extended protocol refuses "SELECT 1; COMMIT; DELETE ...".
+            cur = await conn.execute(f"EXPLAIN (FORMAT JSON) {query}", prepare=True)  # type: ignore[arg-type]
+            row = await cur.fetchone()
+        assert row is not None
+        estimate = summarize_plan(row[0])
+        explain_cache.put(key, estimate)
+    return estimate
+
+
+def with_limit(query: str, limit: int) -> str:
+    """Wrap `query` so that it returns at most `limit` rows."""
+    body = query.strip().rstrip(";").rstrip()
+    # Newlines, so that a trailing `-- comment` cannot swallow the parenthesis.
+    return f"SELECT * FROM (\n{body}\n) AS auto_limited LIMIT {int(limit)}"
+
+
+def _over_limits(estimate: PlanEstimate, max_cost: float, max_rows: float) -> List[str]:
+    reasons = []
+    if max_cost and estimate.total_cost > max_cost:
+        reasons.append(f"estimated cost {estimate.total_cost:.0f} exceeds {max_cost:.0f}")
+    if max_rows and estimate.max_rows > max_rows:
+        reasons.append(f"a plan step handles an estimated {estimate.max_rows:.0f} rows, more than {max_rows:.0f}")
+    return reasons
+
+
+def _hints(estimate: PlanEstimate) -> List[str]:
+    hints = []
+    if estimate.cartesian:
+        hints.append("Two tables are joined without a join condition; add the missing ON clause.")
+    if estimate.scans:
+        largest = ", ".join(f"{name} (~{rows:.0f} rows)" for name, rows in estimate.scans[:3])
+        hints.append(f"Largest scans: {largest}. Filter on a date range or key column.")
+    hints.append("Aggregate in SQL, or use a *_monthly / *_quarterly table instead of a *_daily one.")
+    return hints
+
+
+@dataclass
+class Verdict:
+    """What to do with a query: run `query` (maybe with a LIMIT added), or report `error`."""
+
+    query: str
+    estimate: Optional[PlanEstimate] = None
+    limited: bool = False
+    error: Optional[Dict[str, Any]] = None
+
+
+async def check(
+    conn: AsyncConnection[Any],
+    query: str,
+    *,
+    max_cost: float,
+    max_rows: float,
+    auto_limit: Optional[int] = None,
+    scope: Any = None,
+) -> Verdict:
+    """Decide whether `query` may run, based on the planner's estimates.
+
+    Args:
+        conn: The connection the query will run on.
+        query (str): A row-returning SQL query.
+        max_cost (float): Highest estimated total cost allowed; 0 for no limit.
+        max_rows (float): Highest row estimate of any plan node allowed; 0 for no limit.
+        auto_limit (int, optional): If given, try `LIMIT auto_limit` on a query over
+            the limits before rejecting it.
+        scope: Passed to `explain`.
+
+    Returns:
+        Verdict: `error` is a dict for the tool result, with 'error_type'
+        'query_too_expensive', the 'error' message, the 'estimate', the 'limits'
+        and 'hints' for rewriting the query.
+    """
+    if not max_cost and not max_rows:
+        return Verdict(query)
+    estimate = await explain(conn, query, scope)
+    reasons = _over_limits(estimate, max_cost, max_rows)
+    if not reasons:
+        return Verdict(query, estimate)
+    if auto_limit is not None and not estimate.cartesian:
+        limited = with_limit(query, auto_limit)
+        try:
+            limited_estimate = await explain(conn, limited, scope)
+        except Exception:
+            limited_estimate = None
+        # Under a LIMIT, the nodes below keep their full row estimates, but the
+        # root's cost only counts the rows that will actually be read. Nodes
+        # below an aggregate, sort or hash are read in full all the same.
+        if (
+            limited_estimate is not None
+            and limited_estimate.total_cost <= (max_cost or estimate.total_cost / 10)
+            and not (max_rows and limited_estimate.max_blocked_rows > max_rows)
+        ):
+            return Verdict(limited, limited_estimate, limited=True)
+    return Verdict(
+        query,
+        estimate,
+        error={
+            "error_type": "query_too_expensive",
+            "error": "Query rejected before running: " + "; ".join(reasons) + ".",
+            "estimate": {
+                "total_cost": estimate.total_cost,
+                "rows": estimate.rows,
+                "max_step_rows": estimate.max_rows,
+                "cartesian_join": estimate.cartesian,
+            },
+            "limits": {"max_cost": max_cost, "max_rows": max_rows},
+            "hints": _hints(estimate),
+        },
+    )
@@ -1,105 +1,362 @@
+"""Database access for the agent's tools.
+
+Every tool call borrows a connection from a process-wide async connection pool
+and hands it back as soon as it is done, so concurrent runs no longer queue up
+behind (or roll back) a single shared connection.
+
+With `DB_MULTI_TENANT=1`, tools that run a seller's SQL borrow from that seller's
+own small pool instead, logged in as the seller's database role (see
+`TenantPools`), so row-level security applies to everything the model writes.
+"""
+
 import asyncio
-from multiprocessing import connection
-import psycopg2
-from psycopg2.extensions import connection as pg_connection
-from dotenv import load_dotenv
 import os
-from typing import Dict
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, Optional, Set
+
+from dotenv import load_dotenv
+from psycopg import AsyncConnection
+from psycopg.conninfo import make_conninfo
+from psycopg.pq import TransactionStatus
+from psycopg_pool import AsyncConnectionPool
+
+from react_agent import telemetry
 
 load_dotenv()
 
-# Cache for database connections - maps seller_id to connection
-_connection_cache: Dict[str, pg_connection] = {}
-# Maps email to seller_id
+# Maps email to seller_id; updated in place by `sellers_init`.
 _sellers: Dict[str, str] = {}
 
-async def sellers_init() -> None:
-    conn = psycopg2.connect(
-        host=os.getenv('DB_HOST'),
-        database=os.getenv('DB_NAME'),
-        user=os.getenv('DB_USER'),
-        password=os.getenv('DB_PASSWORD'),
-        port=os.getenv('DB_PORT')
+
+@dataclass
+class PoolSettings:
+    """Sizing and recycling knobs for the connection pool, read from the environment."""
+
+    min_size: int = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    """Connections kept open even when the pool is idle."""
+
+    max_size: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    """Upper bound on concurrently open connections."""
+
+    timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    """Seconds a caller waits for a free connection before giving up."""
+
+    max_idle: float = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+    """Seconds an unused connection may sit in the pool before it is closed."""
+
+    max_lifetime: float = float(os.getenv("DB_POOL_MAX_LIFETIME", "3600"))
+    """Seconds after which a connection is recycled regardless of use."""
+
+
+@dataclass
+class TenantSettings:
+    """Per-seller connection routing, read from the environment."""
+
+    enabled: bool = os.getenv("DB_MULTI_TENANT", "").lower() in ("1", "true", "yes")
+    """Run tool SQL as the requesting seller's role instead of the shared user."""
+
+    user_template: str = os.getenv("DB_SELLER_USER", "seller_role_{seller_id}")
+    """Login role of a seller; `{seller_id}` is substituted."""
+
+    password: Optional[str] = os.getenv("DB_PASSWORD_SELLER_ROLE")
+    """Password shared by the seller roles."""
+
+    max_pools: int = int(os.getenv("DB_TENANT_MAX_POOLS", "32"))
+    """Seller pools kept open at once; the least recently used are closed beyond this."""
+
+    pool_size: int = int(os.getenv("DB_TENANT_POOL_SIZE", "2"))
+    """Upper bound on open connections per seller."""
+
+    idle_seconds: float = float(os.getenv("DB_TENANT_IDLE_SECONDS", "600"))
+    """Seconds a seller's pool may go unused before it is closed."""
+
+
+@dataclass
+class _PoolMetrics:
+    acquired: int = 0
+    in_use: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+_pool: Optional[AsyncConnectionPool] = None
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+_pool_lock: Optional[asyncio.Lock] = None
+_metrics = _PoolMetrics()
+settings = PoolSettings()
+tenant_settings = TenantSettings()
+
+
+def _conninfo(user: Optional[str] = None, password: Optional[str] = None) -> str:
+    return make_conninfo(
+        host=os.getenv("DB_HOST"),
+        dbname=os.getenv("DB_NAME"),
+        user=user or os.getenv("DB_USER"),
+        password=password if user else os.getenv("DB_PASSWORD"),
+        port=os.getenv("DB_PORT"),
     )
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM sellers")
-    sellers = cur.fetchall()
-    for seller in sellers:
-        _sellers[seller[0]] = seller[1]
-    print("Sellers: ", _sellers)
-    conn.close()
-    return
-
-# async def get_db_connection(seller_id: str) -> pg_connection:
-#     """Get the database connection from cache or create a new one if not exists."""
-    
-#     # Check if connection exists in cache
-#     if seller_id in _connection_cache:
-#         try:
-#             # Test if connection is still alive
-#             _connection_cache[seller_id].cursor().execute('SELECT 1')
-#             return _connection_cache[seller_id]
-#         except (psycopg2.OperationalError, psycopg2.InterfaceError):
-#             # If connection is dead, remove it from cache
-#             del _connection_cache[seller_id]
-    
-#     print("Creating new connection for seller_id: ", seller_id)
-#     # Create new connection if not in cache or if previous connection was dead
-#     db_user = f"seller_role_{seller_id}.mrmlzpkjfosavipxrwct"
-#     db_password = os.getenv('DB_PASSWORD_SELLER_ROLE')
-#     try:
-#         conn = psycopg2.connect(
-#             host=os.getenv('DB_HOST'),
-#             database=os.getenv('DB_NAME'),
-#             user=db_user,
-#             password=db_password,
-#             port=os.getenv('DB_PORT')
-#         )
-#     except Exception as e:
-#         print("Error creating connection: ", e)
-#         raise e
-#     print("Connection created for seller_id: ", seller_id)
-#     print("Connection: ", conn)
-#     # Store connection in cache
-#     _connection_cache[seller_id] = conn
-#     return conn
-
-# async def supabase_init() -> Client:
-#     """Initialize the Supabase client."""
-#     configuration = Configuration.from_context()
-#     supabase = create_client(
-#         supabase_url=configuration.supabase_url,
-#         supabase_key=configuration.supabase_key
-#     )
-
-#     return supabase
-
-
-# conn = asyncio.run(sellers_init())
-
-conn = None
-
-def get_db_connection():
-    """Get the database connection, creating a new one if it doesn't exist or is closed."""
-    global conn
-    
-    # Check if connection exists and is still open
-    if conn is not None:
+
+
+async def get_pool() -> AsyncConnectionPool:
+    """Return the process-wide connection pool, opening it on first use.
+
+    The pool is bound to the event loop that opened it, so a new one is created
+    if we are called from a different loop (e.g. across `asyncio.run` calls).
+    """
+    global _pool, _pool_loop, _pool_lock
+
+    loop = asyncio.get_running_loop()
+    if _pool_loop is not loop or _pool_lock is None:
+        _pool, _pool_loop, _pool_lock = None, loop, asyncio.Lock()
+    if _pool is not None and not _pool.closed:
+        return _pool
+    async with _pool_lock:
+        if _pool is None or _pool.closed:
+            pool = AsyncConnectionPool(
+                _conninfo(),
+                min_size=settings.min_size,
+                max_size=settings.max_size,
+                timeout=settings.timeout,
+                max_idle=settings.max_idle,
+                max_lifetime=settings.max_lifetime,
+                # Validate connections as they are handed out instead of
+                # paying a `SELECT 1` round trip on every tool call.
+                check=AsyncConnectionPool.check_connection,
+                kwargs={"autocommit": True},
+                name="react_agent",
+                open=False,
+            )
+            await pool.open()
+            _pool = pool
+    return _pool
+
+
+@dataclass
+class _TenantPool:
+    pool: AsyncConnectionPool
+    last_used: float
+    active: int = 0
+
+
+class TenantPools:
+    """A bounded set of small connection pools, one per seller.
+
+    Each seller's pool logs in as the seller's own role, so a seller's SQL can
+    never switch to another tenant: unlike `SET ROLE` on a shared connection, a
+    login role cannot be undone with `RESET ROLE` from inside a query. Pools are
+    opened on first use, closed after `idle_seconds` without use, and the least
+    recently used are closed once more than `max_pools` are open. A pool with a
+    connection checked out is never closed.
+    """
+
+    def __init__(self, tenant: TenantSettings) -> None:
+        """Create an empty set of pools."""
+        self.settings = tenant
+        self._entries: "OrderedDict[str, _TenantPool]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._opening: Dict[str, "asyncio.Future[_TenantPool]"] = {}
+        self._closing: Set["asyncio.Task[None]"] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _open_pool(self, seller_id: str) -> AsyncConnectionPool:
+        return AsyncConnectionPool(
+            _conninfo(
+                self.settings.user_template.format(seller_id=seller_id),
+                self.settings.password,
+            ),
+            min_size=1,
+            max_size=max(self.settings.pool_size, 1),
+            timeout=settings.timeout,
+            max_idle=settings.max_idle,
+            max_lifetime=settings.max_lifetime,
+            check=AsyncConnectionPool.check_connection,
+            kwargs={"autocommit": True},
+            name=f"react_agent.seller.{seller_id}",
+            open=False,
+        )
+
+    async def _checkout(self, seller_id: str) -> _TenantPool:
+        """Return `seller_id`'s pool, opening it if needed, marked as in use."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Pools cannot cross event loops; those of a finished loop are dropped.
+            self._entries.clear()
+            self._opening.clear()
+            self._loop = loop
+        self._evict(time.monotonic())
+        while True:
+            entry = self._entries.get(seller_id)
+            if entry is not None:
+                self.hits += 1
+                break
+            # One opening per seller at a time; other sellers do not wait for it.
+            opening = self._opening.get(seller_id)
+            if opening is None:
+                opening = asyncio.ensure_future(self._open(seller_id))
+                self._opening[seller_id] = opening
+                opening.add_done_callback(lambda _: self._opening.pop(seller_id, None))
+            entry = await asyncio.shield(opening)
+            if self._entries.get(seller_id) is entry:
+                break
+        entry.active += 1
+        self._entries.move_to_end(seller_id)
+        return entry
+
+    async def _open(self, seller_id: str) -> _TenantPool:
+        self.misses += 1
+        pool = self._open_pool(seller_id)
         try:
-            # Test if connection is still alive
-            conn.cursor().execute('SELECT 1')
-            return conn
-        except (psycopg2.OperationalError, psycopg2.InterfaceError):
-            # Connection is dead, set to None so we create a new one
-            conn = None
-    
-    # Create new connection
-    conn = psycopg2.connect(
-        host=os.getenv('DB_HOST'),
-        database=os.getenv('DB_NAME'),
-        user=os.getenv('DB_USER'),
-        password=os.getenv('DB_PASSWORD'),
-        port=os.getenv('DB_PORT')
-    )
-    return conn
+            await pool.open(wait=True, timeout=settings.timeout)
+        except BaseException:
+            # E.g. no such role: stop the pool from retrying in the background.
+            await pool.close()
+            raise
+        entry = _TenantPool(pool, time.monotonic())
+        self._entries[seller_id] = entry
+        self._evict(time.monotonic(), keep=seller_id)
+        return entry
+
+    def _evict(self, now: float, keep: Optional[str] = None) -> None:
+        """Close idle pools, then the least recently used beyond `max_pools`."""
+        excess = len(self._entries) - self.settings.max_pools
+        for seller_id, entry in list(self._entries.items()):
+            if entry.active or seller_id == keep:
+                continue
+            if excess > 0 or now - entry.last_used > self.settings.idle_seconds:
+                del self._entries[seller_id]
+                self.evictions += 1
+                excess -= 1
+                task = asyncio.create_task(entry.pool.close())
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+
+    @asynccontextmanager
+    async def connection(self, seller_id: str) -> AsyncIterator[AsyncConnection[Any]]:
+        """Borrow a connection logged in as `seller_id`'s role."""
+        entry = await self._checkout(seller_id)
+        try:
+            async with entry.pool.connection() as conn:
+                yield conn
+        finally:
+            entry.active -= 1
+            entry.last_used = time.monotonic()
+
+    async def aclose(self) -> None:
+        """Close every pool."""
+        entries = list(self._entries.values())
+        self._entries.clear()
+        if self._loop is asyncio.get_running_loop():
+            await asyncio.gather(*(entry.pool.close() for entry in entries), *self._closing)
+
+
+tenant_pools = TenantPools(tenant_settings)
+
+
+async def close_pool() -> None:
+    """Close the connection pool and the sellers' pools, if open."""
+    global _pool
+    await tenant_pools.aclose()
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+@asynccontextmanager
+async def connection(seller_id: Optional[str] = None) -> AsyncIterator[AsyncConnection[Any]]:
+    """Borrow a connection from the pool for the duration of a request.
+
+    Connections are in autocommit mode; wrap writes in `conn.transaction()`.
+    If the calling task is cancelled (e.g. the run was cancelled) while a
+    statement is in flight, the statement is cancelled on the server too, so the
+    connection goes back to the pool instead of staying busy with a dead query.
+
+    Args:
+        seller_id (str, optional): Borrow from this seller's pool (see
+            `TenantPools`) instead of the shared one.
+    """
+    start = time.perf_counter()
+    borrowed: AsyncContextManager[AsyncConnection[Any]]
+    if seller_id is None:
+        borrowed = (await get_pool()).connection()
+    else:
+        borrowed = tenant_pools.connection(seller_id)
+    async with borrowed as conn:
+        waited = time.perf_counter() - start
+        _metrics.acquired += 1
+        _metrics.wait_seconds_total += waited
+        _metrics.wait_seconds_max = max(_metrics.wait_seconds_max, waited)
+        telemetry.record("db.acquire", waited)
+        _metrics.in_use += 1
+        try:
+            yield conn
+        except asyncio.CancelledError:
+            if conn.info.transaction_status == TransactionStatus.ACTIVE:
+                await conn.cancel_safe()
+            raise
+        finally:
+            _metrics.in_use -= 1
+
+
+async def sellers_init() -> None:
+    """Load the email to seller_id map from the `sellers` table."""
+    async with connection() as conn:
+        cur = await conn.execute("SELECT * FROM sellers")
+        rows = await cur.fetchall()
+    sellers = {row[0]: row[1] for row in rows}
+    # In place, so modules that imported `_sellers` see the update.
+    _sellers.clear()
+    _sellers.update(sellers)
+
+
+async def refresh_sellers(interval: float) -> None:
+    """Reload the sellers every `interval` seconds, until cancelled."""
+    while True:
+        try:
+            await sellers_init()
+        except Exception as e:
+            print(f"Error loading sellers: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+def pool_metrics() -> Dict[str, float]:
+    """Return a snapshot of pool wait time and utilisation.
 
+    Returns:
+        Dict[str, float]: Counters suitable for exporting to a metrics backend:
+            - 'acquired': Connections handed out since start-up
+            - 'in_use': Connections currently checked out
+            - 'pool_size': Connections currently open
+            - 'max_size': Configured upper bound on open connections
+            - 'requests_waiting': Callers queued for a connection
+            - 'utilisation': in_use / max_size
+            - 'wait_seconds_total' / 'wait_seconds_avg' / 'wait_seconds_max':
+              Time spent waiting to acquire a connection
+            - 'tenant_pools': Seller pools currently open
+            - 'tenant_pools_opened' / 'tenant_pools_evicted': Seller pools
+              opened and closed since start-up
+    """
+    stats = _pool.get_stats() if _pool is not None else {}
+    return {
+        "acquired": _metrics.acquired,
+        "in_use": _metrics.in_use,
+        "pool_size": stats.get("pool_size", 0),
+        "max_size": settings.max_size,
+        "requests_waiting": stats.get("requests_waiting", 0),
+        "utilisation": _metrics.in_use / settings.max_size if settings.max_size else 0.0,
+        "wait_seconds_total": _metrics.wait_seconds_total,
+        "wait_seconds_avg": (
+            _metrics.wait_seconds_total / _metrics.acquired if _metrics.acquired else 0.0
+        ),
+        "wait_seconds_max": _metrics.wait_seconds_max,
+        "tenant_pools": len(tenant_pools),
+        "tenant_pools_opened": tenant_pools.misses,
+        "tenant_pools_evicted": tenant_pools.evictions,
+    }
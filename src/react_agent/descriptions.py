@@ -0,0 +1,492 @@
+"""Column description generation: an async, rate-limited batch pipeline.
+
+For each table, the column statistics (see `react_agent.stats_store`) are
+formatted into a prompt and an LLM writes a description per column, which
+`scripts/description_generator.ipynb` then applies as column comments.
+
+Requests run concurrently under two token buckets, one for requests and one for
+tokens per minute, sized to the account's rate limits. Rate-limit, timeout,
+connection and server errors, and unparseable answers, are retried with
+exponential backoff and full jitter, honouring Retry-After. Tables wider than
+`max_columns` are split into chunks that are described separately. Every
+finished chunk is appended to a JSONL checkpoint, so an interrupted run picks up
+where it stopped.
+
+    python -m react_agent.descriptions --schemas amazon_ads_thrive
+    python -m react_agent.descriptions sp_api_thrive_2.orders_report --force --rpm 30
+
+The OpenAI client reads OPENAI_API_KEY and OPENAI_BASE_URL, so the pipeline can
+be pointed at a local stub server.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import openai
+from openai import AsyncOpenAI
+
+from react_agent.schema_stats import mark_described, stale_descriptions
+from react_agent.stats_store import DEFAULT_PATH as STATS_PATH
+from react_agent.stats_store import StatsStore
+
+_ROOT = Path(__file__).resolve().parents[2]
+
+DESCRIPTIONS_PATH = str(_ROOT / "scripts" / "table_descriptions.json")
+"""The column descriptions file in the repository, whatever the working directory."""
+
+CHECKPOINT_PATH = str(_ROOT / "data" / "descriptions_checkpoint.jsonl")
+"""Where `main` records finished chunks, so that an interrupted run resumes from them."""
+
+PROMPT = """
+You are given metadata and descriptive statistics for every column in a Postgres table named "{table_name}", which contains Amazon e-commerce data.
+
+Your task is to generate a clear, semantically rich description for each column.
+The purpose of these descriptions is to improve the accuracy of a text-to-SQL agent that will use them to translate natural language questions into SQL queries.
+
+Guidelines for writing descriptions:
+- Expand any abbreviations or acronyms into full words.
+- Clarify the real-world meaning of the column (e.g., 'asin' → 'Amazon Standard Identification Number, a unique product identifier').
+- Add hints about typical usage in queries (e.g., whether it’s useful for filtering, grouping, or joining).
+- Use the descriptive statistics and sample values provided below to infer semantic meaning
+(e.g., categorical vs numeric, date fields, booleans, common text patterns).
+- Include representative example values from the column in the description to illustrate its contents.
+- Keep descriptions concise but informative, written in plain English.
+- Emphasize the Amazon e-commerce context (products, sellers, reviews, orders, customers, prices, etc.).
+
+Descriptive statistics and examples:
+{stats_text}
+
+Output format (JSON dictionary):
+{{
+    "column_name": "description of the column, including semantic meaning, how it may be used in SQL queries, and 1–3 representative example values",
+    "column_name2": "description of the column2, including semantic meaning, how it may be used in SQL queries, and 1–3 representative example values",
+    ...
+}}
+"""
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def format_stats(table_name: str, columns: Dict[str, Any]) -> str:
+    """Render a table's column statistics as the prompt's statistics section."""
+    lines = [f"Table: {table_name}", "=" * 50]
+    for column_name, column_info in columns.items():
+        lines += [
+            "",
+            f"Column: {column_name}",
+            f"Data Type: {column_info['data_type']}",
+            f"Category: {column_info['category']}",
+            "Statistics:",
+        ]
+        for stat_name, stat_value in column_info["stats"].items():
+            if stat_name == "top_values" and isinstance(stat_value, list):
+                lines.append(f"  {stat_name}:")
+                for value_info in stat_value[:5]:
+                    lines.append(f"    '{value_info['value']}': {value_info['count']} occurrences")
+            else:
+                lines.append(f"  {stat_name}: {stat_value}")
+        lines.append("-" * 30)
+    return "\n".join(lines) + "\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of `text` (4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def chunk_columns(
+    table_name: str, columns: Dict[str, Any], max_columns: int, max_prompt_tokens: int
+) -> List[Dict[str, Any]]:
+    """Split `columns` into consecutive chunks within both a column and a token budget."""
+    chunks: List[Dict[str, Any]] = []
+    current: Dict[str, Any] = {}
+    tokens = estimate_tokens(PROMPT)
+    for column, info in columns.items():
+        cost = estimate_tokens(format_stats(table_name, {column: info}))
+        if current and (len(current) >= max_columns or tokens + cost > max_prompt_tokens):
+            chunks.append(current)
+            current, tokens = {}, estimate_tokens(PROMPT)
+        current[column] = info
+        tokens += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TokenBucket:
+    """A token bucket refilled continuously at `per_minute`, holding at most `capacity`.
+
+    Waiters are served in arrival order. A request larger than the capacity waits for
+    a full bucket and leaves it in debt, which later requests wait out.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None) -> None:
+        """Create a full bucket."""
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> float:
+        """Take `amount` from the bucket, waiting for it to refill; return the seconds waited."""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                needed = min(amount, self.capacity)
+                if self.level >= needed:
+                    self.level -= amount
+                    return waited
+                delay = (needed - self.level) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+    def adjust(self, amount: float) -> None:
+        """Take `amount` more (or give back a negative amount) without waiting."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+@dataclass
+class PipelineStats:
+    """Throughput of a pipeline run."""
+
+    tables: int = 0
+    chunks: int = 0
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    resumed_chunks: int = 0
+    missing_columns: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    throttled_seconds: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    started: float = field(default_factory=time.monotonic)
+    finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the run started, or its duration once finished."""
+        return (self.finished or time.monotonic()) - self.started
+
+    def summary(self) -> str:
+        """One line per figure, for printing at the end of a run."""
+        elapsed = max(self.elapsed, 1e-9)
+        latencies = sorted(self.latencies) or [0.0]
+        tokens = self.prompt_tokens + self.completion_tokens
+        return "\n".join(
+            [
+                f"Tables: {self.tables} ({self.chunks} chunks, {self.resumed_chunks} resumed from checkpoint)",
+                f"Requests: {self.requests} ({self.retries} retries, {self.failures} failed)",
+                f"Columns missing from answers: {self.missing_columns}",
+                f"Tokens: {self.prompt_tokens} prompt + {self.completion_tokens} completion",
+                f"Elapsed: {elapsed:.1f}s; requests waited {self.throttled_seconds:.1f}s in total on rate limits",
+                f"Throughput: {self.tables / elapsed * 60:.1f} tables/min, {tokens / elapsed:.0f} tokens/s",
+                f"Latency: p50 {latencies[len(latencies) // 2]:.2f}s, "
+                f"p95 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]:.2f}s",
+            ]
+        )
+
+
+class RetryableError(Exception):
+    """An answer that could not be used, worth asking for again."""
+
+
+_RETRYABLE = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+    RetryableError,
+)
+
+
+def parse_descriptions(content: Optional[str], columns: Sequence[str]) -> Dict[str, str]:
+    """Read the {column: description} JSON answer, keeping only the requested columns."""
+    try:
+        answer = json.loads(_FENCE.sub("", (content or "").strip()))
+    except json.JSONDecodeError as e:
+        raise RetryableError(f"answer is not JSON: {e}") from e
+    if not isinstance(answer, dict):
+        raise RetryableError("answer is not a JSON object")
+    wanted = set(columns)
+    return {k: str(v) for k, v in answer.items() if k in wanted and v}
+
+
+class DescriptionPipeline:
+    """Generates column descriptions for many tables under rate limits."""
+
+    def __init__(
+        self,
+        client: AsyncOpenAI,
+        *,
+        model: str = "gpt-5",
+        reasoning_effort: Optional[str] = "high",
+        requests_per_minute: float = 60,
+        tokens_per_minute: float = 400_000,
+        max_concurrency: int = 8,
+        max_retries: int = 6,
+        backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+        max_columns: int = 40,
+        max_prompt_tokens: int = 12_000,
+        completion_tokens_per_column: int = 250,
+        checkpoint_path: Optional[str] = None,
+    ) -> None:
+        """Configure the pipeline.
+
+        Args:
+            client: The OpenAI client; create it with max_retries=0, retries happen here.
+            model: Chat model name.
+            reasoning_effort: Passed to reasoning models; None to omit.
+            requests_per_minute: Request rate limit.
+            tokens_per_minute: Token rate limit (prompt plus completion).
+            max_concurrency: Requests in flight at once.
+            max_retries: Retries per chunk before it is given up.
+            backoff_seconds: Base of the exponential backoff.
+            max_backoff_seconds: Cap on a single backoff.
+            max_columns: Widest chunk of a table sent in one request.
+            max_prompt_tokens: Largest estimated prompt sent in one request.
+            completion_tokens_per_column: Completion (and reasoning) tokens reserved per
+                column before a request; the difference is settled from the usage reported.
+            checkpoint_path: JSONL file of finished chunks, read to resume a run.
+        """
+        self.client = client
+        self.model = model
+        self.reasoning_effort = reasoning_effort
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.max_columns = max_columns
+        self.max_prompt_tokens = max_prompt_tokens
+        self.completion_tokens_per_column = completion_tokens_per_column
+        self.checkpoint_path = checkpoint_path
+        self.stats = PipelineStats()
+
+    def load_checkpoint(self) -> Dict[str, Dict[str, str]]:
+        """Descriptions already generated by earlier runs: {table: {column: description}}."""
+        done: Dict[str, Dict[str, str]] = {}
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return done
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by an interruption.
+                    continue
+                done.setdefault(record["table"], {}).update(record["descriptions"])
+                self.stats.resumed_chunks += 1
+        return done
+
+    def _checkpoint(self, table: str, descriptions: Dict[str, str]) -> None:
+        if not self.checkpoint_path:
+            return
+        with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"table": table, "descriptions": descriptions}, ensure_ascii=False) + "\n")
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * 2**attempt))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    async def _request(self, table: str, chunk: Dict[str, Any]) -> Dict[str, str]:
+        prompt = PROMPT.format(table_name=table, stats_text=format_stats(table, chunk))
+        reserved = estimate_tokens(prompt) + self.completion_tokens_per_column * len(chunk)
+        kwargs: Dict[str, Any] = {"response_format": {"type": "json_object"}}
+        if self.reasoning_effort:
+            kwargs["reasoning_effort"] = self.reasoning_effort
+
+        attempt = 0
+        while True:
+            self.stats.throttled_seconds += await self.requests.acquire(1)
+            self.stats.throttled_seconds += await self.tokens.acquire(reserved)
+            self.stats.requests += 1
+            start = time.monotonic()
+            try:
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "system", "content": prompt}],
+                    **kwargs,
+                )
+                usage = response.usage
+                if usage is not None:
+                    self.tokens.adjust(usage.total_tokens - reserved)
+                    self.stats.prompt_tokens += usage.prompt_tokens
+                    self.stats.completion_tokens += usage.completion_tokens
+                self.stats.latencies.append(time.monotonic() - start)
+                return parse_descriptions(response.choices[0].message.content, list(chunk))
+            except _RETRYABLE as e:
+                if attempt == self.max_retries:
+                    raise
+                self.stats.retries += 1
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                print(f"Retrying {table} in {delay:.1f}s after {type(e).__name__}: {str(e)[:200]}")
+                await asyncio.sleep(delay)
+
+    async def run(
+        self, tables: Dict[str, Dict[str, Any]]
+    ) -> Tuple[Dict[str, Dict[str, str]], Dict[str, str]]:
+        """Describe every column of `tables` ({table: column statistics}).
+
+        Returns:
+            ({table: {column: description}} for the tables with at least one
+            description, {table: error} for the tables with a failed chunk).
+        """
+        done = self.load_checkpoint()
+        results: Dict[str, Dict[str, str]] = {
+            table: {c: d for c, d in done.get(table, {}).items() if c in columns}
+            for table, columns in tables.items()
+        }
+        errors: Dict[str, str] = {}
+        slots = asyncio.Semaphore(self.max_concurrency)
+        self.stats.tables = len(tables)
+        self.stats.started = time.monotonic()
+
+        async def describe(table: str, chunk: Dict[str, Any]) -> None:
+            try:
+                async with slots:
+                    descriptions = await self._request(table, chunk)
+            except Exception as e:
+                self.stats.failures += 1
+                errors[table] = f"{type(e).__name__}: {str(e)}"
+                return
+            self.stats.missing_columns += len(set(chunk) - set(descriptions))
+            results[table].update(descriptions)
+            self._checkpoint(table, descriptions)
+
+        jobs = []
+        for table, columns in tables.items():
+            remaining = {c: info for c, info in columns.items() if c not in results[table]}
+            for chunk in chunk_columns(table, remaining, self.max_columns, self.max_prompt_tokens):
+                self.stats.chunks += 1
+                jobs.append(describe(table, chunk))
+        await asyncio.gather(*jobs)
+        self.stats.finished = time.monotonic()
+        # Keep the column order of the statistics.
+        ordered = {
+            table: {c: results[table][c] for c in tables[table] if c in results[table]}
+            for table in tables
+        }
+        return {t: d for t, d in ordered.items() if d}, errors
+
+
+def description_key(descriptions: Dict[str, Any], table: str) -> str:
+    """The key `table` has, or gets, in the descriptions file.
+
+    amazon_ads tables are keyed by {schema}.{table_name}, older sp_api ones by table_name.
+    """
+    name = table.split(".", 1)[-1]
+    return name if table not in descriptions and name in descriptions else table
+
+
+def save_descriptions(path: str, new: Dict[str, Dict[str, str]]) -> None:
+    """Merge `new` into the descriptions file at `path` and update its metadata."""
+    existing: Dict[str, Any] = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            existing = json.load(f)
+    existing.pop("_metadata", None)
+    updated = []
+    for table, columns in new.items():
+        key = description_key(existing, table)
+        existing[key] = {**existing.get(key, {}), **columns}
+        updated.append(key)
+    existing["_metadata"] = {
+        "last_updated": datetime.now().isoformat(),
+        "total_tables": len(existing),
+        "updated_tables": updated,
+        "generator_version": "2.0",
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(existing, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+async def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m react_agent.descriptions",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("tables", nargs="*", help="{schema}.{table_name}s (default: every stored table).")
+    parser.add_argument("--schemas", nargs="+", help="Only tables in these schemas.")
+    parser.add_argument(
+        "--force", action="store_true", help="Regenerate tables that already have current descriptions."
+    )
+    parser.add_argument("--store", default=STATS_PATH, help="Statistics store (default: %(default)s).")
+    parser.add_argument("--descriptions", default=DESCRIPTIONS_PATH)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--model", default="gpt-5")
+    parser.add_argument("--reasoning-effort", default="high", help="'none' to omit it.")
+    parser.add_argument("--rpm", type=float, default=60, help="Requests per minute.")
+    parser.add_argument("--tpm", type=float, default=400_000, help="Tokens per minute.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-columns", type=int, default=40, help="Columns per request.")
+    args = parser.parse_args(argv)
+
+    store = StatsStore(args.store)
+    selected = args.tables or store.names()
+    if args.schemas:
+        selected = [t for t in selected if t.split(".", 1)[0] in args.schemas]
+    if not args.force:
+        existing: Dict[str, Any] = {}
+        if os.path.exists(args.descriptions):
+            with open(args.descriptions, encoding="utf-8") as f:
+                existing = json.load(f)
+        stale: Set[str] = set(stale_descriptions(store, selected))
+        selected = [t for t in selected if description_key(existing, t) not in existing or t in stale]
+    print(f"Describing {len(selected)} tables")
+
+    pipeline = DescriptionPipeline(
+        AsyncOpenAI(max_retries=0),
+        model=args.model,
+        reasoning_effort=None if args.reasoning_effort == "none" else args.reasoning_effort,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        max_concurrency=args.concurrency,
+        max_columns=args.max_columns,
+        checkpoint_path=args.checkpoint,
+    )
+    tables = {t: store.columns(t) or {} for t in selected}
+    results, errors = await pipeline.run(tables)
+    save_descriptions(args.descriptions, results)
+    mark_described(store, [t for t in results if len(results[t]) == len(tables[t])])
+    for table, error in errors.items():
+        print(f"Error describing {table}: {error}")
+    if not errors and os.path.exists(args.checkpoint):
+        # Everything is in the descriptions file now.
+        os.remove(args.checkpoint)
+    print(pipeline.stats.summary())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
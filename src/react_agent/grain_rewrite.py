@@ -0,0 +1,395 @@
+"""Route monthly and quarterly aggregates over daily views to coarser sibling views.
+
+The prompt asks the model to pick `*_monthly` or `*_quarterly` tables itself,
+but it often sums a `*_daily` view by `date_trunc('month', ...)` when the monthly
+view exists, reading 30 times the rows. `rewrite` recognizes such a query and
+points it at the coarsest sibling view that can answer it:
+
+    SELECT date_trunc('month', date) AS month, sum(units_ordered)
+    FROM sp_api_thrive_2.sales_and_traffic_business_report_daily
+    WHERE date >= '2024-10-01' AND date < '2025-07-01'
+    GROUP BY 1
+
+reads `sales_and_traffic_business_report_monthly` instead. This assumes that a
+sibling holds the sums of the daily view over the periods both cover, which
+nothing in the database enforces, so `Configuration.rewrite_to_coarser_grain`
+is off by default. The rewrite is only made when:
+
+- the query reads a single `*_daily` view, with no joins, subqueries or CTEs;
+- its date columns are only used in `date_trunc` with a unit at least as
+  coarse as the sibling's grain, or compared with bounds aligned to that grain
+  (`>=`/`<` a period start, `<=`/`>` a period end);
+- the only aggregate is `sum`, of bare additive columns (not averages, rates
+  or percentages, nor expressions of them), and other columns are only used as dimensions: text columns,
+  or numeric identifiers (`*_id`);
+- the sibling has every column the query uses, with the same types;
+- the query's date range lies inside the range both views cover, per the
+  column statistics in `react_agent.stats_store`, and the daily view covers
+  every period of it in full. A query with no literal lower (or upper) bound
+  needs both views to start (or end) on the same period. The views need not
+  cover the same dates: `sales_and_traffic_business_report_daily` starts on
+  2024-09-12, its monthly sibling on 2024-03-01.
+
+This is a lexical check on `react_agent.sql_text` tokens, not a parser: anything
+it does not recognize is left alone.
+"""
+
+import re
+import sqlite3
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from react_agent.catalog import Relation, catalog
+from react_agent.sql_text import referenced_tables, tokenize
+from react_agent.stats_store import get_stats_store
+
+GRAINS = ("month", "quarter", "year")
+"""Truncation units a rewrite supports, finest first."""
+
+SIBLINGS = {"month": ("monthly",), "quarter": ("quarterly", "monthly"), "year": ("quarterly", "monthly")}
+"""For the finest unit a query truncates to: the sibling suffixes to try, coarsest first."""
+
+_STEP_MONTHS = {"monthly": 1, "quarterly": 3}
+
+_DAILY = re.compile(r"^(?P<stem>.+)_daily(?P<view>_view)?$")
+_NON_ADDITIVE = re.compile(r"(average|avg|percentage|pct|rate|ratio|price|rank)")
+_IDENTIFIER = re.compile(r"(^|_)id$")
+_NUMERIC_TYPES = {"smallint", "integer", "bigint", "numeric", "real", "double precision", "money"}
+_DATE_TYPES = {"date", "timestamp without time zone", "timestamp with time zone"}
+_AGGREGATES = {
+    "avg", "min", "max", "count", "stddev", "stddev_pop", "stddev_samp", "variance",
+    "var_pop", "var_samp", "string_agg", "array_agg", "json_agg", "jsonb_agg",
+    "bool_and", "bool_or", "every", "percentile_cont", "percentile_disc", "mode",
+}
+_BOUND_END = {"and", "or", "group", "order", "limit", "having", ")", ";"}
+_UNIT_MONTHS = {"month": 1, "months": 1, "mon": 1, "mons": 1, "quarter": 3, "year": 12, "years": 12}
+
+rewrites: Counter = Counter()
+"""Rewrites made since start-up, by (from, to) view."""
+
+
+@dataclass
+class Rewrite:
+    """A query moved from a daily view to a coarser sibling."""
+
+    query: str
+    """The rewritten SQL."""
+
+    source: str
+    """The daily view the query read, as {schema}.{table_name}."""
+
+    target: str
+    """The sibling view it reads instead."""
+
+
+@dataclass
+class Analysis:
+    """How a query that passes the rules uses the columns of the view it reads."""
+
+    grain: Optional[str] = None
+    """The finest `date_trunc` unit, None if the query does not truncate dates."""
+
+    dates: Set[str] = field(default_factory=set)
+    """Date columns, truncated or compared."""
+
+    dimensions: Set[str] = field(default_factory=set)
+    """Other columns used outside `sum`."""
+
+    measures: Set[str] = field(default_factory=set)
+    """Columns summed."""
+
+    bounds: Dict[str, Tuple[Optional[date], Optional[date]]] = field(default_factory=dict)
+    """The dates each date column is filtered to, as [start, end); None where a side
+    is not a literal date. Empty when the query combines conditions with `or`."""
+
+
+def sibling_names(full_name: str, grain: str) -> List[str]:
+    """The coarser siblings of daily view `full_name` for `grain`, coarsest first."""
+    schema, _, table = full_name.rpartition(".")
+    m = _DAILY.match(table)
+    if m is None:
+        return []
+    return [f"{schema}.{m['stem']}_{suffix}{m['view'] or ''}" for suffix in SIBLINGS[grain]]
+
+
+def _unquote(token: str) -> str:
+    return token[1:-1].replace('""', '"') if token.startswith('"') else token
+
+
+def _literal_date(token: str) -> Optional[date]:
+    if not token.startswith("'"):
+        return None
+    try:
+        return date.fromisoformat(token[1:-1].strip()[:10])
+    except ValueError:
+        return None
+
+
+def _is_period_start(day: date, step: int) -> bool:
+    return day.day == 1 and (day.month - 1) % step == 0
+
+
+def _period_start(day: date, step: int) -> date:
+    return date(day.year, day.month - (day.month - 1) % step, 1)
+
+
+def _skip_cast(tokens: Sequence[str], i: int) -> int:
+    while tokens[i : i + 1] == ["::"] and i + 1 < len(tokens):
+        i += 2
+    return i
+
+
+def _closing(tokens: Sequence[str], i: int) -> int:
+    """Index of the parenthesis closing the one at `i`, or -1."""
+    depth = 0
+    for j in range(i, len(tokens)):
+        depth += tokens[j] == "("
+        depth -= tokens[j] == ")"
+        if depth == 0:
+            return j
+    return -1
+
+
+def _bound(tokens: Sequence[str], i: int, step: int) -> Tuple[Optional[str], int, Optional[date]]:
+    """Parse a comparison bound at `i`: ('start' | 'end' | None, index after it, literal date).
+
+    'start' is a date on a period boundary (the first day of one), 'end' the last
+    day of a period; anything else is None. The date is None unless the bound is
+    a literal.
+    """
+    if tokens[i : i + 1] in (["date"], ["timestamp"]):
+        i += 1
+    day = _literal_date(tokens[i]) if i < len(tokens) else None
+    if day is not None:
+        i = _skip_cast(tokens, i + 1)
+        if _is_period_start(day, step):
+            return "start", i, day
+        if _is_period_start(day + timedelta(days=1), step):
+            return "end", i, day
+        return None, i, day
+    if tokens[i : i + 2] == ["date_trunc", "("] and len(tokens) > i + 3:
+        unit = tokens[i + 2].strip("'").lower()
+        close = _closing(tokens, i + 1)
+        if close < 0 or _UNIT_MONTHS.get(unit, 0) < step:
+            return None, i, None
+        i = _skip_cast(tokens, close + 1)
+        if tokens[i : i + 2] in (["+", "interval"], ["-", "interval"]) and len(tokens) > i + 2:
+            amount, _, interval_unit = tokens[i + 2].strip("'").strip().partition(" ")
+            months = _UNIT_MONTHS.get(interval_unit.strip().lower(), 0)
+            if not amount.isdigit() or months == 0 or int(amount) * months % step:
+                return None, i, None
+            i = _skip_cast(tokens, i + 3)
+        return "start", i, None
+    return None, i, None
+
+
+def finest_grain(query: str, relation: Relation) -> Optional[str]:
+    """The finest `date_trunc` unit of `query`, if the query may read a coarser sibling of `relation`.
+
+    Checks every rule of the module docstring except the sibling's columns. The
+    bounds of date filters are checked against monthly periods here; see `rewrite`.
+    """
+    analysis = analyze(tokenize(query), relation, step=1)
+    return analysis.grain if analysis is not None else None
+
+
+def analyze(tokens: Sequence[str], relation: Relation, step: int) -> Optional[Analysis]:
+    """Check the tokens of a query over `relation` against the rules of the module docstring.
+
+    Args:
+        tokens (Sequence[str]): The query, as `react_agent.sql_text.tokenize` returns it.
+        relation (Relation): The single view the query reads.
+        step (int): Months in the period that date bounds must align to; 0 accepts
+            any comparison of a date column.
+
+    Returns:
+        Optional[Analysis]: The columns the query uses, or None if it breaks a rule.
+    """
+    if tokens[:1] != ["select"] or tokens.count("select") != 1:
+        return None
+    if {"join", "union", "intersect", "except", "over", "with"} & set(tokens):
+        return None
+    if "sum" not in tokens or not any(tokens[i : i + 2] == ["group", "by"] for i in range(len(tokens))):
+        return None
+    columns = {c.name: c.data_type for c in relation.columns}
+    table_tokens = {relation.name, f'"{relation.name}"', relation.schema, f'"{relation.schema}"'}
+
+    analysis = Analysis()
+    units: Set[str] = set()
+    calls: List[str] = []  # The function calls enclosing the current token.
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == "(":
+            previous = tokens[i - 1] if i else ""
+            calls.append(previous if re.fullmatch(r"[a-z_][a-z0-9_]*", previous) else "")
+            if previous in _AGGREGATES:
+                return None
+            if previous == "date_trunc":
+                unit = tokens[i + 1].strip("'").lower() if i + 1 < len(tokens) else ""
+                if unit not in GRAINS:
+                    return None
+                units.add(unit)
+        elif token == ")":
+            if calls:
+                calls.pop()
+        elif token in table_tokens or tokens[i - 1 : i] == ["as"]:
+            pass
+        elif _unquote(token) in columns and tokens[i - 1 : i] != ["::"] and not (
+            # A typed literal such as date '2024-01-01'.
+            token in ("date", "timestamp") and _literal_date(tokens[i + 1] if i + 1 < len(tokens) else "")
+        ):
+            name = _unquote(token)
+            data_type = columns[name]
+            if data_type in _DATE_TYPES:
+                analysis.dates.add(name)
+                if calls and calls[-1] == "date_trunc":
+                    # Only the bare column: date_trunc('month', date + 1) would shift periods.
+                    ref_start = i - 2 if tokens[i - 1] == "." else i
+                    if tokens[ref_start - 1] != "," or tokens[_skip_cast(tokens, i + 1) : _skip_cast(tokens, i + 1) + 1] != [")"]:
+                        return None
+                elif step:
+                    op = tokens[i + 1] if i + 1 < len(tokens) else ""
+                    # The range kept, as [start, end) of literal dates.
+                    start: Optional[date] = None
+                    end: Optional[date] = None
+                    if op in (">=", "<"):
+                        kind, i, day = _bound(tokens, i + 2, step)
+                        if kind != "start":
+                            return None
+                        start, end = (day, None) if op == ">=" else (None, day)
+                    elif op in ("<=", ">"):
+                        kind, i, day = _bound(tokens, i + 2, step)
+                        if kind != "end":
+                            return None
+                        after = day + timedelta(days=1) if day is not None else None
+                        start, end = (after, None) if op == ">" else (None, after)
+                    elif op == "between":
+                        kind, i, start = _bound(tokens, i + 2, step)
+                        if kind != "start" or tokens[i : i + 1] != ["and"]:
+                            return None
+                        kind, i, day = _bound(tokens, i + 1, step)
+                        if kind != "end":
+                            return None
+                        end = day + timedelta(days=1) if day is not None else None
+                    else:
+                        return None
+                    if "or" not in tokens:
+                        low, high = analysis.bounds.get(name, (None, None))
+                        analysis.bounds[name] = (
+                            max(d for d in (low, start) if d is not None) if low or start else None,
+                            min(d for d in (high, end) if d is not None) if high or end else None,
+                        )
+                    if i < len(tokens) and tokens[i] not in _BOUND_END:
+                        return None
+                    continue
+            elif data_type in _NUMERIC_TYPES and not _IDENTIFIER.search(name):
+                # Only sum(units): a measure used anywhere else, as in a filter
+                # or sum(case when units > 10 ...), depends on the daily values.
+                ref_start = i - 2 if tokens[i - 1] == "." else i
+                if calls[-1:] != ["sum"] or tokens[ref_start - 1] != "(" or tokens[_skip_cast(tokens, i + 1) : _skip_cast(tokens, i + 1) + 1] != [")"]:
+                    return None
+                if _NON_ADDITIVE.search(name):
+                    return None
+                analysis.measures.add(name)
+            else:
+                analysis.dimensions.add(name)
+        i += 1
+    if units:
+        analysis.grain = min(units, key=GRAINS.index)
+    return analysis
+
+
+def _same_columns(used: Set[str], source: Relation, target: Relation) -> bool:
+    types = {c.name: c.data_type for c in target.columns}
+    return all(types.get(c.name) == c.data_type for c in source.columns if c.name in used)
+
+
+def coverage(full_name: str, column: str) -> Optional[Tuple[date, date]]:
+    """The first and last date in `column` of `full_name`, per the column statistics store."""
+    try:
+        columns = get_stats_store().columns(full_name)
+    except sqlite3.Error:
+        return None
+    stats = ((columns or {}).get(column) or {}).get("stats") or {}
+    first, last = _literal_date(f"'{stats.get('min_value')}'"), _literal_date(f"'{stats.get('max_value')}'")
+    return (first, last) if first is not None and last is not None else None
+
+
+def _covers(
+    bounds: Tuple[Optional[date], Optional[date]], step: int, daily: Tuple[date, date], sibling: Tuple[date, date]
+) -> bool:
+    """Whether both views hold every period of the range `bounds` selects, the daily view in full.
+
+    Args:
+        bounds (Tuple[Optional[date], Optional[date]]): The query's [start, end), None where open.
+        step (int): Months in the sibling's period.
+        daily (Tuple[date, date]): The first and last date of the daily view.
+        sibling (Tuple[date, date]): The first and last date of the sibling.
+    """
+    start, end = bounds
+    sibling = (_period_start(sibling[0], step), _period_start(sibling[1], step))
+    if start is None:
+        # Both views start on the same period, the daily view on its first day.
+        if not _is_period_start(daily[0], step) or sibling[0] != daily[0]:
+            return False
+        start = daily[0]
+    if end is None:
+        # Both views end on the same period, the daily view on its last day.
+        end = daily[1] + timedelta(days=1)
+        if not _is_period_start(end, step) or sibling[1] != _period_start(daily[1], step):
+            return False
+    last = end - timedelta(days=1)
+    return daily[0] <= start and sibling[0] <= start and last <= daily[1] and _period_start(last, step) <= sibling[1]
+
+
+def _column_covered(analysis: Analysis, column: str, step: int, source: Relation, target: Relation) -> bool:
+    daily, sibling = coverage(source.full_name, column), coverage(target.full_name, column)
+    if daily is None or sibling is None:
+        return False
+    return _covers(analysis.bounds.get(column, (None, None)), step, daily, sibling)
+
+
+def _replace_table(query: str, source: Relation, target: Relation) -> str:
+    pattern = re.compile(rf'(?<![\w$"])("?){re.escape(source.name)}\1(?![\w$"])')
+    return pattern.sub(lambda m: f"{m[1]}{target.name}{m[1]}", query)
+
+
+async def rewrite(query: str) -> Optional[Rewrite]:
+    """Point `query` at the coarsest sibling view that passes the rules of the module docstring, if any."""
+    lowered = query.lower()
+    if "_daily" not in lowered or "date_trunc" not in lowered:
+        return None
+    tables = referenced_tables(query)
+    if len(tables) != 1:
+        return None
+    (name,) = tables
+    schema, _, table = name.rpartition(".")
+    if not schema or _DAILY.match(table) is None:
+        return None
+    source = await catalog.relation(schema, table)
+    if source is None:
+        return None
+    tokens = tokenize(query)
+    analysis = analyze(tokens, source, step=1)
+    if analysis is None or analysis.grain is None:
+        return None
+    candidates = sibling_names(source.full_name, analysis.grain)
+    relations = await catalog.relations([tuple(c.split(".", 1)) for c in candidates])  # type: ignore[misc]
+    used = {_unquote(token) for token in tokens}
+    for candidate, target in zip(candidates, relations):
+        if target is None or not _same_columns(used, source, target):
+            continue
+        suffix = target.name.removesuffix("_view").rsplit("_", 1)[-1]
+        # Bounds must fall on the sibling's periods, e.g. quarters.
+        step = _STEP_MONTHS[suffix]
+        if step > 1 and analyze(tokens, source, step=step) is None:
+            continue
+        if not all(_column_covered(analysis, column, step, source, target) for column in analysis.dates):
+            continue
+        rewrites[(source.full_name, target.full_name)] += 1
+        return Rewrite(_replace_table(query, source, target), source.full_name, target.full_name)
+    return None
+
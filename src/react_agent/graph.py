@@ -3,17 +3,33 @@
 Works with a chat model with tool calling support.
 """
 
+import asyncio
+import time
+from contextvars import ContextVar
 from datetime import UTC, datetime
-from typing import Dict, List, Literal, cast
-
-from langchain_core.messages import AIMessage
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional, cast
+
+from langchain_core.language_models import LanguageModelInput
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    AnyMessage,
+    BaseMessage,
+    ToolMessage,
+    message_chunk_to_message,
+)
+from langchain_core.runnables import Runnable, RunnableConfig
+from langgraph.constants import TAG_NOSTREAM
 from langgraph.graph import StateGraph
 from langgraph.prebuilt import ToolNode
+from langgraph.prebuilt.tool_node import ToolCallRequest
 
+from react_agent import prompt_cache, telemetry
+from react_agent.compaction import apply_replacements, compact_messages
 from react_agent.configuration import Configuration
 from react_agent.state import InputState, State
 from react_agent.tools import TOOLS
-from react_agent.utils import load_chat_model
+from react_agent.utils import ConcurrencyLimiter, get_message_text, model_registry
 
 import react_agent.configuration
 print("Configuration module file:", react_agent.configuration.__file__)
@@ -22,7 +38,7 @@ print("sys.path:", sys.path)
 # Define the function that calls the model
 
 
-async def call_model(state: State) -> Dict[str, List[AIMessage]]:
+async def call_model(state: State) -> Dict[str, Any]:
     """Call the LLM powering our "agent".
 
     This function prepares the prompt, initializes the model, and processes the response.
@@ -32,40 +48,143 @@ async def call_model(state: State) -> Dict[str, List[AIMessage]]:
         config (RunnableConfig): Configuration for the model run.
 
     Returns:
-        dict: A dictionary containing the model's response message.
+        dict: A dictionary containing the model's response message, preceded by
+        compacted replacements of old tool results, and the full results they
+        replace (under "artifacts").
     """
-        
+    with telemetry.node_span("call_model"):
+        return await _call_model(state)
+
+
+async def _call_model(state: State) -> Dict[str, Any]:
     configuration = Configuration.from_context()
 
-    # Initialize the model with tool binding. Change the model or add more tools here.
-    model = load_chat_model(configuration.model).bind_tools(TOOLS)
+    # Replace tool results the model has already read with short summaries once
+    # the history outgrows its budget; see react_agent.compaction.
+    replacements, stored = compact_messages(state.messages, configuration.history_token_budget)
+    messages: List[AnyMessage] = apply_replacements(state.messages, replacements)
+    update: Dict[str, Any] = {"artifacts": stored} if stored else {}
 
-    # Format the system prompt. Customize this to change the agent's behavior.
-    system_message = configuration.system_prompt.format(
-        system_time=datetime.now(tz=UTC).isoformat()
-    )
+    # Get the model with tools bound, reused across steps and runs. Change the model or add more tools here.
+    model = model_registry.get(configuration.model, TOOLS)
+
+    # Format the system prompt: a stable, cacheable prefix and the current time.
+    # Customize `system_prompt` to change the agent's behavior.
+    tables = await prompt_cache.catalog_section() if configuration.prompt_catalog else None
+    system_message = prompt_cache.system_message(configuration, datetime.now(tz=UTC), tables)
+
+    # On the last step a response with tool calls is replaced below, so keep that
+    # call out of the "messages" stream; clients then only see the replacement.
+    if state.is_last_step:
+        model = model.with_config(tags=[TAG_NOSTREAM])
 
     # Get the model's response
-    response = cast(
-        AIMessage,
-        await model.ainvoke(
-            [{"role": "system", "content": system_message}, *state.messages]
-        ),
-    )
+    with telemetry.span("llm.call", model=configuration.model) as span:
+        response = await _stream_response(
+            model,
+            [system_message, *messages],
+            configuration.model,
+            **prompt_cache.cache_kwargs(configuration, system_message),
+        )
+        span.set(**telemetry.usage_attributes(response))
 
     # Handle the case when it's the last step and the model still wants to use a tool
     if state.is_last_step and response.tool_calls:
         return {
+            **update,
             "messages": [
+                *replacements,
                 AIMessage(
                     id=response.id,
                     content="Sorry, I could not find an answer to your question in the specified number of steps.",
-                )
-            ]
+                ),
+            ],
         }
 
     # Return the model's response as a list to be added to existing messages
-    return {"messages": [response]}
+    return {**update, "messages": [*replacements, response]}
+
+
+async def _stream_response(
+    model: Runnable[LanguageModelInput, BaseMessage],
+    messages: List[Any],
+    model_name: str,
+    **kwargs: Any,
+) -> AIMessage:
+    """Stream the model's response and assemble it into one message.
+
+    Streaming lets LangGraph's "messages" stream mode forward the answer to clients
+    token by token. Tool-call chunks are merged as they arrive. The time to the first
+    chunk with visible text is recorded as the `llm.ttft` span.
+    """
+    start = time.perf_counter()
+    first_token = False
+    response: Optional[AIMessageChunk] = None
+    async for chunk in model.astream(messages, **kwargs):
+        chunk = cast(AIMessageChunk, chunk)
+        if not first_token and get_message_text(chunk):
+            first_token = True
+            telemetry.record("llm.ttft", time.perf_counter() - start, model=model_name)
+        response = chunk if response is None else response + chunk
+    if response is None:
+        raise ValueError(f"{model_name} returned an empty response")
+    return cast(AIMessage, message_chunk_to_message(response))
+
+
+# Tool calls from one model response run concurrently (ToolNode gathers them and
+# returns the results in call order), bounded per run and across the process.
+_process_tool_slots = ConcurrencyLimiter()
+_run_tool_slots: ContextVar[Optional[asyncio.Semaphore]] = ContextVar(
+    "run_tool_slots", default=None
+)
+
+
+async def _limit_tool_concurrency(
+    request: ToolCallRequest,
+    execute: Callable[[ToolCallRequest], Awaitable[Any]],
+) -> Any:
+    """Run one tool call once both the run and the process have a free slot."""
+    configuration = Configuration.from_context()
+    run_slots = _run_tool_slots.get()
+    if run_slots is None:
+        async with _process_tool_slots.slot(configuration.max_process_tool_calls):
+            with telemetry.span(f"tool.{request.tool_call['name']}"):
+                return await execute(request)
+    async with run_slots:
+        async with _process_tool_slots.slot(configuration.max_process_tool_calls):
+            with telemetry.span(f"tool.{request.tool_call['name']}"):
+                return await execute(request)
+
+
+_tool_node = ToolNode(TOOLS, awrap_tool_call=_limit_tool_concurrency)
+
+
+async def call_tools(state: State, config: RunnableConfig) -> Dict[str, List[ToolMessage]]:
+    """Execute the tool calls of the last AI message concurrently.
+
+    At most `max_parallel_tool_calls` of them run at once, and at most
+    `max_process_tool_calls` across every run in the process. The tool messages are
+    returned in the order of the calls.
+
+    Args:
+        state (State): The current state of the conversation.
+        config (RunnableConfig): Configuration for the run.
+
+    Returns:
+        dict: A dictionary containing one tool message per tool call.
+    """
+    configuration = Configuration.from_context()
+    token = _run_tool_slots.set(
+        asyncio.Semaphore(max(configuration.max_parallel_tool_calls, 1))
+    )
+    try:
+        with telemetry.node_span("tools"):
+            # recall_result_tool reads the artifacts through its injected state.
+            return await _tool_node.ainvoke(
+                {"messages": state.messages, "artifacts": state.artifacts}, config
+            )
+    finally:
+        _run_tool_slots.reset(token)
 
 
 # Define a new graph
@@ -74,7 +193,7 @@ builder = StateGraph(State, input=InputState, config_schema=Configuration)
 
 # Define the two nodes we will cycle between
 builder.add_node(call_model)
-builder.add_node("tools", ToolNode(TOOLS))
+builder.add_node("tools", call_tools)
 
 # Set the entrypoint as `call_model`
 # This means that this node is the first one called
@@ -0,0 +1,106 @@
+"""Build the system message so that providers can cache the prompt prefix.
+
+OpenAI and Anthropic both reuse the work done on a prompt prefix they have seen
+recently, which cuts the time to first token of every step after the first. The
+system prompt used to start with the current time at full ISO precision, so no
+two calls shared a prefix. It is now split into:
+
+- a stable prefix: the rules of `Configuration.system_prompt`, how to use
+  rollups when `react_agent.rollups` maintains them, and, optionally
+  (`prompt_catalog`), the list of tables the agent may query, which only
+  changes with the schema catalog;
+- a small volatile suffix: the current time, to the minute, so the steps of one
+  run usually share it too.
+
+On top of that, Anthropic models get `cache_control` breakpoints on the prefix
+and (through the request-level parameter) on the latest message, and OpenAI
+models a `prompt_cache_key` derived from the prefix, which routes requests with
+the same prefix to the same cache. The cached token counts come back in each
+response's `usage_metadata` and are reported by `react_agent.telemetry`.
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from react_agent.catalog import catalog
+from react_agent.configuration import Configuration
+from react_agent.prompts import ROLLUPS_PROMPT
+from react_agent.rollups import rollups
+from react_agent.tools import _is_listed, schemas
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+SUFFIX_TEMPLATE = "Current time: {system_time}"
+
+
+def _provider(model: str) -> str:
+    return model.split("/", maxsplit=1)[0]
+
+
+async def catalog_section() -> str:
+    """The tables the agent may query, as a prompt section."""
+    views = [view for view in await catalog.views(schemas) if _is_listed(view)]
+    return "# Available tables\n" + "\n".join(views)
+
+
+def prompt_prefix(configuration: Configuration, now: datetime, tables: Optional[str] = None) -> str:
+    """The stable part of the system prompt.
+
+    Custom prompts may still contain `{system_time}`; it is filled in to the minute.
+    """
+    prefix = configuration.system_prompt.format(system_time=_minute(now)).strip()
+    if rollups.settings.active:
+        prefix = f"{prefix}\n\n{ROLLUPS_PROMPT.format(schema=rollups.settings.schema).strip()}"
+    if tables:
+        prefix = f"{prefix}\n\n{tables}"
+    return prefix
+
+
+def _minute(now: datetime) -> str:
+    return now.replace(second=0, microsecond=0).isoformat(timespec="minutes")
+
+
+def system_message(
+    configuration: Configuration, now: datetime, tables: Optional[str] = None
+) -> Dict[str, Any]:
+    """The system message: the cacheable prefix, then the volatile suffix.
+
+    Args:
+        configuration (Configuration): Supplies the prompt and the model.
+        now (datetime): The current time.
+        tables (str, optional): The table catalog section to add to the prefix.
+    """
+    prefix = prompt_prefix(configuration, now, tables)
+    suffix = SUFFIX_TEMPLATE.format(system_time=_minute(now))
+    provider = _provider(configuration.model)
+    if provider == "anthropic":
+        blocks: List[Dict[str, Any]] = [
+            {"type": "text", "text": prefix, "cache_control": CACHE_CONTROL},
+            {"type": "text", "text": suffix},
+        ]
+        return {"role": "system", "content": blocks}
+    if provider == "openai":
+        return {
+            "role": "system",
+            "content": [{"type": "text", "text": prefix}, {"type": "text", "text": suffix}],
+        }
+    return {"role": "system", "content": f"{prefix}\n\n{suffix}"}
+
+
+def cache_kwargs(configuration: Configuration, system: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-request caching parameters for the model of `configuration`.
+
+    Args:
+        configuration (Configuration): Supplies the model.
+        system (dict): The system message from `system_message`.
+    """
+    provider = _provider(configuration.model)
+    if provider == "anthropic":
+        # Also cache the conversation so far, up to its latest message.
+        return {"cache_control": CACHE_CONTROL}
+    if provider == "openai":
+        prefix = system["content"][0]["text"]
+        digest = hashlib.sha256(f"{configuration.model}\n{prefix}".encode()).hexdigest()
+        return {"prompt_cache_key": f"react-agent-{digest[:16]}"}
+    return {}
@@ -0,0 +1,150 @@
+"""Process-wide cache of `db_query_tool` results, keyed by normalized SQL.
+
+Analysts ask the same questions over and over, and the agent writes nearly the
+same SQL each time, differing only in whitespace, casing or the order of an
+`IN (...)` list. Results are cached under `sql_text.normalize_sql(query)` so those
+variants share one entry.
+
+Each entry expires after the TTL of the report family it reads from (the
+shortest one if it reads from several), since e.g. a monthly report view only
+changes when its upstream sync lands. Entries are evicted least-recently-used
+once the cache holds more than `QUERY_CACHE_MAX_BYTES` of results.
+
+Queries that read the clock (`now()`, `current_date`, ...) are cached for the
+current UTC day only; queries calling volatile functions such as `random()` are
+never cached.
+"""
+
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from react_agent.sql_text import normalize_sql, referenced_tables
+
+DEFAULT_TTL_RULES: List[Tuple[str, float]] = [
+    # Rollups are rebuilt after the daily sync, and change least often.
+    (r"_quarterly(_view)?$", 12 * 3600),
+    (r"_monthly(_view)?$", 6 * 3600),
+    # Daily business reports and Amazon Ads report views sync a few times a day.
+    (r"_daily(_view)?$", 3600),
+    (r"_report(_view)?$", 3600),
+    # Entity history / serving status views follow campaign edits more closely.
+    (r"_(history|status_detail)_view$", 15 * 60),
+]
+"""(table-name regex, TTL in seconds) pairs; the first matching rule wins."""
+
+DEFAULT_TTL = 15 * 60
+"""TTL for tables no rule matches, and for queries that read no table."""
+
+_CLOCK = re.compile(r"\b(now|current_date|current_timestamp|localtimestamp|localtime|current_time)\b")
+_VOLATILE = re.compile(r"\b(random|clock_timestamp|timeofday|nextval|gen_random_uuid|statement_timestamp)\s*\(")
+
+
+@dataclass
+class _Entry:
+    value: Dict[str, Any]
+    size: int
+    expires_at: float
+
+
+class QueryCache:
+    """LRU-by-bytes cache of query results with per-table TTLs."""
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        ttl_rules: Optional[Sequence[Tuple[str, float]]] = None,
+        default_ttl: float = DEFAULT_TTL,
+    ) -> None:
+        """Create an empty cache.
+
+        Args:
+            max_bytes (int, optional): Total size of cached results before the least
+                recently used are evicted. Defaults to `QUERY_CACHE_MAX_BYTES` or 64 MiB.
+            ttl_rules (Sequence[Tuple[str, float]], optional): (table-name regex, TTL)
+                pairs. Defaults to `DEFAULT_TTL_RULES`.
+            default_ttl (float): TTL for tables no rule matches.
+        """
+        self.max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else int(os.getenv("QUERY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        )
+        self.ttl_rules = [
+            (re.compile(pattern), ttl) for pattern, ttl in (ttl_rules or DEFAULT_TTL_RULES)
+        ]
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, query: str, *scope: Any) -> Optional[str]:
+        """Return the cache key for `query`, or None if it must not be cached.
+
+        Args:
+            query (str): The SQL text.
+            *scope: Anything else the result depends on, e.g. the size budget.
+        """
+        normalized = normalize_sql(query)
+        if _VOLATILE.search(normalized):
+            return None
+        if _CLOCK.search(normalized):
+            scope = (*scope, datetime.now(tz=UTC).date().isoformat())
+        return hashlib.sha256(repr((normalized, scope)).encode()).hexdigest()
+
+    def ttl_for(self, query: str) -> float:
+        """Return the TTL for `query`: the shortest TTL of the tables it reads."""
+        ttls = [self._table_ttl(table) for table in referenced_tables(query)]
+        return min(ttls, default=self.default_ttl)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for `key`, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._drop(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def put(self, key: str, query: str, value: Dict[str, Any]) -> None:
+        """Cache `value` (the result of `query`) under `key`."""
+        size = sum(len(str(v)) for v in value.values())
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = _Entry(value, size, time.monotonic() + self.ttl_for(query))
+        self.size += size
+        while self.size > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+        self.size = 0
+
+    def _drop(self, key: str) -> None:
+        self.size -= self._entries.pop(key).size
+
+    def _table_ttl(self, table: str) -> float:
+        name = table.rsplit(".", 1)[-1].lower()
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(name):
+                return ttl
+        return self.default_ttl
+
+
+query_cache = QueryCache()
+"""The cache shared by every run in this process."""
@@ -0,0 +1,198 @@
+"""Streaming, size-bounded serialization of query results.
+
+Rows are read from a server-side cursor in batches and written to CSV as they
+arrive. Reading stops as soon as the row or byte budget is reached, so a careless
+`SELECT` over a large report view costs at most one batch of memory in the
+worker and a bounded amount of the model's context.
+"""
+
+import csv
+import io
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+from psycopg import AsyncConnection, sql
+
+from react_agent import telemetry
+
+FETCH_BATCH_SIZE = 500
+"""Rows pulled from the server per round trip."""
+
+# Statements that can be wrapped in DECLARE ... CURSOR.
+_CURSORABLE = re.compile(r"^\s*\(*\s*(select|with|values|table)\b", re.IGNORECASE)
+_LEADING_COMMENTS = re.compile(r"^(\s*(--[^\n]*\n|/\*.*?\*/))*", re.DOTALL)
+
+
+@dataclass
+class CsvResult:
+    """A (possibly truncated) query result rendered as CSV."""
+
+    data: str
+    """The header line plus the rows that fit in the budget."""
+
+    row_count: int
+    """Rows included in `data`."""
+
+    total_rows: Optional[int]
+    """Rows the query produced in total, or None if unknown."""
+
+    truncated: bool
+    """Whether rows were left out of `data` to stay within the budget."""
+
+
+def is_cursorable(query: str) -> bool:
+    """Return True if `query` can be read through a server-side cursor."""
+    return bool(_CURSORABLE.match(_LEADING_COMMENTS.sub("", query)))
+
+
+class _CsvWriter:
+    def __init__(self, max_rows: int, max_bytes: int) -> None:
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.parts: list[str] = []
+        self.size = 0
+        self.row_count = 0
+        self.truncated = False
+        self._line = io.StringIO()
+        self._writer = csv.writer(self._line, lineterminator="\n")
+
+    def _format(self, row: Sequence[Any]) -> str:
+        self._line.seek(0)
+        self._line.truncate()
+        self._writer.writerow(row)
+        return self._line.getvalue()
+
+    def header(self, columns: Sequence[str]) -> None:
+        line = self._format(columns)
+        self.parts.append(line)
+        self.size = len(line.encode())
+
+    def rows(self, rows: Sequence[Sequence[Any]]) -> bool:
+        """Append rows until a budget is hit. Return False once truncated."""
+        for row in rows:
+            if self.row_count >= self.max_rows:
+                self.truncated = True
+                return False
+            line = self._format(row)
+            line_bytes = len(line.encode())
+            if self.size + line_bytes > self.max_bytes:
+                self.truncated = True
+                return False
+            self.parts.append(line)
+            self.size += line_bytes
+            self.row_count += 1
+        return True
+
+    def getvalue(self) -> str:
+        return "".join(self.parts)
+
+
+async def _set_statement_timeout(conn: AsyncConnection[Any], seconds: float) -> None:
+    """Limit the statements of the current transaction to `seconds`."""
+    await conn.execute(
+        "SELECT set_config('statement_timeout', %s, true)", (str(int(seconds * 1000)),)
+    )
+
+
+async def fetch_csv(
+    conn: AsyncConnection[Any],
+    query: str,
+    *,
+    max_rows: int,
+    max_bytes: int,
+    statement_timeout: float = 0,
+    read_only: bool = False,
+) -> CsvResult:
+    """Execute `query` and serialize at most `max_rows` rows / `max_bytes` bytes of it.
+
+    Row-returning queries are read through a named (server-side) cursor with
+    `fetchmany`. When the budget is exhausted, the remaining rows are skipped on the
+    server with `MOVE FORWARD ALL`, which reports how many there were without
+    transferring them. Other statements go through a regular cursor.
+
+    Args:
+        conn: A connection from the pool, in autocommit mode.
+        query (str): The SQL query to execute.
+        max_rows (int): Maximum number of data rows to include.
+        max_bytes (int): Maximum size of the CSV text in bytes, header included.
+        statement_timeout (float): Seconds after which the server cancels the
+            query (raising `psycopg.errors.QueryCanceled`); 0 for no limit.
+        read_only (bool): Run `query` as a single statement in a read-only
+            transaction, so that writes fail and roll back. The extended query
+            protocol refuses several statements, so `COMMIT; DELETE ...` cannot
+            end the transaction early.
+    """
+    out = _CsvWriter(max_rows, max_bytes)
+    # Fetching and serializing interleave batch by batch; their times are summed.
+    fetch_seconds = serialize_seconds = 0.0
+
+    if not is_cursorable(query):
+        with telemetry.span("db.execute", cursor="client"):
+            if statement_timeout or read_only:
+                async with conn.transaction():
+                    if read_only:
+                        await conn.execute("SET TRANSACTION READ ONLY")
+                    if statement_timeout:
+                        await _set_statement_timeout(conn, statement_timeout)
+                    # Prepared statements go through the extended protocol.
+                    cur = await conn.execute(query, prepare=True if read_only else None)  # type: ignore[arg-type]
+            else:
+                cur = await conn.execute(query)  # type: ignore[arg-type]
+        if cur.description is None:
+            return CsvResult("", 0, None, False)
+        out.header([c.name for c in cur.description])
+        more = True
+        while more:
+            start = time.perf_counter()
+            batch = await cur.fetchmany(FETCH_BATCH_SIZE)
+            fetch_seconds += time.perf_counter() - start
+            if not batch:
+                break
+            start = time.perf_counter()
+            more = out.rows(batch)
+            serialize_seconds += time.perf_counter() - start
+        total = cur.rowcount if cur.rowcount >= 0 else None
+        telemetry.record("db.fetch", fetch_seconds, rows=max(cur.rowcount, 0))
+        telemetry.record("db.serialize", serialize_seconds, rows=out.row_count, bytes=out.size)
+        return CsvResult(out.getvalue(), out.row_count, total, out.truncated)
+
+    name = f"react_agent_{uuid.uuid4().hex}"
+    # Server-side cursors only live inside a transaction.
+    async with conn.transaction():
+        if read_only:
+            await conn.execute("SET TRANSACTION READ ONLY")
+        if statement_timeout:
+            await _set_statement_timeout(conn, statement_timeout)
+        # DECLARE ... CURSOR FOR takes a single statement.
+        async with conn.cursor(name=name) as cur:
+            with telemetry.span("db.execute", cursor="server"):
+                await cur.execute(query)  # type: ignore[arg-type]
+            assert cur.description is not None
+            out.header([c.name for c in cur.description])
+            fetched = 0
+            while True:
+                start = time.perf_counter()
+                batch = await cur.fetchmany(FETCH_BATCH_SIZE)
+                fetch_seconds += time.perf_counter() - start
+                if not batch:
+                    break
+                fetched += len(batch)
+                start = time.perf_counter()
+                more = out.rows(batch)
+                serialize_seconds += time.perf_counter() - start
+                if not more:
+                    break
+            skipped = 0
+            if out.truncated:
+                start = time.perf_counter()
+                move = await conn.execute(
+                    sql.SQL("MOVE FORWARD ALL IN {}").format(sql.Identifier(name))
+                )
+                fetch_seconds += time.perf_counter() - start
+                skipped = max(move.rowcount, 0)
+    telemetry.record("db.fetch", fetch_seconds, rows=fetched, skipped_rows=skipped)
+    telemetry.record("db.serialize", serialize_seconds, rows=out.row_count, bytes=out.size)
+    return CsvResult(out.getvalue(), out.row_count, fetched + skipped, out.truncated)
@@ -0,0 +1,593 @@
+"""Materialized rollups of the report aggregations the agent runs most.
+
+Most questions end in one of a few aggregations: sales by month, top ASINs by
+revenue, ad spend by campaign. Each is a `sum` over a `sales_and_traffic_*` view
+of sp_api_thrive_2 or a `*_report_view` of amazon_ads_thrive, grouped by a date
+period and a few dimensions, and each reads every daily row of the period again.
+`RollupManager.observe` records the shape of the queries db_query_tool runs: the
+view, the date grain, the grouping columns and the summed columns. Only queries
+that `react_agent.grain_rewrite.analyze` accepts count, so that summing the
+rollup gives the same answer as summing the view.
+
+`RollupManager.run`, called every `ROLLUP_INTERVAL_SECONDS` by the web app:
+
+- adds the shapes seen since the last run to `{ROLLUP_SCHEMA}.rollup_shapes`;
+- creates a materialized view in `ROLLUP_SCHEMA` for each shape queried at least
+  `ROLLUP_MIN_HITS` times, if it has `ROLLUP_MIN_REDUCTION` times fewer rows
+  than the view. The planner cannot estimate the groups of `date_trunc` over a
+  view, so the rows are counted, once per shape and `ROLLUP_IDLE_DAYS`;
+- refreshes rollups older than `ROLLUP_REFRESH_SECONDS` with
+  `REFRESH MATERIALIZED VIEW CONCURRENTLY`, which keeps them readable meanwhile
+  and needs the unique index each rollup has on its grouping columns;
+- drops rollups neither queried nor observed for `ROLLUP_IDLE_DAYS`.
+
+A rollup keeps the column names of its view. Date columns hold the first day of
+their period and measures hold their sums, so `sum(units_ordered)` over a monthly
+rollup equals the sum over the daily view; `source_rows` counts the view rows
+behind each rollup row. Rollups are offered by list_tables_tool, and next to
+their view by find_tables_tool, with comments saying what they summarize.
+
+Rollups are built by the shared database user and so bypass row-level security:
+they are never built when `DB_MULTI_TENANT` is on.
+
+    python -m react_agent.rollups run      # one maintenance pass
+    python -m react_agent.rollups report   # rollups, hits and estimated rows saved
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from psycopg import AsyncConnection, sql
+
+from react_agent import db
+from react_agent.catalog import Relation, catalog
+from react_agent.grain_rewrite import analyze
+from react_agent.sql_text import referenced_tables, tokenize
+
+
+@dataclass
+class RollupSettings:
+    """Which rollups are built and how often, read from the environment."""
+
+    enabled: bool = os.getenv("AGENT_ROLLUPS", "").lower() in ("1", "true", "yes")
+    """Record query shapes and maintain rollups for them."""
+
+    schema: str = os.getenv("ROLLUP_SCHEMA", "agent_rollups")
+    """Schema of the rollups and their bookkeeping tables; created if missing."""
+
+    sources: str = os.getenv(
+        "ROLLUP_SOURCES",
+        r"^(sp_api_thrive_2\.sales_and_traffic_.*|amazon_ads_thrive\..*_report_view)$",
+    )
+    """Regular expression over {schema}.{table_name} of the views that may be rolled up."""
+
+    min_hits: int = int(os.getenv("ROLLUP_MIN_HITS", "5"))
+    """Times a shape must be queried before it gets a rollup."""
+
+    max_rollups: int = int(os.getenv("ROLLUP_MAX", "20"))
+    """Most hot shapes considered per run, by hits."""
+
+    min_reduction: float = float(os.getenv("ROLLUP_MIN_REDUCTION", "10"))
+    """View rows per rollup row below which a rollup is not worth building."""
+
+    interval_seconds: float = float(os.getenv("ROLLUP_INTERVAL_SECONDS", "900"))
+    """Seconds between maintenance runs."""
+
+    refresh_seconds: float = float(os.getenv("ROLLUP_REFRESH_SECONDS", "3600"))
+    """Age at which a rollup is refreshed."""
+
+    idle_days: float = float(os.getenv("ROLLUP_IDLE_DAYS", "14"))
+    """Days without hits after which a rollup is dropped."""
+
+    @property
+    def active(self) -> bool:
+        """Whether rollups are on; never with per-seller roles."""
+        return self.enabled and not db.tenant_settings.enabled
+
+
+settings = RollupSettings()
+
+# Key of the advisory lock that keeps server processes from maintaining rollups at once.
+_LOCK_KEY = 0x726F6C6C
+
+_SETUP = """
+    CREATE SCHEMA IF NOT EXISTS {schema};
+    CREATE TABLE IF NOT EXISTS {schema}.rollup_shapes (
+        shape text PRIMARY KEY,
+        source text NOT NULL,
+        measures text[] NOT NULL,
+        hits bigint NOT NULL,
+        last_seen timestamptz NOT NULL DEFAULT now(),
+        rows bigint,
+        source_rows bigint,
+        counted_at timestamptz
+    );
+    CREATE TABLE IF NOT EXISTS {schema}.rollups (
+        name text PRIMARY KEY,
+        shape text NOT NULL,
+        source text NOT NULL,
+        measures text[] NOT NULL,
+        rows bigint NOT NULL,
+        source_rows bigint NOT NULL,
+        hits bigint NOT NULL DEFAULT 0,
+        created_at timestamptz NOT NULL DEFAULT now(),
+        refreshed_at timestamptz NOT NULL DEFAULT now(),
+        last_used timestamptz NOT NULL DEFAULT now()
+    );
+"""
+
+
+@dataclass(frozen=True)
+class Shape:
+    """What a rollup groups by: one view, a date grain and dimension columns."""
+
+    source: str
+    """The view, as {schema}.{table_name}."""
+
+    grain: str
+    """'day' or 'month' when `dates` is set, 'all' otherwise."""
+
+    dates: Tuple[str, ...]
+    """Date columns, truncated to `grain`."""
+
+    dimensions: Tuple[str, ...]
+    """Other grouping columns."""
+
+    @property
+    def key(self) -> str:
+        """The shape as JSON, the key of `rollup_shapes`."""
+        return json.dumps([self.source, self.grain, self.dates, self.dimensions])
+
+    @classmethod
+    def from_key(cls, key: str) -> "Shape":
+        """Inverse of `key`."""
+        source, grain, dates, dimensions = json.loads(key)
+        return cls(source, grain, tuple(dates), tuple(dimensions))
+
+    @property
+    def name(self) -> str:
+        """The rollup's name, e.g. campaign_level__month_by_campaign_id."""
+        stem = re.sub(r"_(report|daily|view)(?=_|$)", "", self.source.rpartition(".")[2])
+        name = f"{stem}__{self.grain}"
+        if self.dimensions:
+            name += "_by_" + "_".join(self.dimensions)
+        if len(name) > 63:
+            # Postgres truncates identifiers to 63 bytes.
+            name = f"{name[:54]}_{hashlib.md5(self.key.encode()).hexdigest()[:8]}"
+        return name
+
+
+def shape_of(query: str, relation: Relation) -> Optional[Tuple[Shape, Set[str]]]:
+    """The shape of a `sum` over `relation` and the columns it sums, or None.
+
+    The grain is 'month' when the query's date filters fall on month boundaries,
+    'day' otherwise.
+    """
+    tokens = tokenize(query)
+    grain = "month"
+    analysis = analyze(tokens, relation, step=1)
+    if analysis is None:
+        grain = "day"
+        analysis = analyze(tokens, relation, step=0)
+    if analysis is None or not analysis.measures:
+        return None
+    if not analysis.dates:
+        grain = "all"
+    if not analysis.dates and not analysis.dimensions:
+        return None
+    shape = Shape(relation.full_name, grain, tuple(sorted(analysis.dates)), tuple(sorted(analysis.dimensions)))
+    return shape, analysis.measures
+
+
+def rollup_query(shape: Shape, measures: Sequence[str], relation: Relation) -> sql.Composed:
+    """The `SELECT` that a rollup of `shape` over `relation` materializes."""
+    types = {c.name: c.data_type for c in relation.columns}
+    keys = []
+    for column in shape.dates:
+        ident = sql.Identifier(column)
+        if shape.grain == "day" and types[column] == "date":
+            keys.append(ident)
+            continue
+        expr = sql.SQL("date_trunc({}, {})").format(sql.Literal(shape.grain), ident)
+        if types[column] == "date":
+            expr = sql.SQL("{}::date").format(expr)
+        keys.append(sql.SQL("{} AS {}").format(expr, ident))
+    keys.extend(sql.Identifier(column) for column in shape.dimensions)
+    sums = [sql.SQL("sum({0}) AS {0}").format(sql.Identifier(column)) for column in measures]
+    schema, _, table = shape.source.partition(".")
+    return sql.SQL("SELECT {columns}, count(*) AS source_rows FROM {source} GROUP BY {groups}").format(
+        columns=sql.SQL(", ").join(keys + sums),
+        source=sql.Identifier(schema, table),
+        groups=sql.SQL(", ").join(sql.Literal(i + 1) for i in range(len(keys))),
+    )
+
+
+def _comments(shape: Shape, measures: Sequence[str], relation: Relation) -> Dict[str, str]:
+    """Comments for the rollup (key '') and its columns."""
+    original = {c.name: c.comment for c in relation.columns}
+    per = {"day": "day", "month": "month", "all": ""}[shape.grain]
+    grouping = [f"{per} of {c}" for c in shape.dates] + list(shape.dimensions)
+    comments = {
+        "": (
+            f"Precomputed sums of {shape.source}, one row per {', '.join(grouping)}. "
+            f"Summing a column here gives the same total as summing it over {shape.source}."
+        ),
+        "source_rows": f"Number of {shape.source} rows summed into this row.",
+    }
+    for column in shape.dates:
+        comments[column] = f"First day of the {per}." if per != "day" else original[column] or ""
+    for column in shape.dimensions:
+        comments[column] = original[column] or ""
+    for column in measures:
+        comments[column] = f"Sum over the {per or 'group'}. {original[column] or ''}".strip()
+    return comments
+
+
+@dataclass
+class _HotShape:
+    measures: List[str]
+    hits: int
+    rows: Optional[int]
+    source_rows: Optional[int]
+    stale: bool
+    """Whether `rows` and `source_rows` need counting again."""
+
+
+class RollupManager:
+    """Records query shapes and maintains materialized rollups of the hottest."""
+
+    def __init__(self, settings: RollupSettings) -> None:
+        """Create a manager with nothing observed."""
+        self.settings = settings
+        self._sources = re.compile(settings.sources)
+        self._shapes: Counter = Counter()
+        self._measures: Dict[Shape, Set[str]] = {}
+        self._used: Counter = Counter()
+        self.by_source: Dict[str, List[str]] = {}
+        """The rollups of each view as of the last `run`, as {schema}.{table_name}."""
+        self.observed = 0
+        self.created = 0
+        self.refreshed = 0
+        self.dropped = 0
+
+    async def observe(self, query: str) -> None:
+        """Record a query that db_query_tool ran successfully."""
+        if not self.settings.active:
+            return
+        lowered = query.lower()
+        if "sum" not in lowered and self.settings.schema not in lowered:
+            return
+        try:
+            tables = referenced_tables(query)
+            if len(tables) != 1:
+                return
+            (name,) = tables
+            schema, _, table = name.rpartition(".")
+            if schema == self.settings.schema:
+                self._used[table] += 1
+                return
+            if not self._sources.match(name):
+                return
+            relation = await catalog.relation(schema, table)
+            found = shape_of(query, relation) if relation is not None else None
+            if found is None:
+                return
+            shape, measures = found
+            self._shapes[shape] += 1
+            self._measures.setdefault(shape, set()).update(measures)
+            self.observed += 1
+        except Exception as e:
+            print(f"Error observing query shape: {str(e)}")
+
+    async def run(self) -> Dict[str, int]:
+        """Run one maintenance pass; see the module docstring.
+
+        Returns:
+            Dict[str, int]: Rollups 'created', 'refreshed' and 'dropped' by this pass.
+        """
+        done = {"created": 0, "refreshed": 0, "dropped": 0}
+        async with db.connection() as conn:
+            await conn.execute(self._sql(_SETUP))
+            await self._flush(conn)
+            cur = await conn.execute("SELECT pg_try_advisory_lock(%s)", (_LOCK_KEY,))
+            row = await cur.fetchone()
+            # Otherwise another process is running the same pass.
+            if row and row[0]:
+                try:
+                    done["created"] = await self._create_hot(conn)
+                    done["refreshed"] = await self._refresh_stale(conn)
+                    done["dropped"] = await self._drop_idle(conn)
+                finally:
+                    await conn.execute("SELECT pg_advisory_unlock(%s)", (_LOCK_KEY,))
+            cur = await conn.execute(self._sql("SELECT source, name FROM {schema}.rollups ORDER BY name"))
+            by_source: Dict[str, List[str]] = {}
+            for source, name in await cur.fetchall():
+                by_source.setdefault(source, []).append(f"{self.settings.schema}.{name}")
+            self.by_source = by_source
+        if done["created"] or done["dropped"]:
+            catalog.invalidate(self.settings.schema)
+        self.created += done["created"]
+        self.refreshed += done["refreshed"]
+        self.dropped += done["dropped"]
+        return done
+
+    async def report(self) -> Dict[str, List[Dict[str, Any]]]:
+        """The rollups and the hot shapes that have none yet.
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]:
+                - 'rollups': name, source, hits, rows, source_rows and 'rows_saved',
+                  the view rows not read thanks to the rollup: (source_rows - rows) per hit
+                - 'candidates': shape, source, hits, and the 'rows' a rollup would have
+                  and 'source_rows' of the view, once counted (None before)
+        """
+        async with db.connection() as conn:
+            await conn.execute(self._sql(_SETUP))
+            await self._flush(conn)
+            cur = await conn.execute(self._sql(
+                "SELECT name, source, hits, rows, source_rows FROM {schema}.rollups ORDER BY hits DESC"
+            ))
+            rollups = [
+                {
+                    "name": f"{self.settings.schema}.{name}",
+                    "source": source,
+                    "hits": hits,
+                    "rows": rows,
+                    "source_rows": source_rows,
+                    "rows_saved": hits * max(source_rows - rows, 0),
+                }
+                for name, source, hits, rows, source_rows in await cur.fetchall()
+            ]
+            built = {r["name"] for r in rollups}
+            candidates = [
+                {
+                    "shape": shape.name,
+                    "source": shape.source,
+                    "hits": hot.hits,
+                    "rows": hot.rows,
+                    "source_rows": hot.source_rows,
+                }
+                for shape, hot in await self._hot(conn)
+                if f"{self.settings.schema}.{shape.name}" not in built
+            ]
+        return {"rollups": rollups, "candidates": candidates}
+
+    def _sql(self, query: str) -> sql.Composed:
+        return sql.SQL(query).format(schema=sql.Identifier(self.settings.schema))
+
+    async def _flush(self, conn: AsyncConnection[Any]) -> None:
+        shapes, measures, used = self._shapes, self._measures, self._used
+        self._shapes, self._measures, self._used = Counter(), {}, Counter()
+        try:
+            async with conn.transaction():
+                for shape, hits in shapes.items():
+                    await conn.execute(
+                        self._sql("""
+                            INSERT INTO {schema}.rollup_shapes AS s (shape, source, measures, hits)
+                            VALUES (%s, %s, %s, %s)
+                            ON CONFLICT (shape) DO UPDATE SET
+                                hits = s.hits + excluded.hits,
+                                measures = ARRAY(SELECT DISTINCT unnest(s.measures || excluded.measures) ORDER BY 1),
+                                last_seen = now()
+                        """),
+                        (shape.key, shape.source, sorted(measures[shape]), hits),
+                    )
+                for name, hits in used.items():
+                    await conn.execute(
+                        self._sql("UPDATE {schema}.rollups SET hits = hits + %s, last_used = now() WHERE name = %s"),
+                        (hits, name),
+                    )
+        except Exception:
+            # Keep the observations for the next run.
+            self._shapes.update(shapes)
+            self._used.update(used)
+            for shape, columns in measures.items():
+                self._measures.setdefault(shape, set()).update(columns)
+            raise
+
+    async def _hot(self, conn: AsyncConnection[Any]) -> List[Tuple[Shape, "_HotShape"]]:
+        cur = await conn.execute(
+            self._sql("""
+                SELECT shape, measures, hits, rows, source_rows,
+                    coalesce(counted_at < now() - make_interval(days => %s), true)
+                FROM {schema}.rollup_shapes
+                WHERE hits >= %s AND last_seen > now() - make_interval(days => %s)
+                ORDER BY hits DESC LIMIT %s
+            """),
+            (
+                int(self.settings.idle_days),
+                self.settings.min_hits,
+                int(self.settings.idle_days),
+                self.settings.max_rollups,
+            ),
+        )
+        return [(Shape.from_key(key), _HotShape(*rest)) for key, *rest in await cur.fetchall()]
+
+    async def _count_shape(self, conn: AsyncConnection[Any], shape: Shape, relation: Relation) -> Tuple[int, int]:
+        """Count the rows a rollup of `shape` would have, and the rows of its view."""
+        cur = await conn.execute(
+            sql.SQL("SELECT count(*), coalesce(sum(source_rows), 0) FROM ({}) AS rollup").format(
+                rollup_query(shape, [], relation)
+            )
+        )
+        row = await cur.fetchone()
+        assert row is not None
+        rows, source_rows = int(row[0]), int(row[1])
+        await conn.execute(
+            self._sql(
+                "UPDATE {schema}.rollup_shapes SET rows = %s, source_rows = %s, counted_at = now() WHERE shape = %s"
+            ),
+            (rows, source_rows, shape.key),
+        )
+        return rows, source_rows
+
+    async def _create_hot(self, conn: AsyncConnection[Any]) -> int:
+        cur = await conn.execute(self._sql("SELECT name, measures FROM {schema}.rollups"))
+        existing = {name: set(measures) for name, measures in await cur.fetchall()}
+        created = 0
+        for shape, hot in await self._hot(conn):
+            if shape.name in existing and existing[shape.name] >= set(hot.measures):
+                continue
+            relation = await catalog.relation(*shape.source.split(".", 1))
+            columns = {c.name for c in relation.columns} if relation is not None else set()
+            if relation is None or not columns >= {*shape.dates, *shape.dimensions, *hot.measures}:
+                continue
+            rows, source_rows = hot.rows, hot.source_rows
+            if hot.stale:
+                rows, source_rows = await self._count_shape(conn, shape, relation)
+            if rows * self.settings.min_reduction > source_rows:
+                continue
+            # A rollup that gained measures is rebuilt with all of them.
+            measures = sorted(set(hot.measures) | existing.get(shape.name, set()) & columns)
+            await self._create(conn, shape, measures, relation)
+            created += 1
+        return created
+
+    async def _create(
+        self, conn: AsyncConnection[Any], shape: Shape, measures: Sequence[str], relation: Relation
+    ) -> None:
+        name = sql.Identifier(self.settings.schema, shape.name)
+        keys = [*shape.dates, *shape.dimensions]
+        comments = _comments(shape, measures, relation)
+        async with conn.transaction():
+            await conn.execute(sql.SQL("DROP MATERIALIZED VIEW IF EXISTS {}").format(name))
+            await conn.execute(
+                sql.SQL("CREATE MATERIALIZED VIEW {} AS {}").format(name, rollup_query(shape, measures, relation))
+            )
+            # REFRESH ... CONCURRENTLY needs a unique index on plain columns.
+            await conn.execute(
+                sql.SQL("CREATE UNIQUE INDEX ON {} ({})").format(
+                    name, sql.SQL(", ").join(map(sql.Identifier, keys))
+                )
+            )
+            await conn.execute(
+                sql.SQL("COMMENT ON MATERIALIZED VIEW {} IS {}").format(name, sql.Literal(comments.pop("")))
+            )
+            for column, comment in comments.items():
+                await conn.execute(
+                    sql.SQL("COMMENT ON COLUMN {} IS {}").format(
+                        sql.Identifier(self.settings.schema, shape.name, column), sql.Literal(comment)
+                    )
+                )
+            rows, source_rows = await self._count(conn, shape.name)
+            await conn.execute(
+                self._sql("""
+                    INSERT INTO {schema}.rollups AS r (name, shape, source, measures, rows, source_rows)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (name) DO UPDATE SET
+                        measures = excluded.measures, rows = excluded.rows,
+                        source_rows = excluded.source_rows, refreshed_at = now()
+                """),
+                (shape.name, shape.key, shape.source, list(measures), rows, source_rows),
+            )
+
+    async def _count(self, conn: AsyncConnection[Any], name: str) -> Tuple[int, int]:
+        cur = await conn.execute(
+            sql.SQL("SELECT count(*), coalesce(sum(source_rows), 0) FROM {}").format(
+                sql.Identifier(self.settings.schema, name)
+            )
+        )
+        row = await cur.fetchone()
+        assert row is not None
+        return int(row[0]), int(row[1])
+
+    async def _refresh_stale(self, conn: AsyncConnection[Any]) -> int:
+        cur = await conn.execute(
+            self._sql("""
+                SELECT name FROM {schema}.rollups
+                WHERE refreshed_at < now() - make_interval(secs => %s)
+                ORDER BY refreshed_at
+            """),
+            (self.settings.refresh_seconds,),
+        )
+        names = [name for (name,) in await cur.fetchall()]
+        for name in names:
+            await conn.execute(
+                sql.SQL("REFRESH MATERIALIZED VIEW CONCURRENTLY {}").format(
+                    sql.Identifier(self.settings.schema, name)
+                )
+            )
+            rows, source_rows = await self._count(conn, name)
+            await conn.execute(
+                self._sql(
+                    "UPDATE {schema}.rollups SET rows = %s, source_rows = %s, refreshed_at = now() WHERE name = %s"
+                ),
+                (rows, source_rows, name),
+            )
+        return len(names)
+
+    async def _drop_idle(self, conn: AsyncConnection[Any]) -> int:
+        cur = await conn.execute(
+            self._sql("""
+                SELECT r.name FROM {schema}.rollups r
+                LEFT JOIN {schema}.rollup_shapes s ON s.shape = r.shape
+                WHERE r.last_used < now() - make_interval(days => %s)
+                    AND coalesce(s.last_seen, r.last_used) < now() - make_interval(days => %s)
+            """),
+            (int(self.settings.idle_days), int(self.settings.idle_days)),
+        )
+        names = [name for (name,) in await cur.fetchall()]
+        for name in names:
+            async with conn.transaction():
+                await conn.execute(
+                    sql.SQL("DROP MATERIALIZED VIEW IF EXISTS {}").format(sql.Identifier(self.settings.schema, name))
+                )
+                await conn.execute(self._sql("DELETE FROM {schema}.rollups WHERE name = %s"), (name,))
+        return len(names)
+
+
+rollups = RollupManager(settings)
+"""The manager shared by every run in this process."""
+
+
+async def maintain(interval: float) -> None:
+    """Run `rollups.run` every `interval` seconds, until cancelled."""
+    while True:
+        try:
+            await rollups.run()
+        except Exception as e:
+            print(f"Error maintaining rollups: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command-line entry point: run a maintenance pass or print the report."""
+    parser = argparse.ArgumentParser(
+        prog="python -m react_agent.rollups",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("run", help="Record hot shapes, then create, refresh and drop rollups.")
+    commands.add_parser("report", help="Print the rollups, their hits and the rows they saved.")
+    args = parser.parse_args(argv)
+
+    async def command() -> None:
+        try:
+            if args.command == "run":
+                print(json.dumps(await rollups.run()))
+                return
+            report = await rollups.report()
+            print(f"{'rollup':<70} {'hits':>6} {'rows':>9} {'view rows':>10} {'rows saved':>12}")
+            for r in report["rollups"]:
+                print(f"{r['name']:<70} {r['hits']:>6} {r['rows']:>9} {r['source_rows']:>10} {r['rows_saved']:>12}")
+            print(f"total rows saved: {sum(r['rows_saved'] for r in report['rollups'])}")
+            if report["candidates"]:
+                print(f"\n{'candidate':<70} {'hits':>6} {'rows':>9} {'view rows':>10}")
+                for c in report["candidates"]:
+                    print(f"{c['shape']:<70} {c['hits']:>6} {c['rows'] or '-':>9} {c['source_rows'] or '-':>10}")
+        finally:
+            await db.close_pool()
+
+    asyncio.run(command())
+
+
+if __name__ == "__main__":
+    main()
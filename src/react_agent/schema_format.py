@@ -0,0 +1,129 @@
+"""Rendering of table schemas for the model's context.
+
+The report views have 40+ columns, each with a generated paragraph-long
+description, so the output of the schema tools dominates the prompt. The
+compact style renders one short line per column:
+
+    sales_by_date_ordered_product_sales_amount float8 -- Ordered product sales for the day.
+
+with PostgreSQL type names abbreviated, and each comment cut to its first
+sentence and then to a character budget. Passing keywords keeps only the columns
+whose name or comment mentions one of them, plus the key columns (dates and
+identifiers) needed to filter and join.
+"""
+
+import re
+from typing import Iterable, List, Literal, Optional, Sequence
+
+from react_agent.catalog import Column, Relation
+
+SchemaStyle = Literal["compact", "verbose"]
+
+TYPE_ABBREVIATIONS = {
+    "character varying": "varchar",
+    "character": "char",
+    "text": "text",
+    "integer": "int",
+    "bigint": "bigint",
+    "smallint": "smallint",
+    "numeric": "numeric",
+    "double precision": "float8",
+    "real": "float4",
+    "boolean": "bool",
+    "date": "date",
+    "timestamp with time zone": "timestamptz",
+    "timestamp without time zone": "timestamp",
+    "time without time zone": "time",
+    "interval": "interval",
+    "jsonb": "jsonb",
+    "json": "json",
+    "ARRAY": "array",
+    "USER-DEFINED": "enum",
+}
+"""information_schema type names and their short forms."""
+
+# Columns kept regardless of keywords: dates and the identifiers queries join on.
+_KEY_COLUMN = re.compile(r"(^|_)(date|day|week|month|quarter|year|asin|sku|id|marketplace_id)$")
+_SENTENCE_END = re.compile(r"(?<=[a-z0-9)]\.)\s+(?=[A-Z])")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def abbreviate_type(data_type: str) -> str:
+    """Return the short form of an information_schema type name."""
+    return TYPE_ABBREVIATIONS.get(data_type, data_type)
+
+
+def summarize_comment(comment: Optional[str], max_chars: int) -> Optional[str]:
+    """Cut `comment` to its first sentence, then to at most `max_chars` characters.
+
+    Returns None when there is no comment or `max_chars` is 0.
+    """
+    if not comment or max_chars <= 0:
+        return None
+    text = " ".join(comment.split())
+    text = _SENTENCE_END.split(text, maxsplit=1)[0]
+    if len(text) <= max_chars:
+        return text
+    cut = text[: max_chars - 1].rsplit(" ", 1)[0].rstrip(",;:")
+    return cut + "…"
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def relevant_columns(columns: Sequence[Column], keywords: Iterable[str]) -> List[Column]:
+    """Return the columns matching any of `keywords`, plus the key columns.
+
+    A column matches when a keyword word (3+ characters) occurs in its name, or is a
+    whole word of its comment. If nothing matches, every column is returned.
+    """
+    words = {w for keyword in keywords for w in _words(keyword) if len(w) >= 3}
+    if not words:
+        return list(columns)
+    matched = [
+        column
+        for column in columns
+        if any(w in column.name.lower() for w in words)
+        or (column.comment and words.intersection(_words(column.comment)))
+    ]
+    if not matched:
+        return list(columns)
+    return [c for c in columns if c in matched or _KEY_COLUMN.search(c.name)]
+
+
+def render_relation(
+    relation: Relation,
+    *,
+    style: SchemaStyle = "compact",
+    comment_chars: int = 80,
+    keywords: Optional[Sequence[str]] = None,
+) -> str:
+    """Render a relation's columns one per line.
+
+    Args:
+        relation (Relation): The relation to render.
+        style (str): "verbose" for `Column: x, Type: y, Comment: z` lines with the
+            full comment, or "compact" for `x type -- comment` lines.
+        comment_chars (int): Comment budget per column in the compact style; 0 drops
+            comments.
+        keywords (Sequence[str], optional): Only render columns relevant to these
+            words; see `relevant_columns`.
+    """
+    columns = relevant_columns(relation.columns, keywords) if keywords else relation.columns
+    lines = []
+    for column in columns:
+        if style == "verbose":
+            line = f"Column: {column.name}, Type: {column.data_type}"
+            if column.comment:
+                line += f", Comment: {column.comment}"
+        else:
+            line = f"{column.name} {abbreviate_type(column.data_type)}"
+            comment = summarize_comment(column.comment, comment_chars)
+            if comment:
+                line += f" -- {comment}"
+        lines.append(line)
+    omitted = len(relation.columns) - len(columns)
+    if omitted:
+        lines.append(f"(+{omitted} more columns not matching the keywords)")
+    return "\n".join(lines)
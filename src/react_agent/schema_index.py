@@ -0,0 +1,323 @@
+"""Offline schema-linking index: which tables and columns a question is about.
+
+The index is built from the generated column descriptions
+(`scripts/table_descriptions.json`) and the column statistics store
+(`data/schema_stats/stats.sqlite`, for types and top values). It holds two BM25
+collections: one document per table (its name, column names, descriptions and
+top values) and one per column. A question is scored against the tables first,
+then against the columns of the best tables.
+
+The index is a single file, memory-mapped when loaded: a JSON header with the
+names, vocabulary and BM25 statistics, followed by the postings as native-endian
+uint32 pairs (document id, term frequency). Only the postings of the query's
+terms are touched, so a lookup takes about a millisecond and the pages are
+shared between worker processes.
+
+Rebuild it after regenerating descriptions or stats:
+
+    python -m react_agent.schema_index build
+    python -m react_agent.schema_index query "refund rate by month"
+"""
+
+import argparse
+import json
+import math
+import mmap
+import os
+import re
+import struct
+from array import array
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from react_agent.descriptions import DESCRIPTIONS_PATH
+from react_agent.stats_store import DEFAULT_PATH as STATS_PATH
+from react_agent.stats_store import StatsStore
+
+MAGIC = b"RASIDX01"
+_HEADER = struct.Struct("<8sQ")
+
+DEFAULT_PATH = os.getenv(
+    "SCHEMA_INDEX_PATH", str(Path(__file__).resolve().parents[2] / "data" / "schema_index.bin")
+)
+"""Where the index is read from and written to: the committed index in the repository's
+`data` directory, whatever the working directory, unless `SCHEMA_INDEX_PATH` is set."""
+
+K1 = 1.2
+B = 0.75
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or that the this to was what when "
+    "which with per use used e g eg".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split `text` into lower-case terms; underscores separate words, plural 's' is dropped."""
+    terms = []
+    for word in _WORD.findall(text.lower().replace("_", " ")):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+@dataclass
+class ColumnMatch:
+    """A column of a matched table and its relevance to the question."""
+
+    name: str
+    score: float
+
+
+@dataclass
+class TableMatch:
+    """A candidate table for a question."""
+
+    name: str
+    """The table in {schema}.{table_name} form."""
+
+    score: float
+    columns: List[ColumnMatch] = field(default_factory=list)
+    """The table's most relevant columns, best first."""
+
+
+def _top_values(info: Dict[str, Any], limit: int = 5) -> List[str]:
+    stats = info.get("stats") or {}
+    top = (stats.get("top_values") or [])[:limit]
+    return [str(v["value"]) for v in top if v.get("value") is not None]
+
+
+def load_sources(
+    descriptions_path: str, stats_path: str
+) -> List[Tuple[str, List[Tuple[str, str]]]]:
+    """Read the tables to index from the descriptions file and the statistics store.
+
+    Returns:
+        A list of ({schema}.{table_name}, [(column, document text), ...]) pairs.
+    """
+    with open(descriptions_path) as f:
+        descriptions: Dict[str, Dict[str, str]] = json.load(f)
+
+    tables = []
+    store = StatsStore(stats_path, readonly=True)
+    for full_name, columns in store.all_columns().items():
+        # amazon_ads descriptions are keyed by {schema}.{table_name}, sp_api ones by table_name.
+        name = full_name.split(".", 1)[1]
+        comments = descriptions.get(full_name) or descriptions.get(name) or {}
+        docs = [
+            (column, " ".join([column, column, comments.get(column, ""), *_top_values(info)]))
+            for column, info in columns.items()
+        ]
+        tables.append((full_name, docs))
+    return tables
+
+
+class _Collection:
+    """One BM25 collection inside a built or memory-mapped index."""
+
+    def __init__(
+        self,
+        terms: Dict[str, Tuple[int, int]],
+        doc_lengths: Sequence[int],
+        postings: Sequence[int],
+        offset: int,
+    ) -> None:
+        self.terms = terms
+        self.doc_lengths = doc_lengths
+        self.postings = postings
+        self.offset = offset
+        self.avgdl = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+
+    def scores(self, terms: Iterable[str], docs: Optional[Sequence[int]] = None) -> Dict[int, float]:
+        """BM25 score of every document containing a term (restricted to `docs` if given)."""
+        n = len(self.doc_lengths)
+        allowed = set(docs) if docs is not None else None
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(terms):
+            entry = self.terms.get(term)
+            if entry is None:
+                continue
+            start, df = entry
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            base = self.offset + start
+            for i in range(df):
+                doc = self.postings[base + 2 * i]
+                if allowed is not None and doc not in allowed:
+                    continue
+                tf = self.postings[base + 2 * i + 1]
+                norm = K1 * (1 - B + B * self.doc_lengths[doc] / self.avgdl)
+                scores[doc] += idf * tf * (K1 + 1) / (tf + norm)
+        return scores
+
+
+def _build_collection(docs: List[List[str]], postings: array) -> Dict[str, Any]:
+    """Append the postings of `docs` to `postings` and return the collection header."""
+    inverted: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+    for doc_id, terms in enumerate(docs):
+        for term, tf in Counter(terms).items():
+            inverted[term].append((doc_id, tf))
+    section_start = len(postings)
+    terms: Dict[str, Tuple[int, int]] = {}
+    for term in sorted(inverted):
+        terms[term] = (len(postings) - section_start, len(inverted[term]))
+        for doc_id, tf in inverted[term]:
+            postings.extend((doc_id, tf))
+    return {
+        "offset": section_start,
+        "terms": terms,
+        "doc_lengths": [len(terms_) for terms_ in docs],
+    }
+
+
+def build(tables: List[Tuple[str, List[Tuple[str, str]]]], path: str) -> None:
+    """Write an index over `tables` (as returned by `load_sources`) to `path`."""
+    table_docs = []
+    column_docs = []
+    column_names: List[Tuple[int, str]] = []
+    for table_id, (full_name, columns) in enumerate(tables):
+        name = full_name.split(".", 1)[1]
+        # Repeat the table name so it outweighs any single column.
+        table_terms = tokenize(name) * 3
+        for column, text in columns:
+            table_terms.extend(tokenize(text))
+            column_docs.append(tokenize(text))
+            column_names.append((table_id, column))
+        table_docs.append(table_terms)
+
+    postings = array("I")
+    header = {
+        "tables": [full_name for full_name, _ in tables],
+        "columns": column_names,
+        "table_index": _build_collection(table_docs, postings),
+        "column_index": _build_collection(column_docs, postings),
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    # Pad the header so the postings start on a 4-byte boundary.
+    header_bytes += b" " * (-(len(header_bytes) + _HEADER.size) % 4)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(postings.tobytes())
+    os.replace(tmp, path)
+
+
+class SchemaIndex:
+    """A memory-mapped schema-linking index."""
+
+    def __init__(self, path: str) -> None:
+        """Map the index file at `path`."""
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_len = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a schema index")
+        start = _HEADER.size
+        header = json.loads(self._mmap[start : start + header_len])
+        postings = memoryview(self._mmap)[start + header_len :].cast("I")
+        self.tables: List[str] = header["tables"]
+        self.columns: List[Tuple[int, str]] = [tuple(c) for c in header["columns"]]
+        self._columns_by_table: Dict[int, List[int]] = defaultdict(list)
+        for column_id, (table_id, _) in enumerate(self.columns):
+            self._columns_by_table[table_id].append(column_id)
+        self._tables = self._collection(header["table_index"], postings)
+        self._column_index = self._collection(header["column_index"], postings)
+
+    @staticmethod
+    def _collection(section: Dict[str, Any], postings: memoryview) -> _Collection:
+        return _Collection(
+            {term: (start, df) for term, (start, df) in section["terms"].items()},
+            section["doc_lengths"],
+            postings,
+            section["offset"],
+        )
+
+    def search(
+        self,
+        question: str,
+        k: int = 5,
+        columns_per_table: int = 8,
+        tables: Optional[Iterable[str]] = None,
+    ) -> List[TableMatch]:
+        """Return the `k` tables most relevant to `question`, best first.
+
+        Args:
+            question (str): The user's question, or any search text.
+            k (int): Number of tables to return.
+            columns_per_table (int): Number of columns to return per table.
+            tables (Iterable[str], optional): Only consider these {schema}.{table_name}s.
+        """
+        terms = tokenize(question)
+        allowed = None
+        if tables is not None:
+            wanted = set(tables)
+            allowed = [i for i, name in enumerate(self.tables) if name in wanted]
+        ranked = sorted(self._tables.scores(terms, allowed).items(), key=lambda kv: -kv[1])[:k]
+        matches = []
+        for table_id, score in ranked:
+            column_scores = self._column_index.scores(terms, self._columns_by_table[table_id])
+            best = sorted(column_scores.items(), key=lambda kv: -kv[1])[:columns_per_table]
+            matches.append(
+                TableMatch(
+                    self.tables[table_id],
+                    score,
+                    [ColumnMatch(self.columns[c][1], s) for c, s in best],
+                )
+            )
+        return matches
+
+    def close(self) -> None:
+        """Unmap the index file."""
+        self._tables.postings = self._column_index.postings = []
+        self._mmap.close()
+
+
+_index: Optional[SchemaIndex] = None
+
+
+def get_index(path: Optional[str] = None) -> SchemaIndex:
+    """Return the process-wide index, mapping it on first use."""
+    global _index
+    if _index is None:
+        _index = SchemaIndex(path or DEFAULT_PATH)
+    return _index
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command-line entry point: build or query the index."""
+    parser = argparse.ArgumentParser(
+        prog="python -m react_agent.schema_index",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--index", default=DEFAULT_PATH, help="Index file (default: %(default)s).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_cmd = commands.add_parser("build", help="Build the index from descriptions and stats.")
+    build_cmd.add_argument("--descriptions", default=DESCRIPTIONS_PATH)
+    build_cmd.add_argument("--stats", default=STATS_PATH)
+    query_cmd = commands.add_parser("query", help="Print the top tables for a question.")
+    query_cmd.add_argument("question")
+    query_cmd.add_argument("-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        tables = load_sources(args.descriptions, args.stats)
+        build(tables, args.index)
+        print(f"Indexed {len(tables)} tables, {sum(len(c) for _, c in tables)} columns -> {args.index}")
+    else:
+        for match in SchemaIndex(args.index).search(args.question, k=args.k):
+            print(f"{match.score:6.2f}  {match.name}")
+            print(f"        {', '.join(c.name for c in match.columns)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,647 @@
+"""Column statistics for the schema description pipeline.
+
+Computes, for every column of every view in a schema, the descriptive statistics
+the description generator and the schema-linking index are built from (see
+`data/schema_stats`). Each table costs two scans regardless of its width: one
+`SELECT` with the combined aggregates of all columns, and one `GROUPING SETS`
+query with the top values of every column that reports them. Tables are
+processed in parallel over a small connection pool, and `--sample` reads a
+percentage of the rows instead of all of them.
+
+Results are merged into a single store, `data/schema_stats/stats.sqlite` (see
+`react_agent.stats_store`), keyed by {schema}.{table_name}. With `--incremental`
+only the tables that changed since their last refresh are recomputed. A table
+has changed when its columns or view definition differ (the signature), when
+rows were written to the tables it reads from (the `pg_stat_all_tables`
+modification counters), or, for tables with no counters (e.g. over foreign
+tables), when the maximum of its date column moved (the watermark). Each table also carries a version that is only bumped when its
+statistics changed materially, so descriptions are regenerated for those alone
+(see `stale_descriptions`).
+
+    python -m react_agent.schema_stats sp_api_thrive_2 amazon_ads_thrive --jobs 8
+    python -m react_agent.schema_stats amazon_ads_thrive --incremental
+    python -m react_agent.schema_stats amazon_ads_thrive --sample 10 --tables profile_view
+
+Connection settings come from the usual DB_* environment variables.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from psycopg import AsyncConnection, sql
+from psycopg_pool import AsyncConnectionPool
+
+from react_agent import db
+from react_agent.stats_store import DEFAULT_PATH, StatsStore, normalize_columns
+
+_COLUMNS_QUERY = """
+    SELECT c.table_schema, c.table_name, pgc.relkind, c.column_name, c.data_type, c.udt_name
+    FROM information_schema.columns c
+    JOIN pg_namespace n ON n.nspname = c.table_schema
+    JOIN pg_class pgc ON pgc.relnamespace = n.oid AND pgc.relname = c.table_name
+    WHERE c.table_schema = ANY(%s) AND pgc.relkind IN ('r', 'v', 'm', 'p', 'f')
+    ORDER BY c.table_schema, c.table_name, c.ordinal_position;
+"""
+
+# Per relation: a hash of its view definition and the write counters summed over
+# every table it reads from, following views on views.
+_CHANGES_QUERY = """
+    WITH RECURSIVE rels AS (
+        SELECT c.oid, n.nspname, c.relname
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = ANY(%s) AND c.relkind IN ('r', 'v', 'm', 'p', 'f')
+    ), deps (root, oid) AS (
+        SELECT oid, oid FROM rels
+        UNION
+        SELECT deps.root, d.refobjid
+        FROM deps
+        JOIN pg_rewrite r ON r.ev_class = deps.oid
+        JOIN pg_depend d ON d.classid = 'pg_rewrite'::regclass AND d.objid = r.oid
+            AND d.refclassid = 'pg_class'::regclass AND d.refobjid <> deps.oid
+    )
+    SELECT rels.nspname, rels.relname,
+           md5(coalesce(pg_get_viewdef(rels.oid), '')) AS definition,
+           sum(s.n_tup_ins + s.n_tup_upd + s.n_tup_del)::bigint AS mod_count,
+           count(s.relid) AS tracked
+    FROM rels
+    JOIN deps ON deps.root = rels.oid
+    LEFT JOIN pg_stat_all_tables s ON s.relid = deps.oid
+    GROUP BY rels.oid, rels.nspname, rels.relname;
+"""
+
+MATERIAL_TOLERANCE = 0.2
+"""Relative change of a statistic above which descriptions are regenerated."""
+
+_NUMERIC_TYPES = {
+    "smallint", "integer", "bigint", "decimal", "numeric", "real", "double precision",
+    "smallserial", "serial", "bigserial", "money",
+}
+_TIMESTAMP_TYPES = {"timestamp without time zone", "timestamp with time zone"}
+_TIME_TYPES = {"time without time zone", "time with time zone"}
+
+TOP_VALUES = {"boolean": 3, "text": 10, "date": 10, "timestamp": 10, "time": 10}
+"""How many of the most frequent values each category reports."""
+
+
+def categorize_type(data_type: str, udt_name: str) -> str:
+    """Map a PostgreSQL data type to the coarse category that decides its statistics."""
+    dt = (data_type or "").lower()
+    udt = (udt_name or "").lower()
+    if dt in _NUMERIC_TYPES or udt in {"int2", "int4", "int8", "float4", "float8"}:
+        return "numeric"
+    if dt == "boolean":
+        return "boolean"
+    if dt == "date":
+        return "date"
+    if dt in _TIMESTAMP_TYPES:
+        return "timestamp"
+    if dt in _TIME_TYPES:
+        return "time"
+    if dt in ("json", "jsonb"):
+        return "json"
+    # Text, and anything unknown, is treated as text.
+    return "text"
+
+
+@dataclass
+class TableColumns:
+    """A table or view and its columns, as (name, data_type, udt_name) in ordinal order."""
+
+    schema: str
+    name: str
+    kind: str
+    columns: List[Tuple[str, str, str]]
+
+    @property
+    def full_name(self) -> str:
+        """The name in {schema}.{table_name} form."""
+        return f"{self.schema}.{self.name}"
+
+
+def _aggregates(column: str, category: str) -> List[Tuple[str, Optional[sql.Composable]]]:
+    """(stat name, aggregate expression) pairs for one column, in output order.
+
+    For columns with top values `distinct_values` has no expression: it is counted
+    in the grouping-sets pass instead.
+    """
+    col = sql.Identifier(column)
+
+    def expr(template: str) -> sql.Composable:
+        return sql.SQL(template).format(col=col)
+
+    counts: List[Tuple[str, Optional[sql.Composable]]] = [
+        ("total_rows", expr("COUNT(*)::bigint")),
+        ("non_null_rows", expr("COUNT({col})::bigint")),
+        ("null_rows", expr("(COUNT(*) - COUNT({col}))::bigint")),
+    ]
+    distinct = ("distinct_values", None)
+    if category == "numeric":
+        return counts + [
+            # Numeric columns are often near-unique, which makes grouping them costly.
+            ("distinct_values", expr("COUNT(DISTINCT {col})::bigint")),
+            ("avg_value", expr("AVG({col})")),
+            ("min_value", expr("MIN({col})")),
+            ("max_value", expr("MAX({col})")),
+            ("stddev", expr("STDDEV_SAMP({col})")),
+            # Split into p25 / median / p75 when the row is read.
+            ("percentiles", expr("PERCENTILE_CONT(ARRAY[0.25, 0.5, 0.75]) WITHIN GROUP (ORDER BY {col})")),
+        ]
+    if category == "boolean":
+        return [
+            ("total_rows", expr("COUNT(*)::bigint")),
+            ("true_count", expr("COUNT(*) FILTER (WHERE {col})::bigint")),
+            ("false_count", expr("COUNT(*) FILTER (WHERE NOT {col})::bigint")),
+            ("null_count", expr("(COUNT(*) - COUNT({col}))::bigint")),
+            distinct,
+        ]
+    if category in ("date", "timestamp", "time"):
+        return counts + [
+            ("min_value", expr("MIN({col})")),
+            ("max_value", expr("MAX({col})")),
+            distinct,
+        ]
+    if category == "json":
+        return counts
+    return counts + [
+        distinct,
+        ("avg_length", expr("AVG(LENGTH({col}::text))")),
+        ("min_length", expr("MIN(LENGTH({col}::text))")),
+        ("max_length", expr("MAX(LENGTH({col}::text))")),
+    ]
+
+
+def _source(table: TableColumns, sample: Optional[float]) -> sql.Composable:
+    """The FROM clause: the table itself, or a sample of `sample` percent of its rows."""
+    name = sql.SQL("{}.{}").format(sql.Identifier(table.schema), sql.Identifier(table.name))
+    if sample is None:
+        return name
+    if table.kind in ("r", "m", "p"):
+        # Block sampling: only the sampled pages are read.
+        return sql.SQL("{} TABLESAMPLE SYSTEM ({})").format(name, sql.Literal(sample))
+    # Views cannot be TABLESAMPLEd; filter the rows instead.
+    return sql.SQL("(SELECT * FROM {} WHERE random() < {}) AS sampled").format(
+        name, sql.Literal(sample / 100)
+    )
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).decode("utf-8", errors="replace")
+    try:
+        json.dumps(value)
+        return value
+    except TypeError:
+        return str(value)
+
+
+async def table_stats(
+    conn: AsyncConnection[Any], table: TableColumns, sample: Optional[float] = None
+) -> Dict[str, Any]:
+    """Compute the statistics of every column of `table` in two scans.
+
+    Args:
+        conn: A connection in autocommit mode.
+        table (TableColumns): The table and its columns.
+        sample (float, optional): Percentage of rows to read, or None for all of them.
+
+    Returns:
+        {column: {"data_type", "udt_name", "category", "stats"}}, in column order.
+    """
+    categories = [categorize_type(dt, udt) for _, dt, udt in table.columns]
+    source = _source(table, sample)
+
+    # Scan 1: every aggregate of every column in a single SELECT.
+    selects: List[sql.Composable] = []
+    names: List[Tuple[int, str]] = []
+    stats: List[Dict[str, Any]] = [{} for _ in table.columns]
+    for i, ((column, _, _), category) in enumerate(zip(table.columns, categories)):
+        for stat, aggregate in _aggregates(column, category):
+            if stat == "percentiles":
+                stats[i].update(p25=None, median=None, p75=None)
+            else:
+                # Fixes the key order; values are filled in below.
+                stats[i][stat] = 0 if stat == "distinct_values" else None
+            if aggregate is not None:
+                selects.append(aggregate)
+                names.append((i, stat))
+    if selects:
+        cur = await conn.execute(
+            sql.SQL("SELECT {} FROM {}").format(sql.SQL(", ").join(selects), source)
+        )
+        row = await cur.fetchone()
+        assert row is not None
+        for (i, stat), value in zip(names, row):
+            if stat == "percentiles":
+                p25, median, p75 = value or (None, None, None)
+                stats[i].update(p25=p25, median=median, p75=p75)
+            else:
+                stats[i][stat] = value
+
+    # Scan 2: one hashed grouping set per column with top values gives its most
+    # frequent values and its distinct count (the number of non-NULL groups), which
+    # saves a sort per column for COUNT(DISTINCT ...).
+    grouped = [i for i, category in enumerate(categories) if category in TOP_VALUES]
+    for i in grouped:
+        stats[i]["top_values"] = []
+    if grouped:
+        # In each set every other column is NULL, so the grouped value is the
+        # COALESCE of all of them.
+        cols = [sql.Identifier(table.columns[i][0]) for i in grouped]
+        set_index = sql.SQL("CASE {} END").format(
+            sql.SQL(" ").join(
+                sql.SQL("WHEN GROUPING({}) = 0 THEN {}").format(col, sql.Literal(n))
+                for n, col in enumerate(cols)
+            )
+        )
+        limits = sql.SQL("CASE s.set_index {} END").format(
+            sql.SQL(" ").join(
+                sql.SQL("WHEN {} THEN {}").format(sql.Literal(n), sql.Literal(TOP_VALUES[categories[i]]))
+                for n, i in enumerate(grouped)
+            )
+        )
+        query = sql.SQL(
+            """
+            SELECT set_index, value, count, distinct_values FROM (
+                SELECT s.set_index, s.value, s.count,
+                       row_number() OVER (PARTITION BY s.set_index ORDER BY s.count DESC, s.value COLLATE "C") AS rank,
+                       COUNT(*) OVER (PARTITION BY s.set_index) AS distinct_values,
+                       {limits} AS max_rank
+                FROM (
+                    SELECT {set_index} AS set_index,
+                           COALESCE({values}) AS value,
+                           COUNT(*)::bigint AS count
+                    FROM {source}
+                    GROUP BY GROUPING SETS ({sets})
+                ) s
+                WHERE s.value IS NOT NULL
+            ) ranked
+            WHERE rank <= max_rank
+            ORDER BY set_index, rank
+            """
+        ).format(
+            limits=limits,
+            set_index=set_index,
+            values=sql.SQL(", ").join(sql.SQL("{}::text").format(col) for col in cols),
+            source=source,
+            sets=sql.SQL(", ").join(sql.SQL("({})").format(col) for col in cols),
+        )
+        cur = await conn.execute(query)
+        for n, value, count, distinct_values in await cur.fetchall():
+            i = grouped[n]
+            stats[i]["distinct_values"] = distinct_values
+            if categories[i] == "boolean":
+                value = value == "true"
+            stats[i]["top_values"].append({"value": value, "count": count})
+
+    result: Dict[str, Any] = {}
+    for i, (column, data_type, udt_name) in enumerate(table.columns):
+        column_stats = {k: _json_value(v) for k, v in stats[i].items() if k != "top_values"}
+        if "top_values" in stats[i]:
+            column_stats["top_values"] = stats[i]["top_values"]
+        if sample is not None:
+            column_stats["sample_percent"] = sample
+        result[column] = {
+            "data_type": data_type,
+            "udt_name": udt_name,
+            "category": categories[i],
+            "stats": column_stats,
+        }
+    return result
+
+
+async def list_tables(
+    conn: AsyncConnection[Any],
+    schemas: Sequence[str],
+    kinds: Iterable[str] = ("v",),
+    tables: Optional[Iterable[str]] = None,
+) -> List[TableColumns]:
+    """Return the relations of `kinds` in `schemas` (views by default) with their columns.
+
+    Args:
+        conn: A connection.
+        schemas (Sequence[str]): The schemas to list.
+        kinds (Iterable[str]): `pg_class.relkind`s to include.
+        tables (Iterable[str], optional): Only these, as table_name or {schema}.{table_name}.
+    """
+    wanted = set(tables) if tables is not None else None
+    kinds = set(kinds)
+    cur = await conn.execute(_COLUMNS_QUERY, (list(schemas),))
+    result: Dict[Tuple[str, str], TableColumns] = {}
+    for schema, name, kind, column, data_type, udt_name in await cur.fetchall():
+        if kind not in kinds:
+            continue
+        if wanted is not None and name not in wanted and f"{schema}.{name}" not in wanted:
+            continue
+        entry = result.get((schema, name))
+        if entry is None:
+            entry = result[(schema, name)] = TableColumns(schema, name, kind, [])
+        entry.columns.append((column, data_type, udt_name))
+    return list(result.values())
+
+
+async def schema_stats(
+    pool: AsyncConnectionPool,
+    tables: Sequence[TableColumns],
+    sample: Optional[float] = None,
+    progress: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    """Compute `table_stats` for each table, as many at a time as the pool allows.
+
+    Returns:
+        {"{schema}.{table_name}": table stats}, in the order of `tables`. Tables whose
+        queries fail are reported and left out.
+    """
+    done = 0
+    # Queue for a free connection here rather than in the pool, which would time out.
+    slots = asyncio.Semaphore(pool.max_size)
+
+    async def one(table: TableColumns) -> Optional[Dict[str, Any]]:
+        nonlocal done
+        try:
+            async with slots, pool.connection() as conn:
+                start = time.perf_counter()
+                stats = await table_stats(conn, table, sample)
+        except Exception as e:
+            print(f"Error computing statistics for {table.full_name}: {str(e)}")
+            return None
+        done += 1
+        if progress:
+            print(f"[{done}/{len(tables)}] {table.full_name}: {len(table.columns)} columns "
+                  f"in {time.perf_counter() - start:.2f}s")
+        return stats
+
+    results = await asyncio.gather(*(one(table) for table in tables))
+    return {t.full_name: r for t, r in zip(tables, results) if r is not None}
+
+
+def write_stats(stats: Dict[str, Dict[str, Any]], schema: str, output_dir: str) -> str:
+    """Write one schema's statistics to a timestamped file in `output_dir`; return its path."""
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(output_dir, f"{schema}_stats_{timestamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(stats, f, default=str, indent=2)
+    return path
+
+
+@dataclass
+class TableState:
+    """What a refresh compares to decide whether a table changed."""
+
+    signature: str
+    """Hash of the column names and types and of the view definition."""
+
+    mod_count: Optional[int]
+    """Rows inserted, updated or deleted in the underlying tables, or None if untracked."""
+
+    watermark: Optional[str] = None
+    """Maximum of the date column, for tables without modification counters."""
+
+
+def _watermark_column(table: TableColumns) -> Optional[str]:
+    """The date column whose maximum tracks new data: `date`, then *_date, then any."""
+    dates = [
+        column
+        for column, data_type, udt_name in table.columns
+        if categorize_type(data_type, udt_name) in ("date", "timestamp")
+    ]
+    for preferred in (lambda c: c == "date", lambda c: c.endswith("date")):
+        for column in dates:
+            if preferred(column):
+                return column
+    return dates[0] if dates else None
+
+
+async def table_states(
+    conn: AsyncConnection[Any], tables: Sequence[TableColumns]
+) -> Dict[str, TableState]:
+    """Return the current `TableState` of each table.
+
+    Signatures and counters come from one catalog query; a watermark costs a query
+    each, and is only read for tables without modification counters.
+    """
+    schemas = sorted({t.schema for t in tables})
+    cur = await conn.execute(_CHANGES_QUERY, (schemas,))
+    counters = {
+        f"{schema}.{name}": (definition, mod_count if tracked else None)
+        for schema, name, definition, mod_count, tracked in await cur.fetchall()
+    }
+    states = {}
+    for table in tables:
+        definition, mod_count = counters.get(table.full_name, ("", None))
+        signature = hashlib.sha1(
+            json.dumps([table.columns, definition]).encode()
+        ).hexdigest()
+        state = TableState(signature, mod_count)
+        column = _watermark_column(table)
+        if mod_count is None and column is not None:
+            cur = await conn.execute(
+                sql.SQL("SELECT max({})::text FROM {}.{}").format(
+                    sql.Identifier(column), sql.Identifier(table.schema), sql.Identifier(table.name)
+                )
+            )
+            row = await cur.fetchone()
+            state.watermark = row[0] if row else None
+        states[table.full_name] = state
+    return states
+
+
+def change_reason(entry: Optional[Dict[str, Any]], state: TableState) -> Optional[str]:
+    """Why a table must be recomputed given its stored `entry`, or None if it must not."""
+    if entry is None:
+        return "new"
+    if entry.get("signature") != state.signature:
+        return "columns or definition changed"
+    if state.mod_count is not None:
+        previous = entry.get("mod_count")
+        # Counters go back to zero when statistics are reset.
+        if previous is None or state.mod_count != previous:
+            return "rows modified"
+        return None
+    if state.watermark is not None:
+        if state.watermark != entry.get("watermark"):
+            return "watermark moved"
+        return None
+    return "no change tracking"
+
+
+def _number(value: Any) -> Optional[float]:
+    # Numerics were serialized with default=str, e.g. "10.0000000000000000".
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _moved(old: Any, new: Any, tolerance: float) -> bool:
+    a, b = _number(old), _number(new)
+    if a is None or b is None:
+        return (a is None) != (b is None)
+    return abs(a - b) > tolerance * max(abs(a), abs(b))
+
+
+def _null_fraction(stats: Dict[str, Any]) -> float:
+    total = _number(stats.get("total_rows"))
+    nulls = _number(stats.get("null_rows", stats.get("null_count")))
+    return (nulls or 0.0) / total if total else 0.0
+
+
+def materially_changed(
+    old: Dict[str, Any], new: Dict[str, Any], tolerance: float = MATERIAL_TOLERANCE
+) -> bool:
+    """Whether two computations of a table's statistics would describe it differently.
+
+    Growth alone is not material: row counts, date ranges and the top dates move on
+    every load. Material changes are added, removed or retyped columns, a null
+    fraction moving by more than `tolerance`, a numeric average, median or range
+    bound moving by more than `tolerance` relatively, and, for text and boolean
+    columns, the distinct count moving likewise or half of the top 5 values being
+    replaced.
+    """
+    if list(old) != list(new):
+        return True
+    for column, new_info in new.items():
+        old_info = old[column]
+        category = new_info.get("category")
+        if (old_info.get("data_type"), old_info.get("category")) != (new_info.get("data_type"), category):
+            return True
+        a, b = old_info.get("stats") or {}, new_info.get("stats") or {}
+        if abs(_null_fraction(a) - _null_fraction(b)) > tolerance:
+            return True
+        if category == "numeric":
+            keys = ("avg_value", "median", "min_value", "max_value")
+            if any(_moved(a.get(k), b.get(k), tolerance) for k in keys):
+                return True
+        elif category in ("text", "boolean"):
+            if _moved(a.get("distinct_values"), b.get("distinct_values"), tolerance):
+                return True
+            old_top = [v["value"] for v in (a.get("top_values") or [])[:5]]
+            new_top = {v["value"] for v in (b.get("top_values") or [])[:5]}
+            if old_top and len(new_top.intersection(old_top)) < len(old_top) / 2:
+                return True
+    return False
+
+
+def merge(
+    store: StatsStore,
+    full_name: str,
+    state: TableState,
+    columns: Dict[str, Any],
+    tolerance: float = MATERIAL_TOLERANCE,
+) -> bool:
+    """Record freshly computed statistics in `store`; return whether they changed materially."""
+    now = datetime.now().isoformat(timespec="seconds")
+    entry = store.entry(full_name)
+    # Compare in the types the store returns.
+    columns = normalize_columns(columns)
+    if entry is None:
+        # Descriptions that predate the store count as generated from its first version.
+        entry = {"version": 0, "described_version": 1}
+        material = True
+    else:
+        material = materially_changed(store.columns(full_name) or {}, columns, tolerance)
+    if material:
+        entry["version"] += 1
+        entry["changed_at"] = now
+    entry.update(
+        signature=state.signature,
+        mod_count=state.mod_count,
+        watermark=state.watermark,
+        computed_at=now,
+        columns=columns,
+    )
+    store.put(full_name, entry)
+    return material
+
+
+def stale_descriptions(store: StatsStore, tables: Iterable[str]) -> List[str]:
+    """The `tables` whose statistics changed materially since their descriptions were generated."""
+    stale = []
+    for table in tables:
+        entry = store.entry(table)
+        if entry is not None and entry["described_version"] != entry["version"]:
+            stale.append(table)
+    return stale
+
+
+def mark_described(store: StatsStore, tables: Iterable[str]) -> None:
+    """Record that descriptions were generated from the current statistics of `tables`."""
+    for table in tables:
+        entry = store.entry(table)
+        if entry is not None:
+            store.set_described_version(table, entry["version"])
+
+
+async def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m react_agent.schema_stats",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("schemas", nargs="+")
+    parser.add_argument("--tables", nargs="+", help="Only these tables or views.")
+    parser.add_argument("--kinds", default="v", help="pg_class relkinds to include (default: v, views).")
+    parser.add_argument("--incremental", action="store_true", help="Only recompute tables that changed.")
+    parser.add_argument("--sample", type=float, help="Read this percentage of each table's rows.")
+    parser.add_argument("--jobs", type=int, default=4, help="Tables processed in parallel.")
+    parser.add_argument(
+        "--work-mem", default="64MB", help="work_mem for the sorts and hash tables (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=MATERIAL_TOLERANCE,
+        help="Relative change that counts as material (default: %(default)s).",
+    )
+    parser.add_argument("--store", default=DEFAULT_PATH, help="Statistics store (default: %(default)s).")
+    parser.add_argument(
+        "--snapshot", action="store_true",
+        help="Also write each schema's statistics to a timestamped file next to the store.",
+    )
+    args = parser.parse_args(argv)
+
+    store = StatsStore(args.store)
+    async with AsyncConnectionPool(
+        db._conninfo(),
+        min_size=1,
+        max_size=args.jobs,
+        # Distinct counts, percentiles and top values all sort or hash whole columns.
+        kwargs={"autocommit": True, "options": f"-c work_mem={args.work_mem}"},
+        open=False,
+    ) as pool:
+        async with pool.connection() as conn:
+            tables = await list_tables(conn, args.schemas, args.kinds, args.tables)
+            states = await table_states(conn, tables)
+        for schema in args.schemas:
+            selected = [t for t in tables if t.schema == schema]
+            if args.incremental:
+                reasons = {
+                    t.full_name: change_reason(store.entry(t.full_name), states[t.full_name]) for t in selected
+                }
+                selected = [t for t in selected if reasons[t.full_name]]
+                for reason in sorted({r for r in reasons.values() if r}):
+                    print(f"{schema}: {sum(r == reason for r in reasons.values())} tables {reason}")
+            start = time.perf_counter()
+            stats = await schema_stats(pool, selected, args.sample)
+            elapsed = time.perf_counter() - start
+            material = [
+                name for name, columns in stats.items() if merge(store, name, states[name], columns, args.tolerance)
+            ]
+            print(
+                f"{schema}: {len(stats)} tables recomputed in {elapsed:.1f}s, "
+                f"{len(material)} changed materially -> {args.store}"
+            )
+            if args.snapshot:
+                snapshot = {n: store.columns(n) for n in store.names() if n.startswith(f"{schema}.")}
+                print(f"{schema}: snapshot -> {write_stats(snapshot, schema, os.path.dirname(args.store))}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,162 @@
+"""Lightweight lexical helpers for the SQL the agent writes.
+
+This is not a parser. It tokenizes PostgreSQL text well enough to produce a
+canonical form for cache keys and to find the relations a query reads from.
+"""
+
+import re
+from typing import List, Set
+
+_TOKEN = re.compile(
+    r"""
+    (?P<space>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>[eE]?'(?:[^']|'')*')
+  | (?P<dollar>\$(?P<tag>[A-Za-z_]*)\$.*?\$(?P=tag)\$)
+  | (?P<ident>"(?:[^"]|"")*")
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<param>\$\d+)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<op>::|<>|!=|<=|>=|\|\||[-+*/%^<>=~!@#&|`?])
+  | (?P<punct>[(),;.\[\]:{}])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+_LITERAL_KINDS = {"string", "dollar", "number"}
+
+# Keywords that end a FROM list.
+_CLAUSE_END = {
+    "where", "group", "order", "limit", "offset", "having", "union", "intersect",
+    "except", "window", "on", "using", "fetch", "for", "returning",
+}
+
+
+def tokenize(query: str) -> List[str]:
+    """Split `query` into tokens, dropping whitespace and comments.
+
+    Unquoted words are lower-cased (PostgreSQL folds them anyway); string
+    literals and quoted identifiers are kept verbatim.
+    """
+    tokens: List[str] = []
+    pos = 0
+    while pos < len(query):
+        m = _TOKEN.match(query, pos)
+        if m is None:
+            # Unknown character: keep it as its own token.
+            tokens.append(query[pos])
+            pos += 1
+            continue
+        pos = m.end()
+        kind = m.lastgroup
+        if kind in ("space", "comment"):
+            continue
+        text = m.group()
+        tokens.append(text.lower() if kind == "word" else text)
+    return tokens
+
+
+def _is_literal(token: str) -> bool:
+    m = _TOKEN.fullmatch(token)
+    return m is not None and m.lastgroup in _LITERAL_KINDS
+
+
+def _sort_in_lists(tokens: List[str]) -> List[str]:
+    """Sort the items of `IN (<literal>, <literal>, ...)` lists."""
+    out: List[str] = []
+    i = 0
+    while i < len(tokens):
+        out.append(tokens[i])
+        if tokens[i] == "in" and tokens[i + 1 : i + 2] == ["("]:
+            items: List[str] = []
+            j = i + 2
+            while j < len(tokens) and _is_literal(tokens[j]):
+                items.append(tokens[j])
+                if tokens[j + 1 : j + 2] == [","]:
+                    j += 2
+                elif tokens[j + 1 : j + 2] == [")"]:
+                    out.extend(["(", " , ".join(sorted(items)), ")"])
+                    i = j + 1
+                    break
+                else:
+                    break
+        i += 1
+    return out
+
+
+def normalize_sql(query: str) -> str:
+    """Return a canonical form of `query` for use as a cache key.
+
+    Comments, whitespace differences, keyword/identifier casing, a trailing
+    semicolon and the order of literal `IN (...)` lists do not affect the result.
+    """
+    tokens = tokenize(query)
+    while tokens and tokens[-1] == ";":
+        tokens.pop()
+    return " ".join(_sort_in_lists(tokens))
+
+
+def _unquote(token: str) -> str:
+    if token.startswith('"') and token.endswith('"'):
+        return token[1:-1].replace('""', '"')
+    return token
+
+
+def _is_name(token: str) -> bool:
+    return bool(token) and (token[0].isalpha() or token[0] in '_"')
+
+
+def referenced_tables(query: str) -> Set[str]:
+    """Return the relations a query reads from, as written (schema-qualified if it was).
+
+    Looks at names following FROM, JOIN and the commas of an old-style FROM list.
+    CTE names, set-returning function calls and FROM inside functions such as
+    `extract(year FROM d)` are ignored.
+    """
+    tokens = tokenize(query)
+    ctes = {
+        _unquote(tokens[i - 1])
+        for i in range(2, len(tokens) - 1)
+        if tokens[i] == "as" and tokens[i + 1] == "(" and tokens[i - 2] in ("with", ",", "recursive")
+    }
+    tables: Set[str] = set()
+    # One entry per open parenthesis: whether a SELECT was seen at that level,
+    # and whether we are inside its FROM list.
+    levels = [[False, False]]
+    expect_name = False
+    for i, token in enumerate(tokens):
+        level = levels[-1]
+        if token == "(":
+            levels.append([False, False])
+            expect_name = False
+            continue
+        if token == ")":
+            if len(levels) > 1:
+                levels.pop()
+            continue
+        if token in ("select", "delete", "update"):
+            level[:] = [True, False]
+        elif token in ("from", "join") and level[0]:
+            level[1] = token == "from" or level[1]
+            expect_name = True
+            continue
+        elif token == "," and level[1]:
+            expect_name = True
+            continue
+        elif token in _CLAUSE_END:
+            level[1] = False
+        if expect_name and token not in ("lateral", "only"):
+            expect_name = False
+            if not _is_name(token):
+                continue
+            j = i
+            name = [_unquote(tokens[j])]
+            while tokens[j + 1 : j + 2] == ["."] and j + 2 < len(tokens) and _is_name(tokens[j + 2]):
+                name.append(_unquote(tokens[j + 2]))
+                j += 2
+            if tokens[j + 1 : j + 2] == ["("]:
+                continue  # a function call, e.g. generate_series(...)
+            full = ".".join(name)
+            if full not in ctes:
+                tables.add(full)
+    return tables
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Sequence
+from typing import Dict, Sequence
 
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
@@ -11,6 +11,11 @@ from langgraph.managed import IsLastStep
 from typing_extensions import Annotated
 
 
+def merge_artifacts(left: Dict[str, str], right: Dict[str, str]) -> Dict[str, str]:
+    """Add newly stored artifacts to the existing ones."""
+    return {**left, **right}
+
+
 @dataclass
 class InputState:
     """Defines the input state for the agent, representing a narrower interface to the outside world.
@@ -53,6 +58,13 @@ class State(InputState):
     It is set to 'True' when the step count reaches recursion_limit - 1.
     """
 
+    artifacts: Annotated[Dict[str, str], merge_artifacts] = field(default_factory=dict)
+    """
+    Full tool results that were compacted out of `messages`, by ref (the tool call id).
+
+    See `react_agent.compaction`; `recall_result_tool` reads them back on demand.
+    """
+
     # Additional attributes can be added here as needed.
     # Common examples include:
     # retrieved_documents: List[Document] = field(default_factory=list)
@@ -0,0 +1,373 @@
+"""Typed SQLite storage for the column statistics.
+
+The statistics used to live in indented JSON files that repeat every key for
+every column and encode PostgreSQL numerics as strings ("10.0000000000000000"),
+so reading one table meant parsing, and holding, the whole schema. This store
+keeps one row per column with a typed field per statistic, and the top values in
+a table of their own, so a table's statistics are read with two indexed queries:
+
+    store = StatsStore("data/schema_stats/stats.sqlite")
+    store.columns("amazon_ads_thrive.profile_view")
+
+Each category of column has a fixed set of statistics (`CATEGORY_STATS`), which
+is how the per-column dictionaries are rebuilt, in their original key order.
+Numerics are stored as INTEGER or REAL: PostgreSQL pads averages to 16 decimal
+places, and those digits are rounded to double precision. Columns whose
+statistics do not follow their category's layout are kept verbatim as JSON.
+
+Convert the JSON snapshots with:
+
+    python -m react_agent.stats_store convert data/schema_stats/*_stats_*.json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_PATH = os.getenv(
+    "SCHEMA_STATS_PATH",
+    str(Path(__file__).resolve().parents[2] / "data" / "schema_stats" / "stats.sqlite"),
+)
+"""Where the store is read from and written to: the committed store in the repository's
+`data` directory, whatever the working directory, unless `SCHEMA_STATS_PATH` is set."""
+
+_COUNTS = ("total_rows", "non_null_rows", "null_rows")
+CATEGORY_STATS: Dict[str, Tuple[str, ...]] = {
+    "numeric": _COUNTS
+    + ("distinct_values", "avg_value", "min_value", "max_value", "stddev", "p25", "median", "p75"),
+    "boolean": ("total_rows", "true_count", "false_count", "null_count", "distinct_values"),
+    "date": _COUNTS + ("min_value", "max_value", "distinct_values"),
+    "timestamp": _COUNTS + ("min_value", "max_value", "distinct_values"),
+    "time": _COUNTS + ("min_value", "max_value", "distinct_values"),
+    "json": _COUNTS,
+    "text": _COUNTS + ("distinct_values", "avg_length", "min_length", "max_length"),
+}
+"""The statistics of each column category, in output order."""
+
+_TOP_VALUE_CATEGORIES = {"boolean", "text", "date", "timestamp", "time"}
+
+# Statistic columns and their SQLite types. min_value and max_value have no type
+# affinity: they hold integers, reals or ISO dates depending on the column.
+_STAT_COLUMNS: Dict[str, str] = {
+    "total_rows": "INTEGER",
+    "non_null_rows": "INTEGER",
+    "null_rows": "INTEGER",
+    "distinct_values": "INTEGER",
+    "avg_value": "REAL",
+    "min_value": "",
+    "max_value": "",
+    "stddev": "REAL",
+    "p25": "REAL",
+    "median": "REAL",
+    "p75": "REAL",
+    "true_count": "INTEGER",
+    "false_count": "INTEGER",
+    "null_count": "INTEGER",
+    "avg_length": "REAL",
+    "min_length": "INTEGER",
+    "max_length": "INTEGER",
+    "sample_percent": "REAL",
+}
+_REAL_STATS = {name for name, sql_type in _STAT_COLUMNS.items() if sql_type == "REAL"}
+
+_ENTRY_FIELDS = (
+    "signature",
+    "mod_count",
+    "watermark",
+    "version",
+    "described_version",
+    "computed_at",
+    "changed_at",
+)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS relations (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    signature TEXT,
+    mod_count INTEGER,
+    watermark TEXT,
+    version INTEGER NOT NULL DEFAULT 1,
+    described_version INTEGER,
+    computed_at TEXT,
+    changed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS columns (
+    relation_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    data_type TEXT,
+    udt_name TEXT,
+    category TEXT,
+    {", ".join(f"{name} {sql_type}".rstrip() for name, sql_type in _STAT_COLUMNS.items())},
+    extra TEXT,
+    PRIMARY KEY (relation_id, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS top_values (
+    relation_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    value,
+    count INTEGER,
+    PRIMARY KEY (relation_id, position, rank)
+) WITHOUT ROWID;
+"""
+
+
+def _typed(stat: str, category: str, value: Any) -> Any:
+    """Convert a statistic to the Python type it is stored as."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, Decimal):
+        if stat in ("min_value", "max_value") and value == value.to_integral_value():
+            return int(value)
+        return float(value)
+    if isinstance(value, (date, datetime, time)):
+        return str(value)
+    if isinstance(value, str) and (stat in _REAL_STATS or category == "numeric"):
+        # Numerics serialized with default=str.
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def normalize_columns(columns: Dict[str, Any]) -> Dict[str, Any]:
+    """Return per-column statistics with every value in the type the store returns it in."""
+    normalized = {}
+    for column, info in columns.items():
+        category = info.get("category")
+        stats = {}
+        for stat, value in (info.get("stats") or {}).items():
+            if stat == "top_values":
+                stats[stat] = [
+                    {"value": _typed("value", category, v["value"]), "count": v["count"]} for v in value
+                ]
+            else:
+                stats[stat] = _typed(stat, category, value)
+        normalized[column] = {**info, "stats": stats}
+    return normalized
+
+
+def _layout(category: str, stats: Dict[str, Any]) -> List[str]:
+    """The key order `CATEGORY_STATS` rebuilds for `stats`."""
+    keys = list(CATEGORY_STATS.get(category, ()))
+    if category in _TOP_VALUE_CATEGORIES:
+        keys.append("top_values")
+    if "sample_percent" in stats:
+        keys.append("sample_percent")
+    return keys
+
+
+class StatsStore:
+    """Column statistics per {schema}.{table_name}, read lazily from SQLite."""
+
+    def __init__(self, path: str = DEFAULT_PATH, readonly: bool = False) -> None:
+        """Open (or create) the store at `path`; ":memory:" gives a private in-memory store."""
+        self.path = path
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        """Every table in the store, sorted."""
+        with self._lock:
+            return [name for (name,) in self._conn.execute("SELECT name FROM relations ORDER BY name")]
+
+    def entry(self, name: str) -> Optional[Dict[str, Any]]:
+        """A table's refresh metadata (signature, counters, versions, timestamps), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_ENTRY_FIELDS)} FROM relations WHERE name = ?", (name,)
+            ).fetchone()
+        return dict(zip(_ENTRY_FIELDS, row)) if row else None
+
+    def columns(self, name: str) -> Optional[Dict[str, Any]]:
+        """A table's per-column statistics in the snapshot format, or None if it is unknown."""
+        stat_names = list(_STAT_COLUMNS)
+        with self._lock:
+            relation = self._conn.execute("SELECT id FROM relations WHERE name = ?", (name,)).fetchone()
+            if relation is None:
+                return None
+            rows = self._conn.execute(
+                f"SELECT position, name, data_type, udt_name, category, {', '.join(stat_names)}, extra "
+                "FROM columns WHERE relation_id = ? ORDER BY position",
+                relation,
+            ).fetchall()
+            top_rows = self._conn.execute(
+                "SELECT position, value, count FROM top_values WHERE relation_id = ? ORDER BY position, rank",
+                relation,
+            ).fetchall()
+
+        top: Dict[int, List[Dict[str, Any]]] = {}
+        categories = {row[0]: row[4] for row in rows}
+        for position, value, count in top_rows:
+            if categories[position] == "boolean":
+                value = bool(value)
+            top.setdefault(position, []).append({"value": value, "count": count})
+
+        result: Dict[str, Any] = {}
+        for position, column, data_type, udt_name, category, *values in rows:
+            extra = values.pop()
+            if extra is not None:
+                stats = json.loads(extra)
+            else:
+                stored = dict(zip(stat_names, values))
+                has_sample = stored["sample_percent"] is not None
+                stats = {}
+                for stat in _layout(category, {"sample_percent": 0} if has_sample else {}):
+                    stats[stat] = top.get(position, []) if stat == "top_values" else stored[stat]
+            result[column] = {
+                "data_type": data_type,
+                "udt_name": udt_name,
+                "category": category,
+                "stats": stats,
+            }
+        return result
+
+    def all_columns(self) -> Dict[str, Dict[str, Any]]:
+        """Every table's per-column statistics, for offline jobs that need them all."""
+        return {name: self.columns(name) or {} for name in self.names()}
+
+    def put(self, name: str, entry: Dict[str, Any]) -> None:
+        """Insert or replace a table: its metadata fields, and its statistics under "columns"."""
+        columns = normalize_columns(entry.get("columns") or {})
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT id FROM relations WHERE name = ?", (name,)).fetchone()
+            fields = {field: entry.get(field) for field in _ENTRY_FIELDS}
+            fields["version"] = fields["version"] or 1
+            if row is None:
+                cur = self._conn.execute(
+                    f"INSERT INTO relations (name, {', '.join(fields)}) VALUES (?{', ?' * len(fields)})",
+                    (name, *fields.values()),
+                )
+                relation_id = cur.lastrowid
+            else:
+                relation_id = row[0]
+                self._conn.execute(
+                    f"UPDATE relations SET {', '.join(f'{f} = ?' for f in fields)} WHERE id = ?",
+                    (*fields.values(), relation_id),
+                )
+                self._conn.execute("DELETE FROM columns WHERE relation_id = ?", (relation_id,))
+                self._conn.execute("DELETE FROM top_values WHERE relation_id = ?", (relation_id,))
+
+            column_rows = []
+            top_rows = []
+            for position, (column, info) in enumerate(columns.items()):
+                category = info.get("category")
+                stats = info.get("stats") or {}
+                typed_layout = list(stats) == _layout(category, stats)
+                values = [stats.get(stat) if typed_layout else None for stat in _STAT_COLUMNS]
+                column_rows.append(
+                    (
+                        relation_id,
+                        position,
+                        column,
+                        info.get("data_type"),
+                        info.get("udt_name"),
+                        category,
+                        *values,
+                        None if typed_layout else json.dumps(stats, default=str),
+                    )
+                )
+                if typed_layout:
+                    top_rows.extend(
+                        (relation_id, position, rank, v["value"], v["count"])
+                        for rank, v in enumerate(stats.get("top_values") or [])
+                    )
+            placeholders = ", ".join("?" * (6 + len(_STAT_COLUMNS) + 1))
+            self._conn.executemany(f"INSERT INTO columns VALUES ({placeholders})", column_rows)
+            self._conn.executemany("INSERT INTO top_values VALUES (?, ?, ?, ?, ?)", top_rows)
+
+    def set_described_version(self, name: str, version: int) -> None:
+        """Record the statistics version a table's descriptions were generated from."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE relations SET described_version = ? WHERE name = ?", (version, name))
+
+    def close(self) -> None:
+        """Close the database."""
+        self._conn.close()
+
+
+_store: Optional[StatsStore] = None
+
+
+def get_stats_store(path: Optional[str] = None) -> StatsStore:
+    """Return the process-wide read-only store, opening it on first use."""
+    global _store
+    if _store is None:
+        _store = StatsStore(path or DEFAULT_PATH, readonly=True)
+    return _store
+
+
+def convert(paths: Sequence[str], store: StatsStore) -> int:
+    """Load `{schema}_stats_{timestamp}.json` snapshots into `store`; return the tables written.
+
+    Later snapshots of a schema replace the tables of earlier ones.
+    """
+    count = 0
+    for path in sorted(paths):
+        schema = os.path.basename(path).split("_stats_")[0]
+        with open(path, encoding="utf-8") as f:
+            snapshot: Dict[str, Dict[str, Any]] = json.load(f)
+        for key, columns in snapshot.items():
+            # Older snapshots key sp_api tables without their schema.
+            name = f"{schema}.{key.split('.', 1)[-1]}"
+            # Descriptions were generated from these statistics.
+            store.put(name, {"version": 1, "described_version": 1, "columns": columns})
+            count += 1
+    return count
+
+
+def _iter_mismatches(expected: Dict[str, Any], actual: Optional[Dict[str, Any]]) -> Iterable[str]:
+    if actual is None:
+        yield "missing"
+        return
+    for column, info in expected.items():
+        if actual.get(column) != info or list(actual[column]["stats"]) != list(info["stats"]):
+            yield column
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command-line entry point: convert JSON snapshots into the store."""
+    parser = argparse.ArgumentParser(
+        prog="python -m react_agent.stats_store",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--store", default=DEFAULT_PATH, help="Store file (default: %(default)s).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_cmd = commands.add_parser("convert", help="Import JSON snapshots and verify the round trip.")
+    convert_cmd.add_argument("snapshots", nargs="+")
+    args = parser.parse_args(argv)
+
+    store = StatsStore(args.store)
+    count = convert(args.snapshots, store)
+    mismatches = 0
+    for path in args.snapshots:
+        schema = os.path.basename(path).split("_stats_")[0]
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        for key, columns in snapshot.items():
+            name = f"{schema}.{key.split('.', 1)[-1]}"
+            for column in _iter_mismatches(normalize_columns(columns), store.columns(name)):
+                mismatches += 1
+                print(f"Round trip differs for {name}.{column}")
+    store.close()
+    print(f"Stored {count} tables -> {args.store} ({os.path.getsize(args.store)} bytes, {mismatches} mismatches)")
+
+
+if __name__ == "__main__":
+    main()
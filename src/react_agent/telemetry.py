@@ -0,0 +1,220 @@
+"""Timing spans around graph nodes, tool calls and database phases.
+
+A slow answer can come from the model, from waiting for a pooled connection,
+from the query itself, or from turning its rows into CSV. Each of those is timed
+as a span:
+
+    node.call_model   llm.call       (model, input/output/cached/cache write tokens)
+                      llm.ttft       (time to the first visible token)
+    node.tools        tool.<name>
+    db.acquire        db.explain     db.execute     db.fetch (rows)    db.serialize (rows, bytes)
+    catalog.load
+
+Spans are enabled with `AGENT_TELEMETRY=1` and go to up to three places:
+
+- Prometheus, if `prometheus_client` is installed: `react_agent_span_seconds`,
+  `react_agent_span_rows_total`, `react_agent_span_bytes_total`,
+  `react_agent_llm_tokens_total` and the `react_agent_db_pool` gauges, served at
+  `/metrics` by the webapp.
+- OpenTelemetry, if `opentelemetry-api` is installed: one span each, under the
+  current trace, exported by whatever SDK the process configured.
+- The run's metadata: each node attaches the spans recorded while it ran to its
+  LangSmith run as `metadata["timings"]`.
+
+When disabled, `span()` returns a shared no-op and `record()` returns at once.
+"""
+
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+TELEMETRY_ENABLED = os.getenv("AGENT_TELEMETRY", "").lower() in ("1", "true", "yes")
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None  # type: ignore[assignment]
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - optional dependency
+    otel_trace = None  # type: ignore[assignment]
+
+_tracer = otel_trace.get_tracer("react_agent") if otel_trace is not None else None
+
+if prometheus_client is not None:
+    SPAN_SECONDS = prometheus_client.Histogram(
+        "react_agent_span_seconds",
+        "Duration of graph nodes, tool calls and database phases.",
+        ["span"],
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    )
+    SPAN_ROWS = prometheus_client.Counter(
+        "react_agent_span_rows", "Rows fetched or serialized, by span.", ["span"]
+    )
+    SPAN_BYTES = prometheus_client.Counter(
+        "react_agent_span_bytes", "Bytes serialized, by span.", ["span"]
+    )
+    LLM_TOKENS = prometheus_client.Counter(
+        "react_agent_llm_tokens", "Tokens used by model calls.", ["model", "kind"]
+    )
+    DB_POOL = prometheus_client.Gauge(
+        "react_agent_db_pool", "Connection pool statistics, see db.pool_metrics().", ["stat"]
+    )
+
+# The spans recorded during the current node, shared with the tasks it spawns.
+_node_spans: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar(
+    "node_spans", default=None
+)
+
+
+def _export(name: str, seconds: float, attributes: Dict[str, Any]) -> None:
+    if prometheus_client is not None:
+        SPAN_SECONDS.labels(name).observe(seconds)
+        if "rows" in attributes:
+            SPAN_ROWS.labels(name).inc(attributes["rows"])
+        if "bytes" in attributes:
+            SPAN_BYTES.labels(name).inc(attributes["bytes"])
+        if name == "llm.call":
+            model = str(attributes.get("model", ""))
+            for kind in ("input_tokens", "output_tokens", "cached_tokens", "cache_write_tokens"):
+                if attributes.get(kind):
+                    LLM_TOKENS.labels(model, kind.removesuffix("_tokens")).inc(attributes[kind])
+    spans = _node_spans.get()
+    if spans is not None:
+        spans.append({"name": name, "ms": round(seconds * 1000, 3), **attributes})
+
+
+class Span:
+    """A timed operation; attributes such as row counts are added with `set`."""
+
+    __slots__ = ("name", "attributes", "_start", "_otel", "_otel_context")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]) -> None:
+        """Create a span; it starts timing when entered."""
+        self.name = name
+        self.attributes = attributes
+        self._start = 0.0
+        self._otel: Any = None
+        self._otel_context: Any = None
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes to the span."""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        if _tracer is not None:
+            self._otel_context = _tracer.start_as_current_span(self.name)
+            self._otel = self._otel_context.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        seconds = time.perf_counter() - self._start
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        if self._otel is not None:
+            self._otel.set_attributes(
+                {k: v for k, v in self.attributes.items() if isinstance(v, (str, bool, int, float))}
+            )
+            self._otel_context.__exit__(exc_type, exc, tb)
+        _export(self.name, seconds, self.attributes)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **attributes: Any) -> Any:
+    """Time the enclosed block as span `name`.
+
+    Example:
+        with telemetry.span("db.execute") as s:
+            cur = await conn.execute(query)
+            s.set(rows=cur.rowcount)
+    """
+    if not TELEMETRY_ENABLED:
+        return _NOOP
+    return Span(name, attributes)
+
+
+def record(name: str, seconds: float, **attributes: Any) -> None:
+    """Record a span measured by the caller, e.g. time accumulated over a loop."""
+    if not TELEMETRY_ENABLED:
+        return
+    if _tracer is not None:
+        end = time.time_ns()
+        otel_span = _tracer.start_span(name, start_time=end - int(seconds * 1e9))
+        otel_span.set_attributes(
+            {k: v for k, v in attributes.items() if isinstance(v, (str, bool, int, float))}
+        )
+        otel_span.end(end_time=end)
+    _export(name, seconds, attributes)
+
+
+class node_span:
+    """Time a graph node and attach the spans recorded during it to its run's metadata."""
+
+    __slots__ = ("_span", "_spans", "_token")
+
+    def __init__(self, name: str) -> None:
+        """Create the span for node `name`."""
+        self._span = span(f"node.{name}")
+        self._spans: List[Dict[str, Any]] = []
+        self._token: Any = None
+
+    def __enter__(self) -> Any:
+        if not TELEMETRY_ENABLED:
+            return _NOOP
+        self._token = _node_spans.set(self._spans)
+        return self._span.__enter__()
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if not TELEMETRY_ENABLED:
+            return
+        self._span.__exit__(exc_type, exc, tb)
+        _node_spans.reset(self._token)
+        try:
+            from langsmith.run_helpers import get_current_run_tree
+
+            run_tree = get_current_run_tree()
+        except ImportError:  # pragma: no cover - langsmith ships with langchain
+            run_tree = None
+        if run_tree is not None:
+            run_tree.add_metadata({"timings": self._spans})
+
+
+def usage_attributes(message: Any) -> Dict[str, Any]:
+    """The token counts of a model response, as span attributes."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    return {
+        "input_tokens": usage.get("input_tokens", 0),
+        "output_tokens": usage.get("output_tokens", 0),
+        "cached_tokens": details.get("cache_read", 0),
+        "cache_write_tokens": details.get("cache_creation", 0),
+    }
+
+
+def prometheus_metrics() -> Optional[bytes]:
+    """The Prometheus exposition of every metric, or None without `prometheus_client`."""
+    if prometheus_client is None:
+        return None
+    from react_agent import db
+
+    for stat, value in db.pool_metrics().items():
+        DB_POOL.labels(stat).set(value)
+    return prometheus_client.generate_latest()
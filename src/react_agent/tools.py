@@ -6,17 +6,61 @@ These tools are intended as free examples to get started. For production use,
 consider implementing more robust and specialized tools tailored to your needs.
 """
 
-from typing import Any, Callable, List, Optional, Dict, cast
-import pandas as pd
-import asyncio
-from react_agent.db import get_db_connection, _sellers
+from typing import Annotated, Any, Callable, List, Optional, Dict, Tuple, cast
+from react_agent import cost_guard, db, grain_rewrite
+from react_agent.catalog import catalog
+from react_agent.db import _sellers, tenant_settings
+from react_agent.query_cache import query_cache
+from react_agent.results import fetch_csv, is_cursorable
+from react_agent.rollups import rollups
+from react_agent.schema_format import render_relation
+from react_agent.schema_index import get_index
 from langchain_core.runnables import RunnableConfig
+from psycopg.errors import QueryCanceled
+from langgraph.prebuilt import InjectedState
 from langchain_tavily import TavilySearch  # type: ignore[import-not-found]
 
 from react_agent.configuration import Configuration
-from react_agent.db import conn, get_db_connection
 
 schemas = ["sp_api_thrive_2", "amazon_ads_thrive"]
+if rollups.settings.active:
+    # Materialized rollups of the hottest aggregations; see react_agent.rollups.
+    schemas.append(rollups.settings.schema)
+
+# The only amazon_ads_thrive views the agent may use; views in other schemas are
+# all available.
+included_tables = [
+    "ad_group_level_report_view",
+    "advertised_product_report_view",
+    "campaign_level_report_view",
+    "campaign_serving_status_detail_view",
+    "profile_view",
+    "product_ad_report_view",
+    "purchased_product_keyword_report_view",
+    "sb_ad_group_report_view",
+    "sb_ad_report_view",
+    "sb_campaign_report_view",
+    "sb_keyword_report_view",
+    "sb_purchased_product_view",
+    "sb_search_term_report_view",
+    "sb_target_report_view",
+    "sd_ad_group_report_view",
+    "sd_campaign_report_view",
+    "sd_matched_target_report_view",
+    "sd_product_ad_report_view",
+    "sd_target_report_view",
+    "search_term_ad_keyword_report_view",
+    "search_term_targeting_report_view",
+    "targeting_keyword_report_view",
+    "targeting_report_view"
+]
+
+
+def _is_listed(full_table_name: str) -> bool:
+    """Whether list_tables_tool offers this {schema}.{table_name} to the agent."""
+    schema, table_name = full_table_name.split(".", 1)
+    return schema in schemas and (schema != "amazon_ads_thrive" or table_name in included_tables)
+
 
 async def search(query: str) -> Optional[dict[str, Any]]:
     """Search for general web results.
@@ -32,21 +76,28 @@ async def search(query: str) -> Optional[dict[str, Any]]:
 
 
 
-def get_seller_id(config: RunnableConfig) -> str:
-    return "admin"
-    # print("config: ", config)
+def get_seller_id(config: RunnableConfig) -> Optional[str]:
+    """Return the seller whose role runs the user's SQL, or None for the shared user.
+
+    Multi-tenant routing is switched on by the server's environment
+    (`DB_MULTI_TENANT`), never by the run's configuration, so a client cannot
+    opt out of it.
+    """
+    if not tenant_settings.enabled:
+        return None
     langgraph_auth_user = (
         config["configurable"].get("langgraph_auth_user")
         if config and "configurable" in config
         else None
     )
-    print("get_seller_id: langgraph_auth_user: ", langgraph_auth_user)
-    
+    if langgraph_auth_user is None:
+        raise ValueError("No authenticated user for this run")
+
     # Handle both dot notation and dict access for email
     email = getattr(langgraph_auth_user, 'email', None) or langgraph_auth_user.get('email')
     if not email:
         raise ValueError("No email found in langgraph_auth_user")
-        
+
     if email not in _sellers:
         raise ValueError(f"No seller found for email: {email}")
 
@@ -60,135 +111,136 @@ async def list_tables_tool(config: RunnableConfig) -> List[str]:
         List[str]: A list of table names in the format {schema}.{table_name}.
     """
     try:
-        # seller_id = get_seller_id(config) # TODO: uncomment this when we have a way to get the seller id
-        # conn = await get_db_connection(seller_id) # TODO: uncomment this when we have a way to get the seller id
-
-        conn = get_db_connection()
-        cur = conn.cursor()
-        schemas_str = ','.join(f"'{schema}'" for schema in schemas)
-        cur.execute(f"""
-            SELECT table_schema, table_name 
-            FROM information_schema.views 
-            WHERE table_schema IN ({schemas_str}) 
-            ORDER BY table_schema, table_name;
-        """)
-        result = await asyncio.to_thread(cur.fetchall)
-        # result contains tuples of (table_schema, table_name)
-
-        included_tables = [
-            "ad_group_level_report_view",
-            "advertised_product_report_view",
-            "campaign_level_report_view",
-            "campaign_serving_status_detail_view",
-            "profile_view",
-            "product_ad_report_view",
-            "purchased_product_keyword_report_view",
-            "sb_ad_group_report_view",
-            "sb_ad_report_view",
-            "sb_campaign_report_view",
-            "sb_keyword_report_view",
-            "sb_purchased_product_view",
-            "sb_search_term_report_view",
-            "sb_target_report_view",
-            "sd_ad_group_report_view",
-            "sd_campaign_report_view",
-            "sd_matched_target_report_view",
-            "sd_product_ad_report_view",
-            "sd_target_report_view",
-            "search_term_ad_keyword_report_view",
-            "search_term_targeting_report_view",
-            "targeting_keyword_report_view",
-            "targeting_report_view"
-        ]
-        # Filter to include:
-        # 1. All tables from schemas other than amazon_ads_thrive
-        # 2. Only specific tables from amazon_ads_thrive schema that are in our included list
-        filtered_result = []
-        for table in result:
-            schema, table_name = table
-            if schema == "amazon_ads_thrive":
-                # Only include tables from amazon_ads_thrive if they're in our included list
-                if table_name in included_tables:
-                    filtered_result.append(table)
-            else:
-                # Include all tables from other schemas
-                filtered_result.append(table)
-        
-        return [f"{table[0]}.{table[1]}" for table in filtered_result]
+        views = await catalog.views(schemas)
+        return [view for view in views if _is_listed(view)]
 
     except Exception as e:
         print(f"Error fetching views: {str(e)}")
         return []
-    # seller_id = get_seller_id(config)
-    # # conn = await get_db_connection(seller_id)
-    # return [
-    #     f"orders_view_{seller_id}",
-    # ]
 
-async def get_schema_tool(full_table_name: str, config: RunnableConfig) -> str:
+
+async def find_tables_tool(question: str, config: RunnableConfig, k: int = 5) -> str:
+    """Find the tables and columns most relevant to a question.
+
+    Searches a precomputed index of table names, column descriptions and sample
+    values, so it answers without querying the database.
+
+    Args:
+        question (str): The user's question, or the key terms from it.
+        k (int): The number of candidate tables to return.
+
+    Returns:
+        str: one line per candidate table, best first, each followed by its most relevant columns
+        and any precomputed rollups of it:
+        {schema}.{table_name}
+          columns: {column}, {column}, ...
+          rollups: {schema}.{table_name}, ...
+        or an error message if the operation fails.
+    """
+    try:
+        index = get_index()
+        matches = index.search(question, k=k, tables=filter(_is_listed, index.tables))
+        if not matches:
+            return f"No tables found for: {question}"
+        lines = []
+        for match in matches:
+            lines.append(f"{match.name}\n  columns: {', '.join(c.name for c in match.columns)}")
+            if match.name in rollups.by_source:
+                lines.append(f"  rollups: {', '.join(rollups.by_source[match.name])}")
+        return "\n".join(lines)
+
+    except Exception as e:
+        print(f"Error searching schema index: {str(e)}")
+        return f"Error searching schema index: {str(e)}"
+
+
+async def get_schema_tool(
+    full_table_name: str, config: RunnableConfig, keywords: Optional[List[str]] = None
+) -> str:
     """Fetch column information for a specific table in Postgres.
 
     Args:
         full_table_name (str): The name of the table to get the schema for in the format {schema}.{table_name}.
+        keywords (List[str], optional): Words from the question. If given, only the matching columns
+            and the date/identifier columns are returned.
 
     Returns:
-        str: the column information for the table represented in the following format:
-        Column: {row[0]}, Type: {row[1]}, Comment: {row[2]}
+        str: the column information for the table, one column per line:
+        {column} {type} -- {comment}
         or an error message if the operation fails.
     """
     try:
-        # seller_id = get_seller_id(config)
-        # conn = await get_db_connection(seller_id)
-
         table_schema, table_name = full_table_name.split(".")
         
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(f"""
-            SELECT 
-                c.column_name,
-                c.data_type,
-                col_description(pgc.oid, a.attnum) as column_comment
-            FROM information_schema.columns c
-            LEFT JOIN pg_class pgc ON pgc.relname = c.table_name
-            LEFT JOIN pg_namespace n ON n.oid = pgc.relnamespace AND n.nspname = c.table_schema
-            LEFT JOIN pg_attribute a ON a.attrelid = pgc.oid AND a.attname = c.column_name
-            WHERE c.table_name = '{table_name}' 
-            AND c.table_schema = '{table_schema}'
-            ORDER BY c.ordinal_position;
-        """)
-        result = await asyncio.to_thread(cur.fetchall)
+        # Served from the process-wide catalog cache; see react_agent.catalog.
+        relation = await catalog.relation(table_schema, table_name)
         # Format the schema information
-        if not result or len(result) == 0:
+        if relation is None or not relation.columns:
             return f"No schema found for table {full_table_name}"
-        
-        schema_lines = []
-        
-        for row in result:
-            column_name = row[0]
-            data_type = row[1]
-            column_comment = row[2]
-            
-            # Build column description
-            line = f"Column: {column_name}, Type: {data_type}"
-            
-            # Add comment if available
-            if column_comment:
-                line += f", Comment: {column_comment}"
-            
-            schema_lines.append(line)
-        
-        schema_info = "\n".join(schema_lines)
-        
-        # print("schema_info: ", schema_info)
-        return schema_info
+
+        configuration = Configuration.from_context()
+        return render_relation(
+            relation,
+            style=configuration.schema_format,
+            comment_chars=configuration.schema_comment_chars,
+            keywords=keywords,
+        )
 
     except Exception as e:
         return f"Error fetching schema for {full_table_name}: {str(e)}"
 
 
+async def get_schemas_tool(
+    full_table_names: List[str], config: RunnableConfig, keywords: Optional[List[str]] = None
+) -> str:
+    """Fetch column information for several tables in Postgres at once.
+
+    Prefer this over repeated get_schema_tool calls: pass every table the query
+    will reference.
+
+    Args:
+        full_table_names (List[str]): The tables to get the schemas for, each in the format {schema}.{table_name}.
+        keywords (List[str], optional): Words from the question. If given, only the matching columns
+            and the date/identifier columns are returned.
+
+    Returns:
+        str: one block per table, in the order given, separated by blank lines:
+        Table: {schema}.{table_name}
+        {column} {type} -- {comment}
+        ...
+        A table that does not exist gets a "No schema found" line instead.
+    """
+    try:
+        names = [tuple(name.split(".")) for name in full_table_names]
+        for full_table_name, name in zip(full_table_names, names):
+            if len(name) != 2:
+                return f"Error fetching schema for {full_table_name}: expected {{schema}}.{{table_name}}"
+
+        # One catalog lookup per distinct schema; see react_agent.catalog.
+        relations = await catalog.relations(cast(List[Tuple[str, str]], names))
+        configuration = Configuration.from_context()
+        blocks = []
+        for full_table_name, relation in zip(full_table_names, relations):
+            if relation is None or not relation.columns:
+                blocks.append(f"No schema found for table {full_table_name}")
+                continue
+            rendered = render_relation(
+                relation,
+                style=configuration.schema_format,
+                comment_chars=configuration.schema_comment_chars,
+                keywords=keywords,
+            )
+            blocks.append(f"Table: {full_table_name}\n{rendered}")
+        return "\n\n".join(blocks)
+
+    except Exception as e:
+        return f"Error fetching schemas for {', '.join(full_table_names)}: {str(e)}"
+
+
 async def db_query_tool(query: str, config: RunnableConfig) -> Dict[str, Any]:
-    """Execute a SQL query and return the results or error message.
+    """Execute a single read-only SQL statement and return the results or error message.
+
+    Writes fail and are rolled back; use db_write_tool for them.
 
     Args:
         query (str): The SQL query to execute.
@@ -196,29 +248,95 @@ async def db_query_tool(query: str, config: RunnableConfig) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: A dictionary containing either:
             - 'success': True/False
-            - 'data': DataFrame with results (if successful)
+            - 'data': CSV text of the results (if successful)
+            - 'row_count': Number of rows included in 'data' (if successful)
+            - 'total_rows': Number of rows the query produced (if successful)
+            - 'truncated': Whether 'data' was cut short to fit the size budget (if successful)
+            - 'cache_hit': Whether the result was served from the query cache (if successful)
+            - 'auto_limited': Whether a LIMIT was added to keep the query within the cost limits (if successful)
+            - 'rewritten': The view the query was moved to and from, and the SQL that ran, when a
+              sum over a daily view was answered from its monthly or quarterly sibling (if successful)
             - 'error': Error message (if failed)
+            - 'error_type': 'query_too_expensive' or 'statement_timeout', for queries to rewrite (if failed)
+            - 'hints': How to make the query cheaper (if failed with an 'error_type')
     """
     try:
-        # seller_id = get_seller_id(config)
-        # conn = await get_db_connection(seller_id)
-        conn = get_db_connection()
-        cur = conn.cursor()
-        try:
-            cur.execute(query)
-            result = await asyncio.to_thread(cur.fetchall)
-            # Get column names from cursor description
-            columns = [desc[0] for desc in cur.description] if cur.description else []
-            csv = pd.DataFrame(result, columns=columns).to_csv(index=False)
-            return {
-                "success": True,
-                "query": query,
-                "data": csv,
-            }
-        except Exception as e:
-            conn.rollback()
-            raise e
+        seller_id = get_seller_id(config)
+        configuration = Configuration.from_context()
+        cache_key = None
+        if configuration.use_query_cache and is_cursorable(query):
+            # Sellers see different rows through the same views, and the limits
+            # decide whether a query runs, with a LIMIT added or on a sibling view.
+            cache_key = query_cache.key(
+                query,
+                configuration.max_result_rows,
+                configuration.max_result_bytes,
+                configuration.query_auto_limit,
+                configuration.query_max_cost,
+                configuration.query_max_rows,
+                configuration.rewrite_to_coarser_grain,
+                seller_id,
+            )
+        if cache_key is not None and (cached := query_cache.get(cache_key)) is not None:
+            # Repeated queries are the hottest shapes, and keep their rollups in use.
+            await rollups.observe(cached.get("rewritten", {}).get("query", query))
+            return {"success": True, "query": query, **cached, "cache_hit": True}
+
+        rewrite = None
+        if configuration.rewrite_to_coarser_grain:
+            rewrite = await grain_rewrite.rewrite(query)
+        run_query = rewrite.query if rewrite is not None else query
+
+        async with db.connection(seller_id) as conn:
+            verdict = cost_guard.Verdict(run_query)
+            if is_cursorable(run_query):
+                verdict = await cost_guard.check(
+                    conn,
+                    run_query,
+                    max_cost=configuration.query_max_cost,
+                    max_rows=configuration.query_max_rows,
+                    # One row more than fits, so that the result shows as truncated.
+                    auto_limit=configuration.max_result_rows + 1 if configuration.query_auto_limit else None,
+                    scope=seller_id,
+                )
+            if verdict.error is not None:
+                return {"success": False, "query": query, **verdict.error}
+            result = await fetch_csv(
+                conn,
+                verdict.query,
+                max_rows=configuration.max_result_rows,
+                max_bytes=configuration.max_result_bytes,
+                statement_timeout=configuration.query_timeout_seconds,
+                # Writes go through db_write_tool.
+                read_only=True,
+            )
+        await rollups.observe(run_query)
+        response = {
+            "data": result.data,
+            "row_count": result.row_count,
+            # With a LIMIT added, the full size of the result is unknown.
+            "total_rows": None if verdict.limited else result.total_rows,
+            "truncated": result.truncated,
+            "auto_limited": verdict.limited,
+        }
+        if rewrite is not None:
+            response["rewritten"] = {"from": rewrite.source, "to": rewrite.target, "query": rewrite.query}
+        if cache_key is not None:
+            query_cache.put(cache_key, query, response)
+        return {"success": True, "query": query, **response, "cache_hit": False}
 
+    except QueryCanceled as e:
+        return {
+            "success": False,
+            "query": query,
+            "error_type": "statement_timeout",
+            "error": str(e),
+            "timeout_seconds": configuration.query_timeout_seconds,
+            "hints": [
+                "Filter on a date range or key column, aggregate in SQL, or use a "
+                "*_monthly / *_quarterly table instead of a *_daily one."
+            ],
+        }
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -237,26 +355,17 @@ async def db_write_tool(query: str, config: RunnableConfig) -> dict[str, Any]:
             - 'error': Error message (if failed)
     """
     try:
-        # seller_id = get_seller_id(config)
-        # conn = await get_db_connection(seller_id)
-        conn = get_db_connection()
-
-        def blocking_db_write():
-            cur = conn.cursor()
-            try:
-                cur.execute(query)
+        seller_id = get_seller_id(config)
+        async with db.connection(seller_id) as conn:
+            # The transaction commits on success and rolls back on error.
+            async with conn.transaction():
+                cur = await conn.execute(query)
                 rows_affected = cur.rowcount
-                conn.commit()
-                return {
-                    "success": True,
-                    "rows_affected": rows_affected,
-                    "message": "Write query executed successfully",
-                }
-            except Exception as e:
-                conn.rollback()
-                raise e
-
-        return await asyncio.to_thread(blocking_db_write)
+            return {
+                "success": True,
+                "rows_affected": rows_affected,
+                "message": "Write query executed successfully",
+            }
     except Exception as e:
         return {
             "success": False,
@@ -265,8 +374,30 @@ async def db_write_tool(query: str, config: RunnableConfig) -> dict[str, Any]:
         }
 
 
+async def recall_result_tool(
+    ref: str, state: Annotated[Dict[str, Any], InjectedState]
+) -> str:
+    """Read back an earlier tool result that was shortened to save space.
+
+    Only call this when the summary left in the conversation lacks something you need.
+
+    Args:
+        ref (str): The ref given in the shortened result.
+
+    Returns:
+        str: the original tool result, or an error message if there is no such ref.
+    """
+    artifacts = state.get("artifacts") or {}
+    if ref not in artifacts:
+        return f"No stored result with ref {ref}"
+    return artifacts[ref]
+
+
 TOOLS: List[Callable[..., Any]] = [
+    find_tables_tool,
     list_tables_tool,
     get_schema_tool,
+    get_schemas_tool,
     db_query_tool,
+    recall_result_tool,
 ]
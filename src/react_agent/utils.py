@@ -1,8 +1,29 @@
 """Utility & helper functions."""
 
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from weakref import WeakKeyDictionary
+
+import httpx
 from langchain.chat_models import init_chat_model
-from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
 from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
 
 
 def get_message_text(msg: BaseMessage) -> str:
@@ -17,11 +38,181 @@ def get_message_text(msg: BaseMessage) -> str:
         return "".join(txts).strip()
 
 
-def load_chat_model(fully_specified_name: str) -> BaseChatModel:
+def load_chat_model(fully_specified_name: str, **kwargs: Any) -> BaseChatModel:
     """Load a chat model from a fully specified name.
 
     Args:
         fully_specified_name (str): String in the format 'provider/model'.
+        **kwargs: Extra keyword arguments for the provider's chat model class.
     """
     provider, model = fully_specified_name.split("/", maxsplit=1)
-    return init_chat_model(model, model_provider=provider)
+    return init_chat_model(model, model_provider=provider, **kwargs)
+
+
+# Providers whose chat model accepts a caller-supplied `http_async_client`.
+_SHARED_CLIENT_PROVIDERS = {"openai"}
+
+_http_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    WeakKeyDictionary()
+)
+
+
+def _shared_http_client() -> Optional[httpx.AsyncClient]:
+    """Return the HTTP client shared by all models on the running event loop.
+
+    Uses HTTP/2 when the optional `h2` package is installed, so concurrent runs
+    multiplex over a few long-lived connections instead of each paying for a TLS
+    handshake.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        try:
+            import h2  # noqa: F401
+
+            http2 = True
+        except ImportError:
+            http2 = False
+        client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(600.0, connect=10.0),
+            limits=httpx.Limits(max_connections=100, keepalive_expiry=120.0),
+        )
+        _http_clients[loop] = client
+    return client
+
+
+@dataclass
+class _RegistryEntry:
+    model: Runnable[LanguageModelInput, BaseMessage]
+    tools: Tuple[Any, ...]
+    loop: Optional[asyncio.AbstractEventLoop]
+    last_used: float
+
+
+class ModelRegistry:
+    """Memoizes chat models with their tools bound, keyed by model, tools and options.
+
+    Building a chat model creates a client, and `bind_tools` re-derives every tool's
+    JSON schema, so doing both on each step of the ReAct loop is pure overhead.
+    Entries unused for `idle_seconds` are evicted, as are the least recently used
+    ones beyond `max_size`.
+    """
+
+    def __init__(self, max_size: int = 16, idle_seconds: float = 1800.0) -> None:
+        """Create an empty registry."""
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._entries: "OrderedDict[Hashable, _RegistryEntry]" = OrderedDict()
+
+    def get(
+        self,
+        fully_specified_name: str,
+        tools: Sequence[Callable[..., Any]],
+        **kwargs: Hashable,
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        """Return `load_chat_model(fully_specified_name, **kwargs).bind_tools(tools)`, memoized.
+
+        Args:
+            fully_specified_name (str): String in the format 'provider/model'.
+            tools (Sequence[Callable]): The tools to bind.
+            **kwargs: Hashable model options that distinguish cache entries.
+        """
+        try:
+            loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        # Tools and the loop are keyed by identity (and kept alive by the entry); the
+        # loop is part of the key because pooled HTTP connections cannot cross loops.
+        key = (
+            fully_specified_name,
+            tuple(id(tool) for tool in tools),
+            tuple(sorted(kwargs.items())),
+            id(loop),
+        )
+        now = time.monotonic()
+        self._evict(now)
+        entry = self._entries.get(key)
+        if entry is None:
+            provider = fully_specified_name.split("/", maxsplit=1)[0]
+            options: Dict[str, Any] = dict(kwargs)
+            if provider in _SHARED_CLIENT_PROVIDERS:
+                client = _shared_http_client()
+                if client is not None:
+                    options.setdefault("http_async_client", client)
+            model = load_chat_model(fully_specified_name, **options).bind_tools(tools)
+            entry = _RegistryEntry(model, tuple(tools), loop, now)
+            self._entries[key] = entry
+        entry.last_used = now
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return entry.model
+
+    def clear(self) -> None:
+        """Drop every cached model."""
+        self._entries.clear()
+
+    def _evict(self, now: float) -> None:
+        for key in [k for k, e in self._entries.items() if now - e.last_used > self.idle_seconds]:
+            del self._entries[key]
+
+
+model_registry = ModelRegistry(
+    max_size=int(os.getenv("MODEL_CACHE_SIZE", "16")),
+    idle_seconds=float(os.getenv("MODEL_CACHE_IDLE_SECONDS", "1800")),
+)
+"""The registry shared by every run in this process."""
+
+
+# The condition guarding the count, and the count itself (boxed so closures can bump it).
+_LimiterState = Tuple[asyncio.Condition, List[int]]
+
+
+async def _notify_all(cond: asyncio.Condition) -> None:
+    # Every waiter: each has its own limit, so the first one may still not fit.
+    async with cond:
+        cond.notify_all()
+
+
+class ConcurrencyLimiter:
+    """Caps how many holders run at once, with the cap given on each acquire.
+
+    Unlike `asyncio.Semaphore`, the limit can change between callers (it comes from
+    per-run configuration), and one limiter is kept per event loop.
+    """
+
+    def __init__(self) -> None:
+        """Create a limiter with no active holders."""
+        self._state: "WeakKeyDictionary[asyncio.AbstractEventLoop, _LimiterState]" = (
+            WeakKeyDictionary()
+        )
+
+    @property
+    def active(self) -> int:
+        """The number of current holders on the running event loop."""
+        return self._loop_state()[1][0]
+
+    @asynccontextmanager
+    async def slot(self, limit: int) -> AsyncIterator[None]:
+        """Wait until fewer than `limit` holders are active, then hold a slot."""
+        cond, active = self._loop_state()
+        async with cond:
+            await cond.wait_for(lambda: active[0] < max(limit, 1))
+            active[0] += 1
+        try:
+            yield
+        finally:
+            # Released before waiting for the lock, so that a cancellation cannot leak the slot.
+            active[0] -= 1
+            await asyncio.shield(_notify_all(cond))
+
+    def _loop_state(self) -> "_LimiterState":
+        loop = asyncio.get_running_loop()
+        state = self._state.get(loop)
+        if state is None:
+            state = self._state[loop] = (asyncio.Condition(), [0])
+        return state
@@ -0,0 +1,74 @@
+"""Custom HTTP app mounted by the LangGraph server (see `http.app` in langgraph.json).
+
+Its lifespan warms process-wide caches before the first run, keeps the sellers
+map fresh when multi-tenant routing is on, maintains the materialized rollups
+when `AGENT_ROLLUPS` is set, and releases pooled connections on shutdown. With
+`AGENT_TELEMETRY=1` and `prometheus_client` installed, it serves the metrics of
+`react_agent.telemetry` at `/metrics`.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from react_agent import db, telemetry
+from react_agent.catalog import catalog
+from react_agent.rollups import maintain, rollups
+from react_agent.schema_index import get_index
+from react_agent.tools import schemas
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette) -> AsyncIterator[None]:
+    """Warm the schema catalog and index on start-up and close the connection pool on shutdown."""
+    try:
+        await catalog.warm(schemas)
+    except Exception as e:
+        # The catalog loads lazily, so a cold start is slower but not fatal.
+        print(f"Error warming schema catalog: {str(e)}")
+    try:
+        get_index()
+    except Exception as e:
+        # find_tables_tool reports the error; rebuild with `python -m react_agent.schema_index build`.
+        print(f"Error loading schema index: {str(e)}")
+
+    channel = os.getenv("SCHEMA_CATALOG_CHANNEL")
+    listener = asyncio.create_task(catalog.listen(channel)) if channel else None
+    sellers = (
+        asyncio.create_task(
+            db.refresh_sellers(float(os.getenv("SELLERS_REFRESH_SECONDS", "300")))
+        )
+        if db.tenant_settings.enabled
+        else None
+    )
+    maintainer = (
+        asyncio.create_task(maintain(rollups.settings.interval_seconds))
+        if rollups.settings.active
+        else None
+    )
+    try:
+        yield
+    finally:
+        for task in (listener, sellers, maintainer):
+            if task is not None:
+                task.cancel()
+        await catalog.aclose()
+        await db.close_pool()
+
+
+async def metrics(request: Request) -> Response:
+    """Serve the Prometheus metrics."""
+    body = telemetry.prometheus_metrics()
+    if body is None:
+        return Response("prometheus_client is not installed\n", status_code=404)
+    return Response(body, media_type="text/plain; version=0.0.4")
+
+
+routes = [Route("/metrics", metrics)] if telemetry.TELEMETRY_ENABLED else []
+app = Starlette(routes=routes, lifespan=lifespan)
@@ -1,14 +1,268 @@
+"""Authentication and authorization for the LangGraph server.
+
+Requests carry either a LangSmith API key (`x-api-key`) or a Supabase access
+token (`Authorization: Bearer <jwt>`). Validating either used to take a round
+trip to LangSmith or Supabase on every request, so:
+
+- Authenticated users are cached under a hash of their credential until the
+  token's `exp` (or `AUTH_CACHE_TTL` seconds, whichever comes first).
+- Supabase JWTs are verified locally: HS256 tokens with `SUPABASE_JWT_SECRET`,
+  asymmetric ones with the project's JWKS, which is cached and only refetched
+  for an unknown key id. Supabase is called only when neither applies.
+- Outbound calls share one pooled `httpx.AsyncClient`.
+
+`user_cache.hits` / `.misses` and `verifications` count what happened.
+"""
+
+import asyncio
+import hashlib
 import os
+import time
+import weakref
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import dotenv
 import httpx
+import jwt
 from langgraph_sdk import Auth
-import dotenv
+
 dotenv.load_dotenv()
 
 auth = Auth()
 
 # This is loaded from the `.env` file you created above
-SUPABASE_URL = os.environ["SUPABASE_URL"]
+SUPABASE_URL = os.environ["SUPABASE_URL"].rstrip("/")
 SUPABASE_SERVICE_KEY = os.environ["SUPABASE_SERVICE_KEY"]
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET") or None
+LANGSMITH_SETTINGS_URL = "https://api.smith.langchain.com/api/v1/settings"
+
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "300"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+JWKS_TTL = float(os.getenv("SUPABASE_JWKS_TTL", "3600"))
+JWKS_MIN_REFRESH = 60.0
+"""Minimum seconds between JWKS fetches triggered by unknown key ids."""
+
+_ASYMMETRIC_ALGORITHMS = {"RS256", "ES256", "EdDSA"}
+
+verifications: Counter = Counter()
+"""How credentials were checked: local, remote, langsmith, jwks_fetch, rejected."""
+
+
+class UserCache:
+    """LRU cache of authenticated users, keyed by credential hash, with expiry."""
+
+    def __init__(self, max_size: int = AUTH_CACHE_SIZE) -> None:
+        """Create an empty cache holding at most `max_size` users."""
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._pending: Dict[str, "asyncio.Future[Optional[Tuple[Dict[str, Any], float]]]"] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(kind: str, credential: str) -> str:
+        """Return the cache key of `credential`; the credential itself is not kept."""
+        return f"{kind}:{hashlib.sha256(credential.encode()).hexdigest()}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached user for `key`, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.time():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, user: Dict[str, Any], expires_at: float) -> None:
+        """Cache `user` under `key` until `expires_at` (epoch seconds)."""
+        expires_at = min(expires_at, time.time() + AUTH_CACHE_TTL)
+        if expires_at <= time.time():
+            return
+        self._entries[key] = (expires_at, user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_or_verify(
+        self,
+        key: str,
+        verify: Callable[[], Awaitable[Optional[Tuple[Dict[str, Any], float]]]],
+    ) -> Optional[Dict[str, Any]]:
+        """Return the cached user for `key`, or verify the credential and cache the result.
+
+        Concurrent misses for the same credential share a single verification.
+
+        Args:
+            key (str): The credential's cache key.
+            verify: Returns (user, expires_at), or None if the credential is not valid.
+        """
+        user = self.get(key)
+        if user is not None:
+            return user
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(verify())
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        result = await asyncio.shield(pending)
+        if result is None:
+            return None
+        user, expires_at = result
+        self.put(key, user, expires_at)
+        return user
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+
+
+user_cache = UserCache()
+"""The users authenticated by this process."""
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def http_client() -> httpx.AsyncClient:
+    """Return the pooled HTTP client of the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+        _clients[loop] = client
+    return client
+
+
+class _JWKS:
+    """The Supabase project's signing keys, by key id."""
+
+    def __init__(self) -> None:
+        self.keys: Dict[str, jwt.PyJWK] = {}
+        self.fetched_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def get(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        """Return the key `kid`, fetching the JWKS when stale or when `kid` is unknown."""
+        key = self.keys.get(kid or "")
+        age = time.monotonic() - self.fetched_at
+        if key is not None and age < JWKS_TTL:
+            return key
+        if key is None and age < JWKS_MIN_REFRESH:
+            return None
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another request may have refreshed the keys while this one waited.
+            if time.monotonic() - self.fetched_at >= JWKS_MIN_REFRESH:
+                await self._fetch()
+        return self.keys.get(kid or "")
+
+    async def _fetch(self) -> None:
+        verifications["jwks_fetch"] += 1
+        self.fetched_at = time.monotonic()
+        try:
+            response = await http_client().get(
+                f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json",
+                headers={"apiKey": SUPABASE_SERVICE_KEY},
+            )
+            response.raise_for_status()
+            keys = jwt.PyJWKSet.from_dict(response.json()).keys
+        except (httpx.HTTPError, jwt.PyJWKSetError, ValueError) as e:
+            # Keep the keys we have; tokens fall back to remote verification.
+            print(f"Failed to fetch Supabase JWKS: {e}")
+            return
+        self.keys = {k.key_id: k for k in keys if k.key_id}
+
+
+_jwks = _JWKS()
+
+
+def _user(claims: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "identity": claims["sub"],  # Unique user identifier
+        "email": claims.get("email"),
+        "is_authenticated": True,
+    }
+
+
+async def _verify_locally(token: str) -> Optional[Tuple[Dict[str, Any], float]]:
+    """Check the token's signature and claims without calling Supabase.
+
+    Returns:
+        (user, exp), or None if no local key can verify the token.
+
+    Raises:
+        jwt.InvalidTokenError: The token is malformed, forged or expired.
+    """
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg")
+    if algorithm == "HS256":
+        if SUPABASE_JWT_SECRET is None:
+            return None
+        key: Any = SUPABASE_JWT_SECRET
+    elif algorithm in _ASYMMETRIC_ALGORITHMS:
+        jwk = await _jwks.get(header.get("kid"))
+        if jwk is None:
+            return None
+        if jwk.algorithm_name != algorithm:
+            raise jwt.InvalidAlgorithmError(f"Key {jwk.key_id} does not use {algorithm}")
+        key = jwk.key
+    else:
+        raise jwt.InvalidAlgorithmError(f"Unsupported algorithm {algorithm}")
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience="authenticated",
+        issuer=f"{SUPABASE_URL}/auth/v1",
+        options={"require": ["exp", "sub"]},
+    )
+    verifications["local"] += 1
+    return _user(claims), float(claims["exp"])
+
+
+async def _verify_remotely(token: str) -> Optional[Tuple[Dict[str, Any], float]]:
+    """Ask Supabase who the token belongs to."""
+    verifications["remote"] += 1
+    response = await http_client().get(
+        f"{SUPABASE_URL}/auth/v1/user",
+        headers={"Authorization": f"Bearer {token}", "apiKey": SUPABASE_SERVICE_KEY},
+    )
+    if response.status_code != 200:
+        return None
+    user = response.json()
+    # Supabase has just vouched for the token, so its expiry can be trusted.
+    exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    return {
+        "identity": user["id"],
+        "email": user["email"],
+        "is_authenticated": True,
+    }, float(exp) if exp else time.time() + AUTH_CACHE_TTL
+
+
+async def _verify_token(token: str) -> Optional[Tuple[Dict[str, Any], float]]:
+    return await _verify_locally(token) or await _verify_remotely(token)
+
+
+async def _verify_api_key(api_key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+    verifications["langsmith"] += 1
+    response = await http_client().get(LANGSMITH_SETTINGS_URL, headers={"x-api-key": api_key})
+    if response.status_code != 200:
+        return None
+    return {
+        "identity": "langsmith-user",
+        "email": "langsmith-user@example.com",
+        "is_authenticated": True,
+    }, time.time() + AUTH_CACHE_TTL
 
 
 @auth.authenticate
@@ -22,22 +276,15 @@ async def get_current_user(authorization: str | None, headers: dict):
     # Validate LangSmith API key by checking with LangSmith API
     if x_api_key:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    "https://api.smith.langchain.com/api/v1/settings",
-                    headers={"x-api-key": x_api_key},
-                )
-                if response.status_code == 200:
-                    return {
-                        "identity": "langsmith-user",
-                        "email": "langsmith-user@example.com",
-                        "is_authenticated": True,
-                    }
+            user = await user_cache.get_or_verify(
+                UserCache.key("api-key", x_api_key), lambda: _verify_api_key(x_api_key)
+            )
         except httpx.RequestError as e:
             raise Auth.exceptions.HTTPException(
                 status_code=401, detail=f"Failed to validate LangSmith API key: {e}"
             )
-
+        if user is not None:
+            return user
 
     if not authorization:
         raise Auth.exceptions.HTTPException(
@@ -45,29 +292,24 @@ async def get_current_user(authorization: str | None, headers: dict):
             detail="No authorization header provided",
         )
 
-    scheme, token = authorization.split()
-    assert scheme.lower() == "bearer"
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        raise Auth.exceptions.HTTPException(
+            status_code=401, detail="Expected a Bearer token"
+        )
+    token = token.strip()
 
     try:
-        # Verify token with auth provider
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{SUPABASE_URL}/auth/v1/user",
-                headers={
-                    "Authorization": authorization,
-                    "apiKey": SUPABASE_SERVICE_KEY,
-                },
-            )
-            assert response.status_code == 200
-            user = response.json()
-            print("user", user)
-            return {
-                "identity": user["id"],  # Unique user identifier
-                "email": user["email"],
-                "is_authenticated": True,
-            }
-    except Exception as e:
+        user = await user_cache.get_or_verify(
+            UserCache.key("jwt", token), lambda: _verify_token(token)
+        )
+    except (jwt.InvalidTokenError, httpx.HTTPError, KeyError, ValueError) as e:
+        verifications["rejected"] += 1
         raise Auth.exceptions.HTTPException(status_code=401, detail=str(e))
+    if user is None:
+        verifications["rejected"] += 1
+        raise Auth.exceptions.HTTPException(status_code=401, detail="Invalid token")
+    return user
 
 
 @auth.on
@@ -0,0 +1,69 @@
+import asyncio
+import importlib.util
+import time
+from pathlib import Path
+
+import jwt
+import pytest
+from langgraph_sdk import Auth
+
+SECRET = "test-secret-at-least-32-bytes-long!!"
+
+
+@pytest.fixture
+def auth(monkeypatch):
+    """Load the auth module by path, as langgraph.json does, with test settings."""
+    monkeypatch.setenv("SUPABASE_URL", "https://project.supabase.co")
+    monkeypatch.setenv("SUPABASE_SERVICE_KEY", "service-key")
+    monkeypatch.setenv("SUPABASE_JWT_SECRET", SECRET)
+    spec = importlib.util.spec_from_file_location(
+        "security_auth", Path(__file__).parents[2] / "src" / "security" / "auth.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _token(auth, **claims) -> str:
+    payload = {
+        "sub": "user-1",
+        "email": "user@example.com",
+        "aud": "authenticated",
+        "iss": f"{auth.SUPABASE_URL}/auth/v1",
+        "exp": int(time.time()) + 600,
+        **claims,
+    }
+    return jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+def test_tokens_are_verified_locally_and_cached(auth) -> None:
+    header = f"Bearer {_token(auth)}"
+
+    async def authenticate_twice():
+        return [await auth.get_current_user(header, {}) for _ in range(2)]
+
+    first, second = asyncio.run(authenticate_twice())
+    assert first == second == {
+        "identity": "user-1", "email": "user@example.com", "is_authenticated": True
+    }
+    assert auth.verifications["local"] == 1
+    assert auth.verifications["remote"] == 0
+    assert auth.user_cache.hits == 1
+
+
+def test_invalid_tokens_are_rejected(auth) -> None:
+    forged = jwt.encode({"sub": "x", "exp": int(time.time()) + 600}, "other-secret-of-32-bytes-or-more!!")
+    for token in (_token(auth, exp=int(time.time()) - 10), _token(auth, aud="anon"), forged):
+        with pytest.raises(Auth.exceptions.HTTPException) as e:
+            asyncio.run(auth.get_current_user(f"Bearer {token}", {}))
+        assert e.value.status_code == 401
+
+
+def test_cache_expiry_follows_the_token(auth) -> None:
+    cache = auth.UserCache(max_size=2)
+    cache.put("a", {"identity": "a"}, time.time() - 1)
+    assert cache.get("a") is None
+    for key in "bcd":
+        cache.put(key, {"identity": key}, time.time() + 60)
+    assert cache.get("b") is None
+    assert cache.get("d") == {"identity": "d"}
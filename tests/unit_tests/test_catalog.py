@@ -0,0 +1,158 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import psycopg
+
+from react_agent import db
+from react_agent.catalog import SchemaCatalog
+
+ROWS = [
+    ("orders_report", "v", "asin", "character varying", "Product id"),
+    ("orders_report", "v", "quantity", "integer", None),
+    ("raw_orders", "r", "asin", "character varying", None),
+]
+
+
+class FakeCursor:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+
+    async def fetchone(self):
+        return self.rows[0]
+
+    async def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self, state) -> None:
+        self.state = state
+
+    async def execute(self, query, params=None):
+        self.state["queries"] += 1
+        if "md5" in query:
+            return FakeCursor([(self.state["version"],)])
+        return FakeCursor(ROWS)
+
+
+def fake_pool(monkeypatch, state) -> None:
+    class FakePool:
+        @asynccontextmanager
+        async def connection(self):
+            yield FakeConnection(state)
+
+    async def get_pool():
+        return FakePool()
+
+    monkeypatch.setattr(db, "get_pool", get_pool)
+
+
+def test_lookups_are_served_from_cache(monkeypatch) -> None:
+    state = {"queries": 0, "version": "v1"}
+    fake_pool(monkeypatch, state)
+    catalog = SchemaCatalog(ttl=60)
+
+    async def run():
+        views = await catalog.views(["sales"])
+        rel = await catalog.relation("sales", "orders_report")
+        missing = await catalog.relation("sales", "nope")
+        return views, rel, missing
+
+    views, rel, missing = asyncio.run(run())
+    assert views == ["sales.orders_report"]
+    assert [c.name for c in rel.columns] == ["asin", "quantity"]
+    assert missing is None
+    # One version query and one column query for the whole schema.
+    assert state["queries"] == 2
+
+    catalog.invalidate("sales")
+    asyncio.run(catalog.warm(["sales"]))
+    assert state["queries"] == 4
+
+
+def test_expired_entry_is_reloaded_only_when_version_changes(monkeypatch) -> None:
+    state = {"queries": 0, "version": "v1"}
+    fake_pool(monkeypatch, state)
+    catalog = SchemaCatalog(ttl=0)
+
+    async def lookup_and_settle():
+        rel = await catalog.relation("sales", "orders_report")
+        await asyncio.sleep(0.01)
+        return rel
+
+    async def run():
+        first = await lookup_and_settle()
+        unchanged = await lookup_and_settle()
+        state["version"] = "v2"
+        await lookup_and_settle()
+        changed = await catalog.relation("sales", "orders_report")
+        return first, unchanged, changed
+
+    first, unchanged, changed = asyncio.run(run())
+    assert unchanged is first
+    assert changed is not first
+
+
+def test_relations_look_up_each_schema_once(monkeypatch) -> None:
+    state = {"queries": 0, "version": "v1"}
+    fake_pool(monkeypatch, state)
+    catalog = SchemaCatalog(ttl=60)
+
+    rels = asyncio.run(
+        catalog.relations(
+            [("sales", "orders_report"), ("sales", "nope"), ("sales", "raw_orders")]
+        )
+    )
+    assert [r.full_name if r else None for r in rels] == [
+        "sales.orders_report",
+        None,
+        "sales.raw_orders",
+    ]
+    assert state["queries"] == 2
+
+
+def test_listener_reconnects_after_connection_loss(monkeypatch) -> None:
+    catalog = SchemaCatalog(ttl=300)
+    connects = []
+
+    class ListenConnection:
+        def __init__(self, payloads, then_fail) -> None:
+            self.payloads = payloads
+            self.then_fail = then_fail
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc) -> None:
+            pass
+
+        async def execute(self, query):
+            pass
+
+        async def notifies(self):
+            for payload in self.payloads:
+                yield SimpleNamespace(payload=payload)
+            if self.then_fail:
+                raise psycopg.OperationalError("server closed the connection unexpectedly")
+            await asyncio.Event().wait()
+
+    async def connect(conninfo, autocommit):
+        connects.append(conninfo)
+        if len(connects) == 1:
+            return ListenConnection(["sp"], then_fail=True)
+        return ListenConnection([], then_fail=False)
+
+    monkeypatch.setattr(psycopg.AsyncConnection, "connect", connect)
+
+    async def run() -> None:
+        catalog._entries.update({"sp": None, "ads": None})  # type: ignore[dict-item]
+        task = asyncio.create_task(catalog.listen("schema_changes", retry_seconds=0.01))
+        while len(connects) < 2:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(run())
+    # Notifications may have been missed while disconnected: everything is reloaded.
+    assert catalog._entries == {}
@@ -0,0 +1,34 @@
+from psycopg import sql
+
+from react_agent.comments import comment_statements, plan_schema, schema_descriptions
+
+DESCRIPTIONS = {
+    "_metadata": {"total_tables": 2},
+    "orders_report": {"asin": "Product id", "units": "Units ordered"},
+    "sales.orders_report": {"asin": "Amazon product id", "gone": "Dropped column"},
+    "ads.orders_report": {"asin": "Other schema"},
+}
+
+
+def test_plan_skips_unchanged_comments() -> None:
+    current = {("orders_report", "asin"): "Amazon product id", ("orders_report", "units"): None}
+    descriptions = schema_descriptions(DESCRIPTIONS, "sales", ["orders_report"])
+    # The schema-qualified entry wins over the bare table name.
+    assert descriptions == {"orders_report": DESCRIPTIONS["sales.orders_report"]}
+
+    plan = plan_schema("sales", descriptions, current)
+    assert plan.changes == []
+    assert plan.unchanged == 1
+    assert plan.unknown == ["orders_report.gone"]
+
+    plan = plan_schema("sales", {"orders_report": DESCRIPTIONS["orders_report"]}, current)
+    assert [(c.column, c.old) for c in plan.changes] == [("asin", "Amazon product id"), ("units", None)]
+
+
+def test_statements_quote_identifiers_and_comments() -> None:
+    plan = plan_schema("sales", {"Orders": {"it's": "O'Reilly; DROP TABLE x"}}, {("Orders", "it's"): None})
+    statements = comment_statements("sales", plan.changes)
+    assert isinstance(statements, sql.Composed)
+    text = repr(statements)
+    assert "Identifier(\"it's\")" in text
+    assert "Literal(\"O'Reilly; DROP TABLE x\")" in text
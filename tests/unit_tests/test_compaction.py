@@ -0,0 +1,47 @@
+import asyncio
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langgraph.graph.message import add_messages
+
+from react_agent.compaction import apply_replacements, compact_messages
+from react_agent.tools import recall_result_tool
+
+
+def _conversation():
+    data = "month,total\n" + "".join(f"2025-{m:02d}-01,{m * 100}\n" for m in range(1, 13)) * 20
+    result = {"success": True, "query": "SELECT ...", "data": data, "row_count": 240, "total_rows": 240}
+    return add_messages([], [
+        HumanMessage("monthly sales?"),
+        AIMessage("", tool_calls=[{"name": "db_query_tool", "args": {"query": "SELECT ..."}, "id": "call_1"}]),
+        ToolMessage(json.dumps(result), tool_call_id="call_1", name="db_query_tool"),
+        AIMessage("", tool_calls=[{"name": "db_query_tool", "args": {"query": "SELECT 2"}, "id": "call_2"}]),
+        ToolMessage(json.dumps(result), tool_call_id="call_2", name="db_query_tool"),
+    ])
+
+
+def test_only_consumed_results_are_compacted() -> None:
+    messages = _conversation()
+    assert compact_messages(messages, budget=0) == ([], {})
+    assert compact_messages(messages, budget=100_000) == ([], {})
+
+    replacements, stored = compact_messages(messages, budget=500)
+    # The latest result has not been read by the model yet.
+    assert [m.tool_call_id for m in replacements] == ["call_1"]
+    assert stored == {"call_1": messages[2].content}
+    assert "month,total" in replacements[0].content and "call_1" in replacements[0].content
+
+    compacted = add_messages(messages, replacements)
+    assert [m.id for m in compacted] == [m.id for m in messages]
+    assert compacted == apply_replacements(messages, replacements)
+    # Already compacted results are not compacted again.
+    assert compact_messages(compacted, budget=500) == ([], {})
+
+
+def test_recall_result_tool_reads_the_side_store() -> None:
+    schema = convert_to_openai_tool(recall_result_tool)["function"]["parameters"]
+    assert list(schema["properties"]) == ["ref"]
+    state = {"messages": [], "artifacts": {"call_1": "full result"}}
+    assert asyncio.run(recall_result_tool("call_1", state)) == "full result"
+    assert "No stored result" in asyncio.run(recall_result_tool("call_9", state))
@@ -0,0 +1,109 @@
+import asyncio
+
+from react_agent import cost_guard
+
+
+def _scan(relation: str, rows: float, cost: float) -> dict:
+    return {"Node Type": "Seq Scan", "Relation Name": relation, "Plan Rows": rows, "Total Cost": cost}
+
+
+def _explain(plan: dict) -> list:
+    return [{"Plan": plan}]
+
+
+CARTESIAN = _explain({
+    "Node Type": "Nested Loop",
+    "Total Cost": 5e6,
+    "Plan Rows": 4e8,
+    "Plans": [
+        _scan("orders", 2e4, 400),
+        {"Node Type": "Materialize", "Plan Rows": 2e4, "Total Cost": 500, "Plans": [_scan("ads", 2e4, 400)]},
+    ],
+})
+
+BIG_SCAN = _explain(_scan("sales_daily", 5e7, 9e5))
+LIMITED = _explain({"Node Type": "Limit", "Total Cost": 20.0, "Plan Rows": 1001, "Plans": [_scan("sales_daily", 5e7, 9e5)]})
+
+AGGREGATE = {
+    "Node Type": "Aggregate", "Strategy": "Plain", "Total Cost": 9.5e5, "Plan Rows": 1,
+    "Plans": [_scan("sales_daily", 2e7, 9e5)],
+}
+LIMITED_AGGREGATE = _explain({"Node Type": "Limit", "Total Cost": 9.5e5, "Plan Rows": 1, "Plans": [AGGREGATE]})
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.explained: list[str] = []
+
+    async def execute(self, query: str, prepare=None):
+        self.explained.append(query)
+        if "cross_join" in query:
+            plan = CARTESIAN
+        elif "sum(" in query:
+            plan = LIMITED_AGGREGATE if "auto_limited" in query else _explain(AGGREGATE)
+        elif "auto_limited" in query:
+            plan = LIMITED
+        else:
+            plan = BIG_SCAN
+        return FakeCursor(plan)
+
+
+class FakeCursor:
+    def __init__(self, plan) -> None:
+        self.plan = plan
+
+    async def fetchone(self):
+        return [self.plan]
+
+
+def test_summarize_plan_flags_cartesian_joins() -> None:
+    estimate = cost_guard.summarize_plan(CARTESIAN)
+    assert estimate.cartesian
+    assert estimate.max_rows == 4e8
+    assert sorted(estimate.scans) == [("ads", 2e4), ("orders", 2e4)]
+    assert not cost_guard.summarize_plan(BIG_SCAN).cartesian
+
+
+def test_check_rejects_with_hints() -> None:
+    cost_guard.explain_cache.clear()
+    conn = FakeConnection()
+    verdict = asyncio.run(
+        cost_guard.check(conn, "SELECT * FROM orders, ads -- cross_join", max_cost=1e6, max_rows=1e7, auto_limit=1001)
+    )
+    assert verdict.error is not None
+    assert verdict.error["error_type"] == "query_too_expensive"
+    assert verdict.error["estimate"]["cartesian_join"]
+    assert any("join condition" in hint for hint in verdict.error["hints"])
+    # A cartesian join is a mistake, not something a LIMIT should paper over.
+    assert len(conn.explained) == 1
+
+
+def test_check_adds_limit_when_that_is_cheap_enough() -> None:
+    cost_guard.explain_cache.clear()
+    conn = FakeConnection()
+    verdict = asyncio.run(
+        cost_guard.check(conn, "SELECT * FROM sales_daily;", max_cost=1e6, max_rows=1e7, auto_limit=1001)
+    )
+    assert verdict.error is None and verdict.limited
+    assert verdict.query.endswith("LIMIT 1001")
+    assert "sales_daily;" not in verdict.query
+
+    rejected = asyncio.run(
+        cost_guard.check(conn, "select *  from SALES_DAILY", max_cost=1e6, max_rows=1e7)
+    )
+    assert rejected.error is not None
+    # Served from the cache by normalized SQL.
+    assert len(conn.explained) == 2
+    assert cost_guard.explain_cache.hits == 1
+
+
+def test_check_does_not_limit_an_aggregate_over_too_many_rows() -> None:
+    cost_guard.explain_cache.clear()
+    conn = FakeConnection()
+    verdict = asyncio.run(
+        cost_guard.check(conn, "SELECT sum(units) FROM sales_daily", max_cost=1e6, max_rows=1e7, auto_limit=1001)
+    )
+    # The LIMIT would apply to the one aggregated row: the scan still reads 2e7 rows.
+    assert cost_guard.summarize_plan(LIMITED_AGGREGATE).max_blocked_rows == 2e7
+    assert not verdict.limited
+    assert verdict.error is not None and verdict.error["error_type"] == "query_too_expensive"
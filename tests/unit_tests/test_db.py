@@ -0,0 +1,245 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from psycopg.errors import ReadOnlySqlTransaction
+from psycopg.pq import TransactionStatus
+
+from react_agent import db, tools
+from react_agent.configuration import Configuration
+from react_agent.query_cache import query_cache
+
+QUERY_SECONDS = 0.2
+
+
+class FakeCursor:
+    def __init__(self, conn) -> None:
+        self.conn = conn
+        self.description = [SimpleNamespace(name="n")]
+        self.rowcount = 1
+        self.rows = [(1,)]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        pass
+
+    async def execute(self, query, params=None):
+        self.conn.info.transaction_status = TransactionStatus.ACTIVE
+        await asyncio.sleep(QUERY_SECONDS)
+        self.conn.info.transaction_status = TransactionStatus.INTRANS
+        return self
+
+    async def fetchmany(self, size):
+        rows, self.rows = self.rows, []
+        return rows
+
+
+class FakeResult:
+    def __init__(self, row) -> None:
+        self.row = row
+
+    async def fetchone(self):
+        return self.row
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.info = SimpleNamespace(transaction_status=TransactionStatus.IDLE)
+        self.cancelled = False
+        self.statements: list[str] = []
+        self.read_only = False
+        self.written: list[str] = []
+
+    def cursor(self, name=None):
+        return FakeCursor(self)
+
+    async def execute(self, query, params=None, prepare=None):
+        self.statements.append(query)
+        if query == "SET TRANSACTION READ ONLY":
+            self.read_only = True
+        elif query.split()[0].upper() in ("INSERT", "UPDATE", "DELETE", "DROP"):
+            if self.read_only:
+                raise ReadOnlySqlTransaction(f"cannot execute {query.split()[0]} in a read-only transaction")
+            self.written.append(query)
+        if query.startswith("EXPLAIN"):
+            plan = {"Node Type": "Result", "Total Cost": 0.01, "Plan Rows": 1}
+            return FakeResult([[{"Plan": plan}]])
+        return FakeResult(None)
+
+    @asynccontextmanager
+    async def transaction(self):
+        try:
+            yield
+        finally:
+            self.read_only = False
+
+    async def cancel_safe(self) -> None:
+        self.cancelled = True
+
+
+class FakePool:
+    def __init__(self) -> None:
+        self.connections: list[FakeConnection] = []
+
+    @asynccontextmanager
+    async def connection(self):
+        conn = FakeConnection()
+        self.connections.append(conn)
+        yield conn
+
+
+def test_parallel_queries_overlap(monkeypatch) -> None:
+    pool = FakePool()
+
+    async def get_pool():
+        return pool
+
+    monkeypatch.setattr(db, "get_pool", get_pool)
+    query_cache.clear()
+
+    async def run(n: int) -> float:
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(tools.db_query_tool("SELECT 1", {}) for _ in range(n))
+        )
+        assert all(r["success"] for r in results)
+        return time.perf_counter() - start
+
+    n = 5
+    elapsed = asyncio.run(run(n))
+    # Serialized execution would take n * QUERY_SECONDS.
+    assert elapsed < QUERY_SECONDS * n / 2
+
+
+def test_cancelled_query_is_cancelled_on_server(monkeypatch) -> None:
+    pool = FakePool()
+
+    async def get_pool():
+        return pool
+
+    monkeypatch.setattr(db, "get_pool", get_pool)
+
+    async def run() -> None:
+        task = asyncio.create_task(tools.db_query_tool("SELECT pg_sleep(10)", {}))
+        await asyncio.sleep(QUERY_SECONDS / 4)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    assert pool.connections[0].cancelled
+    assert db.pool_metrics()["in_use"] == 0
+
+
+class FakeTenantPool(FakePool):
+    def __init__(self) -> None:
+        super().__init__()
+        self.closed = False
+
+    async def open(self, wait=False, timeout=None) -> None:
+        pass
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def test_tenant_pools_evict_least_recently_used(monkeypatch) -> None:
+    pools = db.TenantPools(db.TenantSettings(max_pools=2, idle_seconds=60))
+    opened: dict[str, FakeTenantPool] = {}
+
+    def open_pool(seller_id):
+        opened[seller_id] = FakeTenantPool()
+        return opened[seller_id]
+
+    monkeypatch.setattr(pools, "_open_pool", open_pool)
+
+    async def run() -> None:
+        async with pools.connection("a"):
+            async with pools.connection("b"):
+                pass
+            # "a" is busy, so "b" goes instead.
+            async with pools.connection("c"):
+                pass
+        await asyncio.sleep(0)
+        assert opened["b"].closed and not opened["a"].closed
+        async with pools.connection("a"):
+            pass
+        assert (pools.hits, pools.misses) == (1, 3)
+        later = time.monotonic() + 120
+        monkeypatch.setattr(db.time, "monotonic", lambda: later)
+        async with pools.connection("d"):
+            pass
+        await asyncio.sleep(0)
+        # Idle pools are closed, however few are open.
+        assert list(pools._entries) == ["d"]
+        assert opened["a"].closed and opened["c"].closed
+        await pools.aclose()
+
+    asyncio.run(run())
+
+
+def test_query_tool_does_not_write(monkeypatch) -> None:
+    pool = FakePool()
+
+    async def get_pool():
+        return pool
+
+    monkeypatch.setattr(db, "get_pool", get_pool)
+    result = asyncio.run(tools.db_query_tool("DELETE FROM orders", {}))
+    assert not result["success"]
+    assert "read-only" in result["error"]
+    assert pool.connections[0].written == []
+
+
+
+def test_cache_hits_are_observed_for_rollups(monkeypatch) -> None:
+    pool = FakePool()
+
+    async def get_pool():
+        return pool
+
+    observed: list[str] = []
+
+    async def observe(query: str) -> None:
+        observed.append(query)
+
+    monkeypatch.setattr(db, "get_pool", get_pool)
+    monkeypatch.setattr(tools.rollups, "observe", observe)
+    query_cache.clear()
+
+    async def run() -> list:
+        return [await tools.db_query_tool("SELECT sum(units) FROM sales.orders", {}) for _ in range(2)]
+
+    first, second = asyncio.run(run())
+    assert not first["cache_hit"] and second["cache_hit"]
+    assert observed == ["SELECT sum(units) FROM sales.orders"] * 2
+    assert len(pool.connections) == 1
+
+
+def test_cached_results_depend_on_the_query_limits(monkeypatch) -> None:
+    pool = FakePool()
+
+    async def get_pool():
+        return pool
+
+    monkeypatch.setattr(db, "get_pool", get_pool)
+    query_cache.clear()
+
+    async def run(configuration: Configuration) -> dict:
+        monkeypatch.setattr(tools.Configuration, "from_context", lambda: configuration)
+        return await tools.db_query_tool("SELECT 1", {})
+
+    assert not asyncio.run(run(Configuration()))["cache_hit"]
+    assert asyncio.run(run(Configuration()))["cache_hit"]
+    for changed in [
+        Configuration(query_auto_limit=False),
+        Configuration(query_max_cost=10),
+        Configuration(query_max_rows=10),
+        Configuration(rewrite_to_coarser_grain=True),
+    ]:
+        assert not asyncio.run(run(changed))["cache_hit"], changed
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from openai import AsyncOpenAI
+
+from react_agent.descriptions import DescriptionPipeline, TokenBucket, chunk_columns
+
+
+def column(category="numeric"):
+    return {"data_type": "integer", "udt_name": "int4", "category": category, "stats": {"total_rows": 3}}
+
+
+class StubLLM(BaseHTTPRequestHandler):
+    """Answers chat completions with a description per "Column:" in the prompt; the first request is rate limited."""
+
+    requests = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        StubLLM.requests += 1
+        if StubLLM.requests == 1:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b'{"error": {"message": "slow down"}}')
+            return
+        prompt = body["messages"][0]["content"]
+        columns = re.findall(r"^Column: (\S+)$", prompt, re.M)
+        answer = {
+            "id": "stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps({c: f"About {c}" for c in columns})},
+            }],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+        }
+        data = json.dumps(answer).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_chunks_respect_column_budget() -> None:
+    columns = {f"c{i}": column() for i in range(5)}
+    chunks = chunk_columns("t", columns, max_columns=2, max_prompt_tokens=100_000)
+    assert [list(c) for c in chunks] == [["c0", "c1"], ["c2", "c3"], ["c4"]]
+
+
+def test_token_bucket_waits_for_refill() -> None:
+    async def run():
+        bucket = TokenBucket(per_minute=600, capacity=1)  # 10 per second
+        assert await bucket.acquire(1) == 0
+        return await bucket.acquire(1)
+
+    assert 0.05 < asyncio.run(run()) < 0.2
+
+
+def test_pipeline_retries_chunks_and_resumes(tmp_path) -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubLLM)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    tables = {"sales.orders": {"units": column(), "asin": column("text"), "date": column("date")}}
+
+    def pipeline():
+        client = AsyncOpenAI(base_url=f"http://127.0.0.1:{server.server_port}/v1", api_key="stub", max_retries=0)
+        return DescriptionPipeline(client, max_columns=2, backoff_seconds=0.01, checkpoint_path=checkpoint)
+
+    try:
+        first = pipeline()
+        results, errors = asyncio.run(first.run(tables))
+        assert errors == {}
+        assert results == {"sales.orders": {"units": "About units", "asin": "About asin", "date": "About date"}}
+        assert (first.stats.chunks, first.stats.requests, first.stats.retries) == (2, 3, 1)
+        assert first.stats.prompt_tokens == 200
+
+        # A second run finds every chunk in the checkpoint and sends nothing.
+        second = pipeline()
+        results, _ = asyncio.run(second.run(tables))
+        assert results["sales.orders"]["date"] == "About date"
+        assert (second.stats.resumed_chunks, second.stats.requests) == (2, 0)
+    finally:
+        server.shutdown()
@@ -0,0 +1,112 @@
+import asyncio
+
+from react_agent import grain_rewrite
+from react_agent.catalog import Column, Relation
+from react_agent.stats_store import StatsStore
+
+SCHEMA = "sp_api_thrive_2"
+COLUMNS = [
+    Column("date", "date"),
+    Column("marketplace_id", "character varying"),
+    Column("units_ordered", "bigint"),
+    Column("ordered_product_sales_amount", "double precision"),
+    Column("refund_rate", "double precision"),
+]
+RELATIONS = {
+    name: Relation(SCHEMA, name, "v", COLUMNS)
+    for name in ("report_daily", "report_monthly", "report_quarterly", "basket_daily")
+}
+
+
+class FakeCatalog:
+    async def relation(self, schema, table):
+        return RELATIONS.get(table) if schema == SCHEMA else None
+
+    async def relations(self, names):
+        return [await self.relation(schema, table) for schema, table in names]
+
+
+# The first and last date of each view: daily and monthly views over the same
+# two years, the quarterly one starting a quarter later.
+COVERAGE = {
+    "report_daily": ("2023-01-01", "2024-12-31"),
+    "report_monthly": ("2023-01-01", "2024-12-01"),
+    "report_quarterly": ("2023-04-01", "2024-10-01"),
+}
+
+
+def _store(coverage) -> StatsStore:
+    store = StatsStore(":memory:")
+    for name, (first, last) in coverage.items():
+        stats = {"min_value": first, "max_value": last}
+        store.put(f"{SCHEMA}.{name}", {"columns": {"date": {"data_type": "date", "category": "date", "stats": stats}}})
+    return store
+
+
+def _rewrite(query: str, monkeypatch, coverage=COVERAGE):
+    monkeypatch.setattr(grain_rewrite, "catalog", FakeCatalog())
+    monkeypatch.setattr(grain_rewrite, "get_stats_store", lambda: _store(coverage))
+    return asyncio.run(grain_rewrite.rewrite(query))
+
+
+def test_monthly_sum_moves_to_monthly_view(monkeypatch) -> None:
+    query = (
+        "SELECT date_trunc('month', date)::date AS month, marketplace_id, sum(units_ordered) AS units\n"
+        'FROM sp_api_thrive_2."report_daily"\n'
+        "WHERE date >= '2024-01-01' AND date < date_trunc('month', current_date) - interval '2 months'\n"
+        "GROUP BY 1, 2 ORDER BY 1"
+    )
+    rewrite = _rewrite(query, monkeypatch)
+    assert rewrite is not None
+    assert rewrite.target == f"{SCHEMA}.report_monthly"
+    assert rewrite.query == query.replace('"report_daily"', '"report_monthly"')
+
+
+def test_quarterly_sum_prefers_quarterly_view(monkeypatch) -> None:
+    query = (
+        "select date_trunc('quarter', d.date) q, sum(d.ordered_product_sales_amount) "
+        "from sp_api_thrive_2.report_daily d where d.date between '2024-01-01' and '2024-06-30' group by 1"
+    )
+    assert _rewrite(query, monkeypatch).target == f"{SCHEMA}.report_quarterly"
+    # February is not a quarter boundary: only the monthly view gives the same answer.
+    assert _rewrite(query.replace("2024-01-01", "2024-02-01"), monkeypatch).target == f"{SCHEMA}.report_monthly"
+    # The quarterly view does not cover the first quarter of 2023.
+    assert _rewrite(query.replace("2024", "2023"), monkeypatch).target == f"{SCHEMA}.report_monthly"
+
+
+def test_queries_that_could_change_are_left_alone(monkeypatch) -> None:
+    base = "SELECT date_trunc('month', date), {select} FROM sp_api_thrive_2.report_daily {where} GROUP BY 1"
+    for select, where in [
+        ("sum(units_ordered)", "WHERE date >= '2024-01-15'"),  # mid-month bound
+        ("sum(units_ordered)", "WHERE date <= '2024-03-01'"),  # includes one day of March
+        ("sum(units_ordered)", "WHERE date >= current_date - 30"),  # unaligned expression
+        ("avg(units_ordered)", ""),  # not additive across days
+        ("count(*)", ""),  # counts rows, which differ
+        ("sum(refund_rate)", ""),  # a rate
+        ("sum(units_ordered)", "WHERE units_ordered > 10"),  # filters daily values
+        ("sum(case when units_ordered > 10 then units_ordered end)", ""),  # so does this
+    ]:
+        assert _rewrite(base.format(select=select, where=where), monkeypatch) is None, (select, where)
+    assert _rewrite("SELECT date_trunc('week', date), sum(units_ordered) FROM sp_api_thrive_2.report_daily GROUP BY 1", monkeypatch) is None
+    # No monthly sibling.
+    assert _rewrite("SELECT date_trunc('month', date), sum(units_ordered) FROM sp_api_thrive_2.basket_daily GROUP BY 1", monkeypatch) is None
+
+
+def test_views_covering_different_dates_are_left_alone(monkeypatch) -> None:
+    # As sales_and_traffic_business_report_daily and _monthly: the monthly view
+    # starts months earlier, and the daily one ends mid-month.
+    coverage = {"report_daily": ("2024-09-12", "2025-08-25"), "report_monthly": ("2024-03-01", "2025-07-01")}
+    base = "SELECT date_trunc('month', date), sum(units_ordered) FROM sp_api_thrive_2.report_daily {where} GROUP BY 1"
+    inside = base.format(where="WHERE date >= '2024-10-01' AND date < '2025-07-01'")
+    assert _rewrite(inside, monkeypatch, coverage).target == f"{SCHEMA}.report_monthly"
+    for where in [
+        "",  # the monthly view has months the daily one lacks
+        "WHERE date >= '2024-09-01' AND date < '2025-07-01'",  # the daily view starts mid-September
+        "WHERE date >= '2024-10-01'",  # and ends mid-August
+        "WHERE date >= '2024-10-01' AND date <= '2025-08-31'",  # the monthly view has no August
+        "WHERE date >= '2024-10-01' AND date < date_trunc('month', current_date)",  # not a literal bound
+        "WHERE date >= '2024-10-01' OR date < '2025-07-01'",
+    ]:
+        assert _rewrite(base.format(where=where), monkeypatch, coverage) is None, where
+    # Without statistics for the sibling.
+    assert _rewrite(inside, monkeypatch, {"report_daily": coverage["report_daily"]}) is None
@@ -0,0 +1,44 @@
+from datetime import UTC, datetime
+
+from react_agent import prompt_cache
+from react_agent.configuration import Configuration
+from react_agent.db import tenant_settings
+from react_agent.rollups import rollups
+
+
+def test_prefix_is_stable_across_calls() -> None:
+    configuration = Configuration(model="openai/gpt-5-mini")
+    first = prompt_cache.system_message(configuration, datetime(2025, 9, 1, 12, 0, 5, tzinfo=UTC))
+    later = prompt_cache.system_message(configuration, datetime(2025, 9, 2, 8, 30, 59, tzinfo=UTC))
+    assert first["content"][0] == later["content"][0]
+    assert first["content"][1]["text"] == "Current time: 2025-09-01T12:00+00:00"
+    assert prompt_cache.cache_kwargs(configuration, first) == prompt_cache.cache_kwargs(configuration, later)
+
+
+def test_cache_markers_depend_on_provider() -> None:
+    now = datetime(2025, 9, 1, 12, 0, tzinfo=UTC)
+    anthropic = Configuration(model="anthropic/claude-sonnet-4-5")
+    system = prompt_cache.system_message(anthropic, now, "# Available tables\nsales.orders")
+    assert system["content"][0]["cache_control"] == {"type": "ephemeral"}
+    assert system["content"][0]["text"].endswith("sales.orders")
+    assert "cache_control" not in system["content"][1]
+    assert prompt_cache.cache_kwargs(anthropic, system) == {"cache_control": {"type": "ephemeral"}}
+
+    fireworks = Configuration(model="fireworks/llama-v3p1-70b-instruct")
+    system = prompt_cache.system_message(fireworks, now)
+    assert system["content"].endswith("Current time: 2025-09-01T12:00+00:00")
+    assert prompt_cache.cache_kwargs(fireworks, system) == {}
+
+
+def test_rollups_are_described_only_when_active(monkeypatch) -> None:
+    configuration = Configuration(model="openai/gpt-5-mini")
+    now = datetime(2025, 9, 1, 12, 0, tzinfo=UTC)
+    monkeypatch.setattr(rollups.settings, "enabled", False)
+    assert "rollup" not in prompt_cache.prompt_prefix(configuration, now).lower()
+
+    monkeypatch.setattr(rollups.settings, "enabled", True)
+    monkeypatch.setattr(rollups.settings, "schema", "agent_rollups")
+    monkeypatch.setattr(tenant_settings, "enabled", False)
+    prefix = prompt_cache.prompt_prefix(configuration, now, "# Available tables\nsales.orders")
+    assert "# Rollups\n- Tables in the agent_rollups schema" in prefix
+    assert prefix.endswith("sales.orders")
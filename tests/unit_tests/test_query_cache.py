@@ -0,0 +1,54 @@
+from react_agent.query_cache import QueryCache
+from react_agent.sql_text import normalize_sql, referenced_tables
+
+
+def test_normalize_sql_ignores_formatting_case_and_in_list_order() -> None:
+    a = normalize_sql(
+        "SELECT  date, SUM(sales)\nFROM sp.sales_monthly -- last month\n"
+        "WHERE marketplace_id IN ('B', 'A') GROUP BY date;"
+    )
+    b = normalize_sql(
+        "select date, sum(sales) from SP.Sales_Monthly "
+        "where marketplace_id in ('A','B') group by date"
+    )
+    assert a == b
+    # String literals keep their case.
+    assert normalize_sql("select 'Abc'") != normalize_sql("select 'abc'")
+
+
+def test_referenced_tables() -> None:
+    query = """
+        WITH recent AS (SELECT asin FROM sp.orders_report)
+        SELECT extract(year FROM d.date), d.asin
+        FROM sp.sales_daily d
+        JOIN recent r ON r.asin = d.asin, generate_series(1, 3) g
+        WHERE d.asin IN (SELECT asin FROM ads.product_ad_report_view)
+    """
+    assert referenced_tables(query) == {
+        "sp.orders_report",
+        "sp.sales_daily",
+        "ads.product_ad_report_view",
+    }
+
+
+def test_ttl_is_the_shortest_of_the_referenced_tables() -> None:
+    cache = QueryCache(ttl_rules=[(r"_monthly$", 600), (r"_daily$", 60)], default_ttl=5)
+    assert cache.ttl_for("select * from s.sales_monthly") == 600
+    assert cache.ttl_for("select * from s.sales_monthly join s.sales_daily using (d)") == 60
+    assert cache.ttl_for("select * from s.fees") == 5
+
+
+def test_volatile_queries_are_not_cached() -> None:
+    cache = QueryCache()
+    assert cache.key("select random()") is None
+    assert cache.key("select now()") is not None
+
+
+def test_lru_eviction_by_bytes() -> None:
+    cache = QueryCache(max_bytes=25)
+    for name in ("a", "b", "c"):
+        cache.put(cache.key(f"select {name}"), f"select {name}", {"data": name * 10})
+    assert cache.get(cache.key("select a")) is None
+    assert cache.get(cache.key("select c")) == {"data": "c" * 10}
+    assert cache.size <= 25
+    assert cache.evictions == 1
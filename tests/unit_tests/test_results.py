@@ -0,0 +1,33 @@
+from react_agent.results import _CsvWriter, is_cursorable
+
+
+def test_is_cursorable() -> None:
+    assert is_cursorable("SELECT 1")
+    assert is_cursorable("  -- top sellers\n/* monthly */ WITH t AS (SELECT 1) SELECT * FROM t")
+    assert is_cursorable("(select 1) union (select 2)")
+    assert not is_cursorable("SHOW server_version")
+    assert not is_cursorable("EXPLAIN SELECT 1")
+
+
+def test_writer_stops_at_row_budget() -> None:
+    out = _CsvWriter(max_rows=2, max_bytes=10_000)
+    out.header(["a", "b"])
+    assert not out.rows([(1, None), (2, "x,y"), (3, "z")])
+    assert out.truncated
+    assert out.row_count == 2
+    assert out.getvalue() == 'a,b\n1,\n2,"x,y"\n'
+
+
+def test_writer_stops_at_byte_budget() -> None:
+    out = _CsvWriter(max_rows=100, max_bytes=12)
+    out.header(["col"])
+    assert not out.rows([("ü",), ("abcdef",)])
+    assert out.row_count == 1
+    assert len(out.getvalue().encode()) <= 12
+
+
+def test_writer_not_truncated_when_everything_fits() -> None:
+    out = _CsvWriter(max_rows=2, max_bytes=100)
+    out.header(["a"])
+    assert out.rows([(1,), (2,)])
+    assert not out.truncated
@@ -0,0 +1,53 @@
+from react_agent.catalog import Column, Relation
+from react_agent.rollups import Shape, rollup_query, shape_of
+
+ADS = Relation(
+    "amazon_ads_thrive",
+    "campaign_level_report_view",
+    "v",
+    [
+        Column("campaign_id", "bigint"),
+        Column("date", "date"),
+        Column("campaign_budget_type", "character varying"),
+        Column("clicks", "integer"),
+        Column("cost", "double precision"),
+        Column("click_through_rate", "double precision"),
+    ],
+)
+
+
+def test_shape_of_hot_aggregations() -> None:
+    shape, measures = shape_of(
+        "SELECT campaign_id, date_trunc('month', date) m, sum(cost), sum(clicks) "
+        "FROM amazon_ads_thrive.campaign_level_report_view WHERE date >= '2025-01-01' GROUP BY 1, 2",
+        ADS,
+    )
+    assert shape == Shape(ADS.full_name, "month", ("date",), ("campaign_id",))
+    assert measures == {"cost", "clicks"}
+    assert shape.name == "campaign_level__month_by_campaign_id"
+    assert Shape.from_key(shape.key) == shape
+
+    # A filter that is not on a month boundary needs daily rows.
+    shape, _ = shape_of(
+        "SELECT campaign_id, sum(cost) FROM amazon_ads_thrive.campaign_level_report_view "
+        "WHERE date >= current_date - 30 GROUP BY 1",
+        ADS,
+    )
+    assert shape.grain == "day"
+    for query in [
+        "SELECT campaign_id, avg(cost) FROM amazon_ads_thrive.campaign_level_report_view GROUP BY 1",
+        "SELECT campaign_id, sum(click_through_rate) FROM amazon_ads_thrive.campaign_level_report_view GROUP BY 1",
+        "SELECT campaign_id, sum(cost) FROM amazon_ads_thrive.campaign_level_report_view WHERE clicks > 3 GROUP BY 1",
+    ]:
+        assert shape_of(query, ADS) is None, query
+
+
+def test_rollup_query_keeps_column_names() -> None:
+    shape = Shape(ADS.full_name, "month", ("date",), ("campaign_id", "campaign_budget_type"))
+    assert rollup_query(shape, ["clicks", "cost"], ADS).as_string(None) == (
+        "SELECT date_trunc('month', \"date\")::date AS \"date\", \"campaign_id\", \"campaign_budget_type\", "
+        "sum(\"clicks\") AS \"clicks\", sum(\"cost\") AS \"cost\", count(*) AS source_rows "
+        "FROM \"amazon_ads_thrive\".\"campaign_level_report_view\" GROUP BY 1, 2, 3"
+    )
+    daily = Shape(ADS.full_name, "day", ("date",), ())
+    assert rollup_query(daily, ["cost"], ADS).as_string(None).startswith('SELECT "date", sum("cost")')
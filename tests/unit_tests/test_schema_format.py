@@ -0,0 +1,44 @@
+from react_agent.catalog import Column, Relation
+from react_agent.schema_format import render_relation, summarize_comment
+
+RELATION = Relation(
+    "sp",
+    "report_daily",
+    "v",
+    [
+        Column("date", "date", "Calendar date of the metrics. One row per day."),
+        Column("marketplace_id", "character varying", "Amazon marketplace."),
+        Column("units_refunded", "bigint", "Units refunded that day (returns)."),
+        Column("sessions", "bigint", "Browser and app sessions that day."),
+    ],
+)
+
+
+def test_summarize_comment_keeps_first_sentence_within_budget() -> None:
+    assert summarize_comment("Calendar date. One row per day.", 80) == "Calendar date."
+    assert summarize_comment("Total ordered product sales for that date", 20) == "Total ordered…"
+    assert summarize_comment("anything", 0) is None
+    assert summarize_comment(None, 80) is None
+
+
+def test_render_relation_styles() -> None:
+    assert render_relation(RELATION).splitlines()[:2] == [
+        "date date -- Calendar date of the metrics.",
+        "marketplace_id varchar -- Amazon marketplace.",
+    ]
+    verbose = render_relation(RELATION, style="verbose").splitlines()
+    assert verbose[0] == (
+        "Column: date, Type: date, Comment: Calendar date of the metrics. One row per day."
+    )
+
+
+def test_render_relation_keeps_relevant_and_key_columns() -> None:
+    lines = render_relation(RELATION, comment_chars=0, keywords=["refunds", "returns"])
+    assert lines.splitlines() == [
+        "date date",
+        "marketplace_id varchar",
+        "units_refunded bigint",
+        "(+1 more columns not matching the keywords)",
+    ]
+    # Keywords that match nothing fall back to every column.
+    assert len(render_relation(RELATION, keywords=["zzz"]).splitlines()) == 4
@@ -0,0 +1,50 @@
+from react_agent import schema_index
+from react_agent.schema_index import SchemaIndex, build, tokenize
+
+TABLES = [
+    (
+        "sales.business_report_monthly",
+        [
+            ("date", "date date First day of the month"),
+            ("units_refunded", "units_refunded units_refunded Units refunded (returns)"),
+            ("ordered_product_sales", "ordered_product_sales ordered_product_sales Revenue"),
+        ],
+    ),
+    (
+        "fees.storage_fee_report",
+        [
+            ("asin", "asin asin Product identifier B09X3JS42R"),
+            ("storage_fee", "storage_fee storage_fee Long-term storage fee charged"),
+        ],
+    ),
+]
+
+
+def test_tokenize() -> None:
+    assert tokenize("What were the Units_Refunded per month?") == ["were", "unit", "refunded", "month"]
+
+
+def test_search_ranks_tables_and_columns(tmp_path) -> None:
+    path = str(tmp_path / "index.bin")
+    build(TABLES, path)
+    index = SchemaIndex(path)
+
+    matches = index.search("how many units were refunded", k=2)
+    assert [m.name for m in matches] == ["sales.business_report_monthly"]
+    assert matches[0].columns[0].name == "units_refunded"
+
+    assert index.search("storage fees for B09X3JS42R")[0].name == "fees.storage_fee_report"
+    assert index.search("storage fees", tables=["sales.business_report_monthly"]) == []
+    index.close()
+
+
+def test_default_index_is_found_from_any_directory(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(schema_index, "_index", None)
+    assert schema_index.get_index().tables
+
+
+def test_index_builds_from_any_directory(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    schema_index.main(["--index", str(tmp_path / "index.bin"), "build"])
+    assert schema_index.SchemaIndex(str(tmp_path / "index.bin")).tables
@@ -0,0 +1,114 @@
+import asyncio
+
+from psycopg import sql
+
+from react_agent.schema_stats import (
+    TableColumns,
+    TableState,
+    _source,
+    categorize_type,
+    change_reason,
+    mark_described,
+    merge,
+    stale_descriptions,
+    table_stats,
+)
+from react_agent.stats_store import StatsStore
+
+
+class FakeCursor:
+    def __init__(self, rows) -> None:
+        self.rows = rows
+
+    async def fetchone(self):
+        return self.rows[0]
+
+    async def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.queries = []
+
+    async def execute(self, query, params=None):
+        self.queries.append(query)
+        if len(self.queries) == 1:
+            # total/non-null/null/distinct/avg/min/max/stddev/percentiles for "units",
+            # then total/non-null/null/lengths for "asin".
+            return FakeCursor([(4, 4, 0, 3, 2.5, 1, 4, 1.29, [1.75, 2.5, 3.25], 4, 3, 1, 10.0, 10, 10)])
+        return FakeCursor([(0, "B01", 2, 2), (0, "B02", 1, 2)])
+
+
+def test_categorize_type() -> None:
+    assert categorize_type("double precision", "float8") == "numeric"
+    assert categorize_type("USER-DEFINED", "int4") == "numeric"
+    assert categorize_type("timestamp with time zone", "timestamptz") == "timestamp"
+    assert categorize_type("character varying", "varchar") == "text"
+    assert categorize_type("tsvector", "tsvector") == "text"
+
+
+def test_table_stats_uses_two_queries() -> None:
+    table = TableColumns(
+        "sales", "orders_report", "v", [("units", "integer", "int4"), ("asin", "text", "text")]
+    )
+    conn = FakeConnection()
+    stats = asyncio.run(table_stats(conn, table))
+
+    assert len(conn.queries) == 2
+    units = stats["units"]["stats"]
+    assert list(units) == [
+        "total_rows", "non_null_rows", "null_rows", "distinct_values",
+        "avg_value", "min_value", "max_value", "stddev", "p25", "median", "p75",
+    ]
+    assert units["median"] == 2.5
+    asin = stats["asin"]["stats"]
+    assert asin["distinct_values"] == 2
+    assert asin["top_values"] == [{"value": "B01", "count": 2}, {"value": "B02", "count": 1}]
+
+
+def test_sampling_depends_on_relation_kind() -> None:
+    view = TableColumns("sales", "orders_report", "v", [])
+    table = TableColumns("sales", "orders", "r", [])
+    assert isinstance(_source(view, None), sql.Composed)
+    assert "TABLESAMPLE" not in repr(_source(view, 10))
+    assert "random()" in repr(_source(view, 10))
+    assert "TABLESAMPLE SYSTEM" in repr(_source(table, 10))
+
+
+def test_change_detection() -> None:
+    entry = {"signature": "s1", "mod_count": 10, "watermark": None}
+    assert change_reason(None, TableState("s1", 10)) == "new"
+    assert change_reason(entry, TableState("s1", 10)) is None
+    assert change_reason(entry, TableState("s1", 12)) == "rows modified"
+    assert change_reason(entry, TableState("s2", 10)) == "columns or definition changed"
+
+    untracked = {"signature": "s1", "mod_count": None, "watermark": "2025-09-01"}
+    assert change_reason(untracked, TableState("s1", None, "2025-09-01")) is None
+    assert change_reason(untracked, TableState("s1", None, "2025-09-02")) == "watermark moved"
+
+
+def test_only_material_changes_make_descriptions_stale() -> None:
+    def columns(avg, top):
+        return {
+            "units": {"data_type": "integer", "category": "numeric",
+                      "stats": {"total_rows": 100, "null_rows": 0, "avg_value": avg}},
+            "status": {"data_type": "text", "category": "text",
+                       "stats": {"total_rows": 100, "null_rows": 0, "distinct_values": 3,
+                                 "top_values": [{"value": v, "count": 1} for v in top]}},
+        }
+
+    store = StatsStore(":memory:")
+    state = TableState("s1", 1)
+    assert merge(store, "sales.orders", state, columns(10.0, ["a", "b", "c"]))
+    assert stale_descriptions(store, ["sales.orders"]) == []
+
+    # More rows with similar values: refreshed, but the descriptions still hold.
+    assert not merge(store, "sales.orders", state, columns(10.5, ["a", "c", "b"]))
+    assert store.entry("sales.orders")["version"] == 1
+
+    assert merge(store, "sales.orders", state, columns(25.0, ["a", "b", "c"]))
+    assert merge(store, "sales.orders", state, columns(25.0, ["x", "y", "c"]))
+    assert stale_descriptions(store, ["sales.orders", "sales.returns"]) == ["sales.orders"]
+    mark_described(store, ["sales.orders"])
+    assert stale_descriptions(store, ["sales.orders"]) == []
@@ -0,0 +1,75 @@
+import json
+
+from react_agent.stats_store import DEFAULT_PATH, StatsStore, convert
+
+SNAPSHOT = {
+    "orders_report": {
+        "units": {
+            "data_type": "integer",
+            "udt_name": "int4",
+            "category": "numeric",
+            "stats": {
+                "total_rows": 4, "non_null_rows": 4, "null_rows": 0, "distinct_values": 3,
+                "avg_value": "2.5000000000000000", "min_value": 1, "max_value": 4,
+                "stddev": "1.2909944487358056", "p25": 1.75, "median": 2.5, "p75": 3.25,
+            },
+        },
+        "is_business_order": {
+            "data_type": "boolean",
+            "udt_name": "bool",
+            "category": "boolean",
+            "stats": {
+                "total_rows": 4, "true_count": 1, "false_count": 3, "null_count": 0,
+                "distinct_values": 2,
+                "top_values": [{"value": False, "count": 3}, {"value": True, "count": 1}],
+            },
+        },
+        "order_date": {
+            "data_type": "date",
+            "udt_name": "date",
+            "category": "date",
+            "stats": {
+                "total_rows": 4, "non_null_rows": 4, "null_rows": 0,
+                "min_value": "2025-01-01", "max_value": "2025-01-03", "distinct_values": 3,
+                "top_values": [{"value": "2025-01-01", "count": 2}],
+            },
+        },
+        "payload": {
+            "data_type": "jsonb",
+            "udt_name": "jsonb",
+            "category": "json",
+            "stats": {"total_rows": 4, "non_null_rows": 1, "null_rows": 3, "note": "unexpected"},
+        },
+    }
+}
+
+
+def test_snapshots_round_trip(tmp_path) -> None:
+    path = tmp_path / "sales_stats_20250101_000000.json"
+    path.write_text(json.dumps(SNAPSHOT))
+    store = StatsStore(str(tmp_path / "stats.sqlite"))
+    assert convert([str(path)], store) == 1
+    store.close()
+
+    store = StatsStore(str(tmp_path / "stats.sqlite"), readonly=True)
+    assert store.names() == ["sales.orders_report"]
+    assert store.entry("sales.orders_report")["version"] == 1
+    columns = store.columns("sales.orders_report")
+    assert list(columns) == list(SNAPSHOT["orders_report"])
+
+    units = columns["units"]["stats"]
+    assert list(units) == list(SNAPSHOT["orders_report"]["units"]["stats"])
+    assert units["avg_value"] == 2.5 and isinstance(units["max_value"], int)
+    assert columns["is_business_order"]["stats"]["top_values"][0] == {"value": False, "count": 3}
+    assert columns["order_date"] == SNAPSHOT["orders_report"]["order_date"]
+    # Statistics outside their category's layout are kept as they were.
+    assert columns["payload"] == SNAPSHOT["orders_report"]["payload"]
+    assert store.columns("sales.missing") is None
+
+
+def test_default_store_is_found_from_any_directory(tmp_path, monkeypatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    store = StatsStore(DEFAULT_PATH, readonly=True)
+    assert any(name.startswith("sp_api_thrive_2.") for name in store.names())
+    store.close()
+
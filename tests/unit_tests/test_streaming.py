@@ -0,0 +1,80 @@
+import asyncio
+from typing import Any, AsyncIterator, List
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+from react_agent.graph import _stream_response, graph
+from react_agent.utils import model_registry
+
+
+class StreamingModel(BaseChatModel):
+    """Streams a fixed answer word by word, or a tool call in pieces."""
+
+    tool_call: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "streaming-test"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "StreamingModel":
+        return self
+
+    def _generate(self, messages: List[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        raise NotImplementedError
+
+    async def _astream(self, messages: List[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        if self.tool_call:
+            pieces = ['{"question": ', '"monthly ', 'sales"}']
+            chunks = [
+                AIMessageChunk(content="", tool_call_chunks=[{
+                    "name": "find_tables_tool" if i == 0 else None, "args": piece,
+                    "id": "call_1" if i == 0 else None, "index": 0,
+                }])
+                for i, piece in enumerate(pieces)
+            ]
+        else:
+            chunks = [AIMessageChunk(content=word) for word in ["Sales ", "were ", "up."]]
+        for chunk in chunks:
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.content, chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+
+def _stream(model: StreamingModel, **config: Any):
+    async def run():
+        tokens, final = [], None
+        async for mode, part in graph.astream(
+            {"messages": [("user", "sales?")]}, config, stream_mode=["messages", "values"]
+        ):
+            if mode == "messages" and (part[0].content or part[0].tool_call_chunks):
+                tokens.append(part[0])
+            else:
+                final = part
+        return tokens, final
+
+    return asyncio.run(run())
+
+
+def test_final_answer_streams_token_by_token(monkeypatch) -> None:
+    monkeypatch.setattr(model_registry, "get", lambda *a, **kw: StreamingModel())
+    tokens, final = _stream(StreamingModel())
+    assert [t.content for t in tokens] == ["Sales ", "were ", "up."]
+    assert isinstance(final["messages"][-1], AIMessage)
+    assert final["messages"][-1].content == "Sales were up."
+
+
+def test_tool_calls_are_assembled_and_last_step_is_not_streamed(monkeypatch) -> None:
+    model = StreamingModel(tool_call=True)
+    monkeypatch.setattr(model_registry, "get", lambda *a, **kw: model)
+
+    response = asyncio.run(_stream_response(model, [], "test"))
+    assert response.tool_calls == [{
+        "name": "find_tables_tool", "args": {"question": "monthly sales"}, "id": "call_1", "type": "tool_call",
+    }]
+
+    tokens, final = _stream(model, recursion_limit=2)
+    assert [t.content for t in tokens] == [final["messages"][-1].content]
+    assert final["messages"][-1].content.startswith("Sorry")
+    assert not final["messages"][-1].tool_calls
@@ -0,0 +1,42 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from react_agent import telemetry
+
+
+def test_disabled_spans_are_noops(monkeypatch) -> None:
+    monkeypatch.setattr(telemetry, "TELEMETRY_ENABLED", False)
+    with telemetry.node_span("tools") as node, telemetry.span("db.execute") as span:
+        span.set(rows=3)
+    assert span is node is telemetry._NOOP
+    telemetry.record("db.fetch", 0.1, rows=3)
+
+
+def test_node_collects_spans_of_its_tasks(monkeypatch) -> None:
+    monkeypatch.setattr(telemetry, "TELEMETRY_ENABLED", True)
+
+    async def tool(i: int) -> None:
+        with telemetry.span(f"tool.t{i}") as span:
+            await asyncio.sleep(0)
+            span.set(rows=i)
+        telemetry.record("db.serialize", 0.002, rows=i, bytes=10 * i)
+
+    async def node() -> telemetry.node_span:
+        spans = telemetry.node_span("tools")
+        with spans:
+            await asyncio.gather(tool(1), tool(2))
+            with telemetry.span("llm.call", model="openai/gpt-5-mini") as span:
+                span.set(**telemetry.usage_attributes(AIMessage(
+                    content="", usage_metadata={"input_tokens": 10, "output_tokens": 2, "total_tokens": 12},
+                )))
+        return spans
+
+    spans = asyncio.run(node())._spans
+    assert sorted(s["name"] for s in spans) == [
+        "db.serialize", "db.serialize", "llm.call", "node.tools", "tool.t1", "tool.t2"
+    ]
+    assert spans[-1]["name"] == "node.tools"
+    llm = next(s for s in spans if s["name"] == "llm.call")
+    assert (llm["input_tokens"], llm["output_tokens"], llm["cached_tokens"]) == (10, 2, 0)
+    assert telemetry._node_spans.get() is None
@@ -0,0 +1,125 @@
+import asyncio
+
+from react_agent import utils
+from react_agent.utils import ConcurrencyLimiter, ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def bind_tools(self, tools):
+        return (self.name, tuple(tools))
+
+
+def test_model_registry_memoizes_and_evicts(monkeypatch) -> None:
+    built = []
+
+    def fake_load(name, **kwargs):
+        built.append(name)
+        return FakeModel(name)
+
+    monkeypatch.setattr(utils, "load_chat_model", fake_load)
+
+    def tool_a():
+        """A."""
+
+    def tool_b():
+        """B."""
+
+    registry = ModelRegistry(max_size=2)
+
+    async def run():
+        first = registry.get("anthropic/a", [tool_a])
+        assert registry.get("anthropic/a", [tool_a]) is first
+        registry.get("anthropic/a", [tool_a, tool_b])
+        registry.get("anthropic/b", [tool_a])
+        # The least recently used entry was evicted and is rebuilt.
+        registry.get("anthropic/a", [tool_a])
+
+    asyncio.run(run())
+    assert built == ["anthropic/a", "anthropic/a", "anthropic/b", "anthropic/a"]
+
+
+def test_model_registry_evicts_idle_entries(monkeypatch) -> None:
+    monkeypatch.setattr(utils, "load_chat_model", lambda name, **kw: FakeModel(name))
+    registry = ModelRegistry(idle_seconds=0)
+    first = registry.get("anthropic/a", [])
+    assert registry.get("anthropic/a", []) is not first
+
+
+def test_concurrency_limiter_caps_active_holders() -> None:
+    limiter = ConcurrencyLimiter()
+    peak = 0
+
+    async def work(limit: int) -> None:
+        nonlocal peak
+        async with limiter.slot(limit):
+            peak = max(peak, limiter.active)
+            await asyncio.sleep(0.01)
+
+    async def run(limit: int) -> None:
+        await asyncio.gather(*(work(limit) for _ in range(10)))
+        assert limiter.active == 0
+
+    asyncio.run(run(3))
+    assert peak == 3
+    peak = 0
+    asyncio.run(run(1))
+    assert peak == 1
+
+
+def test_concurrency_limiter_wakes_every_waiter_that_fits() -> None:
+    limiter = ConcurrencyLimiter()
+
+    async def run() -> None:
+        release = asyncio.Event()
+        held = []
+
+        async def hold(limit: int) -> None:
+            async with limiter.slot(limit):
+                held.append(limit)
+                await release.wait()
+
+        holders = [asyncio.create_task(hold(3)) for _ in range(2)]
+        await asyncio.sleep(0)
+        strict = asyncio.create_task(hold(1))  # waits for no holder at all
+        loose = asyncio.create_task(hold(2))  # waits for one holder at most
+        await asyncio.sleep(0.01)
+        assert held == [3, 3]
+
+        # One holder leaves: `loose` fits, even though `strict` was waiting first.
+        holders[0].cancel()
+        await asyncio.sleep(0.01)
+        assert held == [3, 3, 2]
+        release.set()
+        await asyncio.gather(holders[1], strict, loose)
+        assert limiter.active == 0
+
+    asyncio.run(run())
+
+
+def test_concurrency_limiter_release_survives_cancellation() -> None:
+    limiter = ConcurrencyLimiter()
+
+    async def run() -> None:
+        entered, leave = asyncio.Event(), asyncio.Event()
+
+        async def hold() -> None:
+            async with limiter.slot(1):
+                entered.set()
+                await leave.wait()
+
+        task = asyncio.create_task(hold())
+        await entered.wait()
+        cond = limiter._loop_state()[0]
+        async with cond:
+            leave.set()
+            await asyncio.sleep(0.01)
+            # The holder is releasing its slot, waiting for the lock held here.
+            task.cancel()
+            await asyncio.sleep(0.01)
+        await asyncio.gather(task, return_exceptions=True)
+        assert limiter.active == 0
+
+    asyncio.run(run())